@@ -0,0 +1,199 @@
+#!/bin/env python3
+
+import argparse
+import sys
+from typing import Optional
+
+from py3dpaxxel.cli import args
+from py3dpaxxel.log.setup import configure_logging
+
+
+def args_for_sphinx():
+    return Args().parser
+
+
+class Args:
+    def __init__(self) -> None:
+        self.parser: argparse.ArgumentParser = argparse.ArgumentParser(
+            formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+            description="Analyzes decomposed spectra of a recorded series.")
+        sub_parsers = self.parser.add_subparsers(
+            dest='command',
+            title="command (required)",
+            description="Run specified sub-command.")
+
+        sup = sub_parsers.add_parser(
+            "shaper",
+            help="input shaper recommendation",
+            description="Finds resonance peaks and ranks the swept input shaper grid points (M593 frequency and damping) "
+                        "by residual vibration energy per axis.")
+        sup.add_argument(
+            "--fmin",
+            help="Lower limit of the frequency band in Hz.",
+            type=float,
+            default=5.0)
+        sup.add_argument(
+            "--fmax",
+            help="Upper limit of the frequency band in Hz.",
+            type=float,
+            default=200.0)
+        sup.add_argument(
+            "--peaks",
+            help="Number of peaks per spectrum.",
+            type=int,
+            default=3)
+        sup.add_argument(
+            "--rank",
+            help="Number of best grid points to report per axis.",
+            type=int,
+            default=5)
+
+        sup = sub_parsers.add_parser(
+            "cube",
+            help="assemble spectrum cube",
+            description="Assembles all decomposed spectra of a run into one memory-mappable N-D array "
+                        "(axis x frequency x zeta x sequence x measured axis x frequency bin) with coordinate labels. "
+                        "One cube file is written per run hash.")
+        sup.add_argument(
+            "--outdir",
+            help="Output path (defaults to input path).",
+            type=args.path_exists_and_is_dir,
+            default=None)
+        sup.add_argument(
+            "--outfileprefix",
+            help="Prefix of output files (<prefix>-<runhash>.cube).",
+            type=str,
+            default="cube")
+
+        sup = sub_parsers.add_parser(
+            "chirp",
+            help="frequency response of a chirp recording",
+            description="Extracts the frequency response (gain and coherence per measured axis) from a single stream "
+                        "recorded with record_step.py --chirp. The chirp arguments must match the recording.")
+        sup.add_argument(
+            "--stream",
+            help="Recorded stream file.",
+            type=args.path_exists_and_is_file,
+            required=True)
+        sup.add_argument(
+            "--axis",
+            help="Axis of motion.",
+            type=str,
+            choices=["x", "y", "z"],
+            default="x")
+        sup.add_argument(
+            "--chirpstart",
+            help="Start frequency of the chirp in Hz.",
+            type=float,
+            default=5.0)
+        sup.add_argument(
+            "--chirpstop",
+            help="Stop frequency of the chirp in Hz.",
+            type=float,
+            default=100.0)
+        sup.add_argument(
+            "--chirprate",
+            help="Sweep rate of the chirp in Hz/s.",
+            type=float,
+            default=2.0)
+        sup.add_argument(
+            "--chirpaccel",
+            help="Commanded acceleration per Hz in mm/s^2.",
+            type=float,
+            default=75.0)
+        sup.add_argument(
+            "--resolution",
+            help="Frequency resolution in Hz.",
+            type=float,
+            default=1.0)
+        sup.add_argument(
+            "--peaks",
+            help="Number of peaks per measured axis.",
+            type=int,
+            default=3)
+
+        sub_group = self.parser.add_argument_group(
+            "Flags",
+            description="General flags applied to all commands.")
+        sub_group.add_argument(
+            "--indir",
+            help="Input path.",
+            type=args.path_exists_and_is_dir,
+            default="./test_data/")
+        sub_group.add_argument(
+            "--infileprefix",
+            help="Prefix of decomposed input files.",
+            type=str,
+            default="fft")
+        sub_group.add_argument(
+            "--runhash",
+            help="Analyze only the series with the given run hash (all if left unset).",
+            type=str,
+            default=None)
+        sub_group.add_argument(
+            "--outfile",
+            help="Writes the analysis report as JSON.",
+            type=str,
+            default=None)
+
+        self.args: Optional[argparse.Namespace] = None
+
+    def parse(self) -> "Args":
+        self.args = self.parser.parse_args()
+        return self
+
+
+class Runner:
+
+    def __init__(self) -> None:
+        self._cli_args: Args = Args().parse()
+        configure_logging()
+
+    @property
+    def args(self):
+        return self._cli_args.args
+
+    @property
+    def parser(self):
+        return self._cli_args.parser
+
+    def run(self) -> int:
+        if not self.args:
+            self.parser.print_help()
+            return 1
+
+        # heavy dependencies (numpy, scipy) are loaded only when a command runs
+        from py3dpaxxel.data_decomposition.analysis_runner import DataAnalysisRunner
+        from py3dpaxxel.data_decomposition.chirp_response import ChirpResponseAnalysis
+
+        chirp_analysis = None
+        if self.args.command == "chirp":
+            chirp_analysis = ChirpResponseAnalysis(
+                axis=self.args.axis,
+                fx_start_hz=self.args.chirpstart,
+                fx_stop_hz=self.args.chirpstop,
+                hz_per_s=self.args.chirprate,
+                accel_per_hz_mm_s2=self.args.chirpaccel,
+                resolution_hz=self.args.resolution)
+
+        ret = DataAnalysisRunner(
+            command=self.args.command,
+            input_dir=self.args.indir,
+            input_file_prefix=self.args.infileprefix,
+            input_run_hash=self.args.runhash,
+            band_hz=(self.args.fmin, self.args.fmax) if self.args.command == "shaper" else (0.0, 0.0),
+            num_peaks=self.args.peaks if self.args.command in ("shaper", "chirp") else 0,
+            num_ranked=self.args.rank if self.args.command == "shaper" else 0,
+            output_filename=self.args.outfile,
+            output_dir=self.args.outdir if self.args.command == "cube" else None,
+            output_file_prefix=self.args.outfileprefix if self.args.command == "cube" else "cube",
+            input_filename=self.args.stream if self.args.command == "chirp" else None,
+            chirp_analysis=chirp_analysis).run()
+
+        if ret == -1:
+            self.parser.print_help()
+        return ret
+
+
+if __name__ == "__main__":
+    sys.exit(Runner().run())
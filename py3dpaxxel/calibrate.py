@@ -0,0 +1,101 @@
+#!/bin/env python3
+
+import argparse
+import sys
+from typing import Optional
+
+from py3dpaxxel.calibration.capture import CalibrationCapture
+from py3dpaxxel.calibration.profile import CalibrationStore
+from py3dpaxxel.calibration.runner import CalibrationRunner
+from py3dpaxxel.log.setup import configure_logging
+
+configure_logging()
+
+
+def args_for_sphinx():
+    return Args().parser
+
+
+class Args:
+    def __init__(self) -> None:
+        self.parser: argparse.ArgumentParser = argparse.ArgumentParser(
+            formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+            description="Captures and manages per-device offset, gain and orientation calibration profiles.")
+        sub_parsers = self.parser.add_subparsers(
+            dest='command',
+            title="command (required)",
+            description="Run specified sub-command.")
+
+        sup = sub_parsers.add_parser(
+            "capture",
+            help="capture calibration",
+            description="Captures static poses (device resting with one axis pointing up or down), "
+                        "solves for offset and 3x3 gain/orientation matrix and stores the profile by device serial number.")
+        sup.add_argument(
+            "--poses",
+            help="Comma separated poses to capture (axis pointing up), at least four not lying in one plane.",
+            type=lambda poses: poses.split(","),
+            default=",".join(CalibrationCapture.POSES.keys()))
+        sup.add_argument(
+            "--samples",
+            help="Number of samples averaged per pose.",
+            type=int,
+            default=1600)
+
+        sub_parsers.add_parser(
+            "show",
+            help="show calibration",
+            description="Shows the stored profile of the attached device.")
+
+        sub_group = self.parser.add_argument_group(
+            "Flags",
+            description="General flags applied to all commands.")
+        sub_group.add_argument(
+            "--device",
+            help="Controllers serial device node to communicate with.",
+            default="/dev/ttyACM0")
+        sub_group.add_argument(
+            "--dir",
+            help="Directory of stored calibration profiles.",
+            type=str,
+            default=CalibrationStore.DEFAULT_DIRECTORY)
+
+        self.args: Optional[argparse.Namespace] = None
+
+    def parse(self) -> "Args":
+        self.args = self.parser.parse_args()
+        return self
+
+
+class Runner:
+
+    def __init__(self) -> None:
+        self._cli_args: Args = Args().parse()
+
+    @property
+    def args(self):
+        return self._cli_args.args
+
+    @property
+    def parser(self):
+        return self._cli_args.parser
+
+    def run(self) -> int:
+        if not self.args:
+            self.parser.print_help()
+            return 1
+
+        ret = CalibrationRunner(
+            command=self.args.command,
+            controller_serial_dev_name=self.args.device,
+            store_dir=self.args.dir,
+            poses=self.args.poses if self.args.command == "capture" else [],
+            num_samples=self.args.samples if self.args.command == "capture" else 0).run()
+
+        if ret == -1:
+            self.parser.print_help()
+        return ret
+
+
+if __name__ == "__main__":
+    sys.exit(Runner().run())
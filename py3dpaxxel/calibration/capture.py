@@ -0,0 +1,119 @@
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from py3dpaxxel.calibration.profile import CalibrationProfile, CalibrationStore
+from py3dpaxxel.controller.api import Py3dpAxxel
+from py3dpaxxel.controller.constants import OutputDataRate, Range, Scale
+from py3dpaxxel.controller.decoder_sink import DecoderSink
+from py3dpaxxel.controller.transfer_types import RxAcceleration
+
+
+class _StaticPoseSink(DecoderSink):
+    """
+    Collects the samples of one stream.
+    """
+
+    def __init__(self) -> None:
+        self.xyz: List[Tuple[float, float, float]] = []
+
+    def on_acceleration(self, package: RxAcceleration) -> None:
+        self.xyz.append((package.x, package.y, package.z))
+
+
+class CalibrationCapture:
+    """
+    Captures static poses of a device and solves for offset, gain and orientation.
+
+    For each pose the sensor rests with one axis pointing up or down (see :attr:`POSES`).
+    The mean of each pose is fitted by least squares to the expected gravity vector,
+    thus at least four poses not lying in one plane are required, all six are recommended.
+    """
+
+    STANDARD_GRAVITY_MG = 1000.0
+    POSES: Dict[str, Tuple[float, float, float]] = {
+        "+x": (+1.0, 0.0, 0.0),
+        "-x": (-1.0, 0.0, 0.0),
+        "+y": (0.0, +1.0, 0.0),
+        "-y": (0.0, -1.0, 0.0),
+        "+z": (0.0, 0.0, +1.0),
+        "-z": (0.0, 0.0, -1.0),
+    }
+    "pose name (axis pointing up) to expected normalized reading"
+
+    def __init__(self,
+                 ser_dev_name: str,
+                 poses: List[str] = tuple(POSES.keys()),
+                 num_samples: int = 1600,
+                 prompt: Optional[Callable[[str], None]] = None) -> None:
+        """
+
+        :param ser_dev_name: i.e. "/dev/ttyACM0"
+        :param poses: pose names (see :attr:`POSES`) in the order they are captured
+        :param num_samples: samples averaged per pose
+        :param prompt: invoked with the pose name before capturing, shall return once the device is placed accordingly,
+            defaults to waiting for the enter key
+        """
+        assert len(poses) >= 4, "at least four poses are required"
+        assert all([p in CalibrationCapture.POSES for p in poses]), f"unknown pose in {poses}"
+        self.ser_dev_name: str = ser_dev_name
+        self.poses: List[str] = list(poses)
+        self.num_samples: int = num_samples
+        self.prompt: Callable[[str], None] = prompt if prompt is not None else \
+            lambda pose: input(f"place device with {pose[1]}-axis pointing {'up' if pose[0] == '+' else 'down'}, then press enter ")
+
+    def _capture_pose(self, sensor: Py3dpAxxel) -> np.ndarray:
+        sink = _StaticPoseSink()
+        sensor.start_sampling(self.num_samples)
+        sensor.decode(return_on_stop=True, sinks=[sink])
+        return np.mean(np.asarray(sink.xyz, dtype=np.float64), axis=0)
+
+    @staticmethod
+    def solve(serial: str, measured_mg: np.ndarray, expected_mg: np.ndarray) -> CalibrationProfile:
+        """
+        Least squares fit of `expected = matrix @ (measured - offset)`.
+
+        :param serial: device serial number
+        :param measured_mg: mean reading per pose, shape `(poses, 3)`
+        :param expected_mg: expected reading per pose, shape `(poses, 3)`
+        :return: the fitted profile
+        """
+        design = np.column_stack((measured_mg, np.ones(measured_mg.shape[0])))
+        solution, _residuals, rank, _sv = np.linalg.lstsq(design, expected_mg, rcond=None)
+        assert rank == 4, "poses are degenerated (all in one plane)"
+        matrix = solution[:3].T
+        offset_mg = -np.linalg.solve(matrix, solution[3])
+        residual_mg = float(np.sqrt(np.mean(np.square(design @ solution - expected_mg))))
+        return CalibrationProfile(serial, offset_mg, matrix, residual_mg=residual_mg)
+
+    def run(self) -> CalibrationProfile:
+        """
+        Captures all poses (blocking) and solves for the profile.
+        The output data rate, range and scale of the device are restored afterwards.
+
+        :return: the profile, not stored yet (see :class:`CalibrationStore`)
+        """
+        serial = CalibrationStore.serial_of_device(self.ser_dev_name)
+        assert serial is not None, f"no device found at {self.ser_dev_name}"
+
+        measured_mg = np.empty((len(self.poses), 3))
+        with Py3dpAxxel(self.ser_dev_name) as sensor:
+            previous_odr, previous_range, previous_scale = sensor.get_output_data_rate(), sensor.get_range(), sensor.get_scale()
+            try:
+                sensor.set_output_data_rate(OutputDataRate.ODR800)
+                sensor.set_range(Range.G2)
+                sensor.set_scale(Scale.FULL_RES_4MG_LSB)
+                for i, pose in enumerate(self.poses):
+                    self.prompt(pose)
+                    measured_mg[i] = self._capture_pose(sensor)
+                    logging.info(f"pose {pose}: mean={measured_mg[i].tolist()} mg")
+            finally:
+                sensor.set_output_data_rate(previous_odr)
+                sensor.set_range(previous_range)
+                sensor.set_scale(previous_scale)
+
+        expected_mg = np.asarray([CalibrationCapture.POSES[p] for p in self.poses]) * CalibrationCapture.STANDARD_GRAVITY_MG
+        profile = CalibrationCapture.solve(serial, measured_mg, expected_mg)
+        logging.info(f"calibration: {profile}")
+        return profile
@@ -0,0 +1,109 @@
+import json
+import os
+from typing import Optional, List, Dict, Union
+
+import numpy as np
+
+from py3dpaxxel.controller.api import Py3dpAxxel
+from py3dpaxxel.storage.filename import timestamp
+
+
+class CalibrationProfile:
+    """
+    Offset, gain and orientation calibration of one device.
+
+    Calibrated samples are computed as `matrix @ (raw - offset)` where the 3x3 matrix combines gain and rotation.
+    Applied to sample blocks of shape `(samples, 3)` this is one matrix multiply.
+    """
+
+    def __init__(self,
+                 serial: str,
+                 offset_mg: Union[np.ndarray, List[float]] = (0.0, 0.0, 0.0),
+                 matrix: Union[np.ndarray, List[List[float]]] = ((1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0)),
+                 created: Optional[str] = None,
+                 residual_mg: Optional[float] = None) -> None:
+        """
+
+        :param serial: device serial number (see :meth:`py3dpaxxel.controller.api.Py3dpAxxel.get_devices_dict`)
+        :param offset_mg: zero-g offset per axis
+        :param matrix: gain and rotation (3x3)
+        :param created: timestamp of capture
+        :param residual_mg: RMS fit error of the capture
+        """
+        self.serial: str = serial
+        self.offset_mg: np.ndarray = np.asarray(offset_mg, dtype=np.float64).reshape(3)
+        self.matrix: np.ndarray = np.asarray(matrix, dtype=np.float64).reshape(3, 3)
+        self.created: str = created if created is not None else timestamp()
+        self.residual_mg: Optional[float] = residual_mg
+
+    def apply(self, xyz_mg: np.ndarray) -> np.ndarray:
+        """
+        :param xyz_mg: raw samples, shape `(samples, 3)`
+        :return: calibrated samples, shape `(samples, 3)`
+        """
+        return (np.asarray(xyz_mg, dtype=np.float64) - self.offset_mg) @ self.matrix.T
+
+    def to_dict(self) -> Dict[str, Union[str, float, List]]:
+        return {
+            "serial": self.serial,
+            "created": self.created,
+            "offset_mg": self.offset_mg.tolist(),
+            "matrix": self.matrix.tolist(),
+            "residual_mg": self.residual_mg,
+        }
+
+    @staticmethod
+    def from_dict(profile: Dict[str, Union[str, float, List]]) -> "CalibrationProfile":
+        return CalibrationProfile(profile["serial"], profile["offset_mg"], profile["matrix"], profile.get("created"), profile.get("residual_mg"))
+
+    @staticmethod
+    def from_file(filename: str) -> "CalibrationProfile":
+        with open(filename, "r") as f:
+            return CalibrationProfile.from_dict(json.load(f))
+
+    def __str__(self) -> str:
+        return f"serial={self.serial} created={self.created} offset_mg={self.offset_mg.tolist()} matrix={self.matrix.tolist()} residual_mg={self.residual_mg}"
+
+
+class CalibrationStore:
+    """
+    Persistent per-device calibration profiles: one JSON file per serial number.
+    """
+
+    DEFAULT_DIRECTORY = os.path.join(os.path.expanduser("~"), ".config", "py3dpaxxel", "calibration")
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY) -> None:
+        self.directory: str = directory
+
+    def path(self, serial: str) -> str:
+        return os.path.join(self.directory, f"{serial}.json")
+
+    def save(self, profile: CalibrationProfile) -> str:
+        """
+        :return: file name the profile was stored to
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        filename = self.path(profile.serial)
+        with open(filename, "w") as f:
+            json.dump(profile.to_dict(), f, indent=2)
+        return filename
+
+    def load(self, serial: str) -> Optional[CalibrationProfile]:
+        """
+        :return: the stored profile or None if the device was not calibrated yet
+        """
+        filename = self.path(serial)
+        return CalibrationProfile.from_file(filename) if os.path.isfile(filename) else None
+
+    def load_for_device(self, ser_dev_name: str) -> Optional[CalibrationProfile]:
+        """
+        :param ser_dev_name: i.e. "/dev/ttyACM0"
+        :return: the stored profile of the attached device or None
+        """
+        serial = CalibrationStore.serial_of_device(ser_dev_name)
+        return self.load(serial) if serial is not None else None
+
+    @staticmethod
+    def serial_of_device(ser_dev_name: str) -> Optional[str]:
+        device = Py3dpAxxel.get_devices_dict().get(ser_dev_name)
+        return device["serial"] if device is not None else None
@@ -0,0 +1,48 @@
+import logging
+from typing import Callable, List, Optional
+
+from py3dpaxxel.calibration.capture import CalibrationCapture
+from py3dpaxxel.calibration.profile import CalibrationStore
+
+
+class CalibrationRunner(Callable[[], int]):
+
+    def __init__(self,
+                 command: Optional[str],
+                 controller_serial_dev_name: str,
+                 store_dir: str,
+                 poses: List[str],
+                 num_samples: int) -> None:
+        self.command: Optional[str] = command
+        self.controller_serial_dev_name: str = controller_serial_dev_name
+        self.store: CalibrationStore = CalibrationStore(store_dir)
+        self.poses: List[str] = poses
+        self.num_samples: int = num_samples
+
+    def __call__(self) -> int:
+        return self.run()
+
+    def run(self) -> int:
+        if not self.command:
+            return -1
+
+        if self.command == "capture":
+            profile = CalibrationCapture(self.controller_serial_dev_name, self.poses, self.num_samples).run()
+            logging.info(f"profile saved to {self.store.save(profile)}")
+            return 0
+
+        elif self.command == "show":
+            serial = CalibrationStore.serial_of_device(self.controller_serial_dev_name)
+            if serial is None:
+                logging.warning(f"no device found at {self.controller_serial_dev_name}")
+                return 1
+            profile = self.store.load(serial)
+            if profile is None:
+                logging.warning(f"no profile stored for serial {serial} in {self.store.directory}")
+                return 1
+            logging.info(f"profile {self.store.path(serial)}: {profile}")
+            return 0
+
+        else:
+            logging.info("nothing to do")
+            return -1
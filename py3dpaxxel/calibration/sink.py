@@ -0,0 +1,56 @@
+import copy
+from typing import List
+
+import numpy as np
+
+from py3dpaxxel.calibration.profile import CalibrationProfile
+from py3dpaxxel.controller.decoder_sink import DecoderSink
+from py3dpaxxel.controller.transfer_types import RxAcceleration
+
+
+class CalibratedSink(DecoderSink):
+    """
+    Applies a :class:`CalibrationProfile` to the decoded samples and forwards them to other sinks.
+
+    Samples are buffered and calibrated block-wise (one matrix multiply per block), thus the
+    forwarded samples lag behind by at most `block_size` samples. The remainder is flushed on stop.
+    Calibrated copies are forwarded, the decoded samples (written to the stream file and passed to other sinks) stay uncalibrated.
+    """
+
+    def __init__(self, calibration: CalibrationProfile, sinks: List[DecoderSink], block_size: int = 32) -> None:
+        """
+
+        :param calibration: profile of the attached device
+        :param sinks: consumers of calibrated samples
+        :param block_size: number of samples calibrated at once
+        """
+        self.calibration: CalibrationProfile = calibration
+        self.sinks: List[DecoderSink] = sinks
+        self.block_size: int = block_size
+        self._packages: List[RxAcceleration] = []
+
+    def _flush(self) -> None:
+        if 0 == len(self._packages):
+            return
+        xyz = self.calibration.apply(np.asarray([(p.x, p.y, p.z) for p in self._packages]))
+        for package, (x, y, z) in zip(self._packages, xyz.tolist()):
+            calibrated = copy.copy(package)
+            calibrated.x, calibrated.y, calibrated.z = x, y, z
+            for sink in self.sinks:
+                sink.on_acceleration(calibrated)
+        self._packages = []
+
+    def on_start(self, sequence: int, max_samples: int) -> None:
+        self._packages = []
+        for sink in self.sinks:
+            sink.on_start(sequence, max_samples)
+
+    def on_acceleration(self, package: RxAcceleration) -> None:
+        self._packages.append(package)
+        if len(self._packages) >= self.block_size:
+            self._flush()
+
+    def on_stop(self, sequence: int, num_samples_received: int) -> None:
+        self._flush()
+        for sink in self.sinks:
+            sink.on_stop(sequence, num_samples_received)
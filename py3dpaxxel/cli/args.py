@@ -10,6 +10,11 @@ def convert_xyz_pos_from_str(pos: str) -> Tuple[int, int, int]:
     return x, y, z
 
 
+def convert_xyz_float_from_str(values: str) -> Tuple[float, float, float]:
+    x, y, z = values.strip("\"").split(",")
+    return float(x), float(y), float(z)
+
+
 def assert_uint_0_100(f: str) -> int:
     value = int(f)
     assert 0 <= value <= 100, f"value out of range: 0 < {value} < 100"
@@ -42,3 +47,14 @@ def convert_axis_from_str(axis_names: Literal["x", "y", "z", "xy", "xz", "yz", "
     z: Union[Literal["x", "y", "z"], None] = "z" if "z" in axis_names else None
 
     return [i for i in [x, y, z] if i is not None]
+
+
+def convert_printer_from_str(spec: str) -> Tuple[str, int, str, Union[str, None]]:
+    """
+    :param spec: "address:port,device[,key]", i.e. "192.168.1.10:80,/dev/ttyACM0"
+    :return: OctoPrint address, port, controller serial device and API key (None if not given)
+    """
+    fields = spec.strip("\"").split(",")
+    assert len(fields) in (2, 3), f"printer specification \"{spec}\" shall be address:port,device[,key]"
+    address, port = fields[0].rsplit(":", 1) if ":" in fields[0] else (fields[0], "80")
+    return address, int(port), fields[1], fields[2] if len(fields) == 3 else None
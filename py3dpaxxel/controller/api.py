@@ -6,7 +6,10 @@ from typing import TextIO, Dict, List, Optional, Union
 
 from serial.tools.list_ports import comports
 
-from .constants import Range, Scale, OutputDataRate, FaultCode
+from .clock_estimator import ClockEstimator
+from .constants import Range, Scale, OutputDataRate, FaultCode, TransportHeaderId
+from .decoder_sink import DecoderSink
+from .raw_capture import RawCapture
 from .serial import CdcSerial
 from .transfer_types import (TxFrame, RxUnknownResponse, RxOutputDataRate,
                              RxScale, RxRange, RxSamplingStopped, RxSamplingFinished, RxSamplingAborted,
@@ -179,7 +182,10 @@ class Py3dpAxxel(CdcSerial):
     def decode(self, return_on_stop: bool = False,
                message_timeout_s: float = 10.0,
                out_file: Optional[TextIO] = None,
-               do_stop_flag: threading.Event = threading.Event()) -> None:
+               do_stop_flag: threading.Event = threading.Event(),
+               sinks: Optional[List[DecoderSink]] = None,
+               resilient: bool = False,
+               clock: Optional[ClockEstimator] = None) -> None:
         """
         Decodes incoming stream from controller.
 
@@ -207,13 +213,33 @@ class Py3dpAxxel(CdcSerial):
         :param message_timeout_s: how long to wait until next message, :class:`.ErrorReadTimeout` is thrown, set to 0.0 to disable
         :param out_file: where to save the decoded stream, set to None to disable
         :param do_stop_flag: aborts decoder loop if set
+        :param sinks: additional consumers of the decoded samples (i.e. live FFT), see :class:`.DecoderSink`
+        :param resilient: instead of raising on unknown header ids and sample counter mismatches, skips bytes until a
+            valid frame boundary is found again (see :meth:`.RawCapture.is_frame_boundary`) and continues with the next sample received.
+            The metadata line then contains `integrity` with lost samples, skipped bytes, gaps (first lost sample counter and count)
+            and whether the stream was truncated, i.e.
+            `'integrity': {'lost': '3', 'skipped_bytes': '31', 'gaps': [[1200, 3]], 'truncated': 'false'}`.
+            On timeout the metadata line received so far is written before :class:`.ErrorReadTimeout` is raised.
+        :param clock: estimates the actual sample rate from the reception times (see :class:`.ClockEstimator`), the metadata line then
+            contains `clock`, i.e. `'clock': {'rate_hz': '3201.923400', 'nominal_rate_hz': '3200.0', 'drift_ppm': '601.1', ...}`.
+            The metadata line is written once the stream stopped, after the controller uptime was sampled.
         :return: None
         """
+        sinks: List[DecoderSink] = [] if sinks is None else sinks
         stream_meta_data: Dict[str, Union[str, any]] = {}
         data: bytearray = bytearray()
         sequence: int = 0
         num_samples_requested = 0
         num_samples_received: int = 0
+        num_samples_lost: int = 0
+        num_bytes_skipped: int = 0
+        gaps: List[List[int]] = []
+        resync: bool = False
+        meta_pending: bool = False
+        bytes_received: int = 0
+        burst_end: int = 0
+        clock_sample: int = 0  # unlike num_samples_received not wrapped around, lost samples included
+        burst_s: float = 0.0
         start_time = Optional[float]
         elapsed_time = Optional[float]
         timestamp_last_message_seen: float = time.time()
@@ -222,12 +248,45 @@ class Py3dpAxxel(CdcSerial):
 
             if len(received_bytes) > 0:
                 timestamp_last_message_seen = time.time()
+                if clock is not None:
+                    bytes_received += len(received_bytes)
+                    if bytes_received > burst_end:
+                        # first byte of a new burst: the bytes pending arrived no later than it
+                        burst_s = time.monotonic()
+                        burst_end = bytes_received + self.bytes_pending()
             elif message_timeout_s != 0.0:
                 current_delay_s: float = time.time() - timestamp_last_message_seen
                 if current_delay_s > message_timeout_s:
+                    if resilient and out_file is not None and num_samples_requested > 0:
+                        stream_meta_data.update({"samples": {"requested": f"{num_samples_requested}", "received": f"{num_samples_received}"},
+                                                 "integrity": {"lost": f"{num_samples_lost}", "skipped_bytes": f"{num_bytes_skipped + len(data)}",
+                                                               "gaps": gaps, "truncated": "true"}})
+                        estimate = clock.estimate() if clock is not None else None
+                        if estimate is not None:
+                            stream_meta_data.update({"clock": estimate.to_meta()})
+                        out_file.write("# " + str(stream_meta_data).replace("'", '"') + "\n")
                     raise ErrorReadTimeout(message_timeout_s, current_delay_s)
 
             data.extend(received_bytes)
+            if resilient and len(data) >= 1:
+                header_id = data[0]
+                if (resync or 0 == RawCapture.FRAME_LENGTHS[header_id]
+                        or (TransportHeaderId.RX_ACCELERATION.value == header_id and len(data) >= 3
+                            and int.from_bytes(data[1:3], "little") != (num_samples_received + num_samples_lost) % 65536)):
+                    boundary = RawCapture.is_frame_boundary(data, 0)
+                    if boundary is None:
+                        continue
+                    if not boundary:
+                        if not resync:
+                            logging.warning(f"rx: lost sync after {num_samples_received} samples, skipping bytes")
+                        resync = True
+                        num_bytes_skipped += 1
+                        del data[0]
+                        continue
+                    if resync:
+                        logging.warning(f"rx: sync regained, {num_bytes_skipped} bytes skipped so far")
+                    resync = False
+
             if len(data) >= 1:
                 package = RxFrameFromHeaderId(data).unpack()
                 if package is not None:
@@ -260,8 +319,16 @@ class Py3dpAxxel(CdcSerial):
                         logging.info(f"rx: {package}")
                         out_file.write("seq sample x y z\n") if out_file is not None else logging.info("#seq #sample x[mg] y[mg] z[mg]")
                         num_samples_received = 0
+                        num_samples_lost = 0
+                        num_bytes_skipped = 0
+                        gaps = []
+                        clock_sample = 0
+                        if clock is not None:
+                            clock.clear_arrivals()
                         start_time = time.time()
                         num_samples_requested = package.maxSamples
+                        for sink in sinks:
+                            sink.on_start(sequence, num_samples_requested)
 
                     if isinstance(package, RxFirmwareVersion):
                         stream_meta_data.update({"firmware": {"version": package.version.string}})
@@ -280,11 +347,24 @@ class Py3dpAxxel(CdcSerial):
 
                     if isinstance(package, RxAcceleration):
                         acceleration = f"{sequence:02} {package}"
-                        assert num_samples_received == package.index, f"sequence error: expected={num_samples_received} vs current={package.index}"
+                        expected_index = (num_samples_received + num_samples_lost) % 65536
+                        if resilient and expected_index != package.index:
+                            lost = (package.index - expected_index) % 65536
+                            logging.warning(f"rx: {lost} samples lost after sample {num_samples_received}")
+                            gaps.append([expected_index, lost])
+                            num_samples_lost += lost
+                            clock_sample += lost
+                            expected_index = package.index
+                        assert expected_index == package.index, f"sequence error: expected={expected_index} vs current={package.index}"
+                        if clock is not None:
+                            clock.add_arrival(clock_sample, burst_s)
+                        clock_sample += 1
                         num_samples_received += 1
                         if num_samples_received > 65535:
                             num_samples_received = 0
                         out_file.write(acceleration + "\n") if out_file is not None else logging.info(f"rx: {acceleration}")
+                        for sink in sinks:
+                            sink.on_acceleration(package)
 
                     if isinstance(package, RxDeviceSetup):
                         stream_meta_data.update({"sensor": eval(re.search(RxDeviceSetup.REPR_FILTER_REGEX, str(package)).group(1))})
@@ -292,6 +372,25 @@ class Py3dpAxxel(CdcSerial):
                             "requested": f"{num_samples_requested}",
                             "received": f"{num_samples_received}",
                         }})
+                        if resilient:
+                            stream_meta_data.update({"integrity": {"lost": f"{num_samples_lost}", "skipped_bytes": f"{num_bytes_skipped}",
+                                                                   "gaps": gaps, "truncated": "false"}})
+                        if clock is None:
+                            out_file.write("# " + str(stream_meta_data).replace("'", '"') + "\n") if out_file is not None else logging.info("rx: Device Setup: " + str(stream_meta_data))
+                        else:
+                            # the uptime may be requested only after the stream stopped
+                            meta_pending = True
+
+                    if isinstance(package, RxSamplingStopped) and meta_pending:
+                        meta_pending = False
+                        try:
+                            clock.sample_uptime(self)
+                        except Exception as e:
+                            logging.warning(f"clock: failed to sample the uptime: {e}")
+                        estimate = clock.estimate()
+                        if estimate is not None:
+                            stream_meta_data.update({"clock": estimate.to_meta()})
+                            logging.info(f"clock: sample rate {estimate.rate_hz:.3f}Hz ({estimate.drift_ppm:+.1f}ppm)")
                         out_file.write("# " + str(stream_meta_data).replace("'", '"') + "\n") if out_file is not None else logging.info("rx: Device Setup: " + str(stream_meta_data))
 
                     if isinstance(package, (RxSamplingStopped, RxSamplingFinished, RxSamplingAborted)):
@@ -304,9 +403,60 @@ class Py3dpAxxel(CdcSerial):
                         logging.info(f"sequence {sequence:02}: processed {num_samples_received} samples in {elapsed_time:.6f} s "
                                      f"({(num_samples_received / elapsed_time):.1f} samples/s; "
                                      f"{((num_samples_received * RxAcceleration.LEN * 8) / elapsed_time):.1f} baud)")
+                        for sink in sinks:
+                            sink.on_stop(sequence, num_samples_received)
                         sequence += 1
 
                         if return_on_stop or out_file is not None:
                             return
 
         logging.warning(f"decoder stops ahead of time after {num_samples_received} samples because stop flag was set")
+
+    def capture(self, out_capture: RawCapture,
+                return_on_stop: bool = True,
+                message_timeout_s: float = 10.0,
+                do_stop_flag: threading.Event = threading.Event(),
+                read_chunk_bytes: int = 4096) -> None:
+        """
+        Captures the incoming stream without decoding: received bytes are stored as read (see :class:`.RawCapture`).
+
+        Compared to :meth:`decode` only frame boundaries are tracked (to detect the end of stream),
+        samples are neither unpacked nor formatted, nor checked for errors reported by the controller.
+        Decode the capture offline with :class:`py3dpaxxel.controller.raw_decoder.RawCaptureDecoder`.
+
+        :param out_capture: where to store the received bytes
+        :param return_on_stop: whether to return when the first :class:`.RxSamplingStopped` package was seen or not
+        :param message_timeout_s: how long to wait until next message, :class:`.ErrorReadTimeout` is thrown, set to 0.0 to disable
+        :param do_stop_flag: aborts capture loop if set
+        :param read_chunk_bytes: maximum bytes per read
+        :return: None
+        """
+        pending: bytearray = bytearray()
+        streams: int = 0
+        timestamp_last_message_seen: float = time.time()
+        while not do_stop_flag.is_set():
+            received_bytes: bytes = self.read_available(read_chunk_bytes, 0.1)
+
+            if len(received_bytes) > 0:
+                timestamp_last_message_seen = time.time()
+                out_capture.write(received_bytes)
+            elif message_timeout_s != 0.0:
+                current_delay_s: float = time.time() - timestamp_last_message_seen
+                if current_delay_s > message_timeout_s:
+                    raise ErrorReadTimeout(message_timeout_s, current_delay_s)
+
+            pending.extend(received_bytes)
+            pos, stopped, unknown_header_id = RawCapture.scan_frames(pending, 0)
+            while stopped:
+                streams += 1
+                logging.info(f"rx: stream {streams} stopped: captured {out_capture.bytes_captured} bytes")
+                if return_on_stop:
+                    return
+                pos, stopped, unknown_header_id = RawCapture.scan_frames(pending, pos)
+            if unknown_header_id is not None:
+                e = ErrorUnknownResponse(unknown_header_id)
+                logging.fatal(f"rx: {str(e)}")
+                raise e
+            del pending[:pos]
+
+        logging.warning(f"capture stops ahead of time after {out_capture.bytes_captured} bytes because stop flag was set")
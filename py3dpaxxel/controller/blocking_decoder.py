@@ -2,10 +2,14 @@ import logging
 import threading
 import time
 from collections.abc import Callable
-from typing import TextIO, Optional
+from typing import IO, Optional, List
 
 from .api import (Py3dpAxxel)
+from .clock_estimator import ClockEstimator
 from .constants import OutputDataRate, OutputDataRateDelay
+from .decoder_sink import DecoderSink
+from .device_session import DeviceSession
+from .raw_capture import RawCapture
 
 
 class BlockingDecoder(Callable[[], None]):
@@ -30,7 +34,12 @@ class BlockingDecoder(Callable[[], None]):
                  sensor_output_data_rate: OutputDataRate,
                  out_filename: Optional[str],
                  do_dry_run: bool = False,
-                 do_abort_flag: threading.Event = threading.Event()) -> None:
+                 do_abort_flag: threading.Event = threading.Event(),
+                 decoder_sinks: Optional[List[DecoderSink]] = None,
+                 device_session: Optional[DeviceSession] = None,
+                 raw_capture: bool = False,
+                 resilient: bool = False,
+                 estimate_clock: bool = False) -> None:
         """
         Acquires required resources for later interaction with controller.
 
@@ -41,23 +50,39 @@ class BlockingDecoder(Callable[[], None]):
         :param out_filename: decoded stream output file, leave None for not storage
         :param do_dry_run: if true, will not invoke controller neither write output file but timing will as without dry-run
         :param do_abort_flag: flag to externally shortcut the decoding loop
+        :param decoder_sinks: additional consumers of decoded samples, see :class:`.DecoderSink`
+        :param device_session: reuses the connection of the session (kept open after decoding) instead of opening the device
+        :param raw_capture: stores the received bytes to the output file without decoding (see :class:`.RawCapture`),
+            decoder sinks are not supported
+        :param resilient: tolerates corrupted bytes and lost samples instead of raising, see :meth:`.Py3dpAxxel.decode`
+        :param estimate_clock: estimates the actual sample rate (see :class:`.ClockEstimator`), the controller uptime is sampled
+            before sampling starts and after the stream stopped (raw capture: before only, stored in the capture's header)
         """
         self.timelapse_s: float = timelapse_s
         self.record_timeout_s: float = record_timeout_s
         self.do_dry_run = do_dry_run
         self.dev: Optional[Py3dpAxxel] = None
         self.do_abort_flag: threading.Event = do_abort_flag
+        self.decoder_sinks: Optional[List[DecoderSink]] = decoder_sinks
+        self.device_session: Optional[DeviceSession] = device_session
+        self.raw_capture: Optional[RawCapture] = None
+        self.resilient: bool = resilient
+        self.clock: Optional[ClockEstimator] = None
 
         if not self.do_dry_run:
-            self.file: Optional[TextIO] = None
+            self.file: Optional[IO] = None
             if out_filename is not None:
-                self.file = open(out_filename, "w")
+                self.file = open(out_filename, "wb" if raw_capture else "w")
 
-            self.dev: Py3dpAxxel = Py3dpAxxel(controller_serial)
-            self.dev.open()
-            if sensor_output_data_rate is not None:
-                self.dev.set_output_data_rate(sensor_output_data_rate)
-            odr = self.dev.get_output_data_rate()
+            if self.device_session is not None:
+                self.dev: Py3dpAxxel = self.device_session.acquire(sensor_output_data_rate)
+                odr = self.device_session.output_data_rate
+            else:
+                self.dev: Py3dpAxxel = Py3dpAxxel(controller_serial)
+                self.dev.open()
+                if sensor_output_data_rate is not None:
+                    self.dev.set_output_data_rate(sensor_output_data_rate)
+                odr = self.dev.get_output_data_rate()
         else:
             odr = OutputDataRate.ODR3200
 
@@ -65,12 +90,31 @@ class BlockingDecoder(Callable[[], None]):
         samples_per_second = 1.0 / sample_delay_s
         samples_total = int(samples_per_second * self.timelapse_s)
 
+        if estimate_clock and not self.do_dry_run:
+            self.clock = ClockEstimator(samples_per_second)
+            self.clock.sample_uptime(self.dev)
+
         # snap to even number of samples for FFT
         self.max_samples: int = int(samples_total + (1 if 1 == samples_total % 2 else 0))
 
+        if raw_capture and not self.do_dry_run and self.file is not None:
+            if self.decoder_sinks:
+                logging.warning("raw capture: decoder sinks are ignored")
+            meta = {"device": controller_serial, "output_data_rate": odr.name, "samples_requested": self.max_samples}
+            if self.clock is not None:
+                meta.update({"uptime": self.clock.uptimes})
+            self.raw_capture = RawCapture(self.file, meta)
+
         logging.info(f"device {controller_serial} opened with requested_odr={sensor_output_data_rate} "
                      f"(effective_odr={odr}) time_lapse_s={timelapse_s} and num_samples={samples_total}")
 
+    def _release_device(self, failed: bool) -> None:
+        if self.device_session is not None:
+            if failed:
+                self.device_session.invalidate()
+        elif self.dev is not None:
+            self.dev.close()
+
     def start_sampling(self) -> None:
         """
         Tells the controller to start sampling, hence sent data stream to the host.
@@ -83,12 +127,21 @@ class BlockingDecoder(Callable[[], None]):
                 self.dev.start_sampling(self.max_samples)
             except Exception as e:
                 logging.warning("start sampling: release resources")
-                if self.dev is not None:
-                    self.dev.close()
+                self._release_device(failed=True)
                 if self.file is not None:
                     self.file.close()
                 raise e
 
+    def stop_sampling(self) -> None:
+        """
+        Tells the controller to stop sampling ahead of the time lapse, the decoding returns once the controller confirmed.
+
+        :return: None
+        """
+        logging.info("send command: stop sampling")
+        if not self.do_dry_run:
+            self.dev.stop_sampling()
+
     def __call__(self) -> None:
         """
         Starts decoding and waits until stream end is detected (success) or timeout occurred (error).
@@ -101,12 +154,23 @@ class BlockingDecoder(Callable[[], None]):
         logging.debug("decoding ...")
 
         try:
-            if not self.do_dry_run:
+            if not self.do_dry_run and self.raw_capture is not None:
+                self.dev.capture(self.raw_capture,
+                                 return_on_stop=True,
+                                 message_timeout_s=self.record_timeout_s,
+                                 do_stop_flag=self.do_abort_flag)
+                self._release_device(failed=False)
+                self.file.close()
+                logging.info(f"raw capture saved to {self.file.name}")
+            elif not self.do_dry_run:
                 self.dev.decode(return_on_stop=True,
                                 message_timeout_s=self.record_timeout_s,
                                 out_file=self.file,
-                                do_stop_flag=self.do_abort_flag)
-                self.dev.close()
+                                do_stop_flag=self.do_abort_flag,
+                                sinks=self.decoder_sinks,
+                                resilient=self.resilient,
+                                clock=self.clock)
+                self._release_device(failed=False)
                 if self.file is not None:
                     self.file.close()
                     logging.info(f"data saved to {self.file.name}")
@@ -115,8 +179,7 @@ class BlockingDecoder(Callable[[], None]):
 
         except Exception as e:
             logging.warning("decoding: release resources")
-            if self.dev is not None:
-                self.dev.close()
+            self._release_device(failed=True)
             if self.file is not None:
                 self.file.close()
             raise e
@@ -0,0 +1,187 @@
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class ClockEstimate:
+    """
+    Sample clock of a stream estimated by :class:`ClockEstimator`, host clock (monotonic) as reference.
+    """
+
+    def __init__(self,
+                 rate_hz: float,
+                 nominal_rate_hz: float,
+                 start_host_s: float,
+                 residual_ms: float,
+                 start_uptime_ms: Optional[float] = None,
+                 controller_clock_ppm: Optional[float] = None) -> None:
+        self.rate_hz: float = rate_hz
+        "estimated sample rate"
+        self.nominal_rate_hz: float = nominal_rate_hz
+        "sample rate as configured (output data rate)"
+        self.start_host_s: float = start_host_s
+        "monotonic host time of the first sample (earliest reception, includes the minimal transfer latency)"
+        self.residual_ms: float = residual_ms
+        "largest deviation of the earliest receptions from the fitted clock"
+        self.start_uptime_ms: Optional[float] = start_uptime_ms
+        "controller uptime of the first sample, None without uptime samples"
+        self.controller_clock_ppm: Optional[float] = controller_clock_ppm
+        "deviation of the controller clock from the host clock, None without uptime samples before and after the stream"
+
+    @property
+    def separation_s(self) -> float:
+        """
+        :return: time in-between samples (`1/rate_hz`)
+        """
+        return 1.0 / self.rate_hz
+
+    @property
+    def drift_ppm(self) -> float:
+        """
+        :return: deviation of the sample rate from the nominal rate
+        """
+        return (self.rate_hz / self.nominal_rate_hz - 1.0) * 1e6
+
+    def to_meta(self) -> Dict[str, str]:
+        """
+        :return: stream metadata entry `clock`, i.e. `{'rate_hz': '3201.923400', 'nominal_rate_hz': '3200.0', 'drift_ppm': '601.1', ...}`
+        """
+        meta = {
+            "rate_hz": f"{self.rate_hz:.6f}",
+            "nominal_rate_hz": f"{self.nominal_rate_hz:.1f}",
+            "drift_ppm": f"{self.drift_ppm:.1f}",
+            "start_host_s": f"{self.start_host_s:.6f}",
+            "residual_ms": f"{self.residual_ms:.3f}",
+        }
+        if self.start_uptime_ms is not None:
+            meta.update({"start_uptime_ms": f"{self.start_uptime_ms:.3f}"})
+        if self.controller_clock_ppm is not None:
+            meta.update({"controller_clock_ppm": f"{self.controller_clock_ppm:.1f}"})
+        return meta
+
+
+class ClockEstimator:
+    """
+    Estimates the actual sample rate of a stream from the host time the samples are received at.
+
+    The sensor samples by its own oscillator, so the actual output data rate deviates from the nominal one.
+    The samples reach the host with a varying latency (controller buffer, USB polling, host scheduling) but never ahead of time:
+    the earliest reception within a window of samples is closest to the time of sampling.
+    A line fitted through the earliest receptions of :attr:`WINDOWS` windows yields the sample rate and the start of the stream in host time.
+
+    Controller uptimes (see :meth:`.Py3dpAxxel.get_uptime`) sampled before and after the stream relate the host clock to the
+    controller clock, hence the start of the stream is given in controller uptime too.
+
+    Example:
+
+    .. code-block::
+
+        clock = ClockEstimator(3200.0)
+        clock.sample_uptime(device)
+        device.start_sampling(6400)
+        device.decode(return_on_stop=True, out_file=f, clock=clock)  # adds `clock` to the metadata line
+    """
+
+    WINDOWS = 16
+    "number of windows the earliest reception is searched in"
+    MIN_WINDOWS = 8
+    "minimum number of windows with receptions"
+    MIN_DURATION_S = 1.0
+    "shorter streams are not estimated, the latency jitter would dominate"
+    MAX_DEVIATION = 0.05
+    "estimates deviating more from the nominal rate are discarded (i.e. the decoder fell behind the stream)"
+    UPTIME_WRAP_MS = 1 << 24
+    "the controller uptime wraps around (24 bit milliseconds)"
+
+    def __init__(self, nominal_rate_hz: float) -> None:
+        """
+
+        :param nominal_rate_hz: configured sample rate (`1/OutputDataRateDelay`)
+        """
+        self.nominal_rate_hz: float = nominal_rate_hz
+        self.arrivals: List[Tuple[int, float]] = []
+        "sample counter (not wrapped around, lost samples included) and monotonic host time of reception"
+        self.uptimes: List[Tuple[int, float]] = []
+        "controller uptime in ms and monotonic host time it was sampled at"
+
+    def clear_arrivals(self) -> None:
+        """
+        Drops the receptions of a previous stream, the uptime samples are kept.
+        """
+        self.arrivals = []
+
+    def add_arrival(self, sample: int, host_s: float) -> None:
+        """
+        Samples received at the same time are merged, the last of them is kept (closest to the time of reception).
+
+        :param sample: sample counter, not wrapped around
+        :param host_s: monotonic host time the sample was received at (or later)
+        """
+        if self.arrivals and self.arrivals[-1][1] == host_s:
+            self.arrivals[-1] = (sample, host_s)
+        else:
+            self.arrivals.append((sample, host_s))
+
+    def add_uptime(self, uptime_ms: int, host_s: float) -> None:
+        """
+        :param uptime_ms: controller uptime
+        :param host_s: monotonic host time the uptime was sampled at
+        """
+        self.uptimes.append((uptime_ms, host_s))
+
+    def sample_uptime(self, device) -> None:
+        """
+        Requests the controller uptime, the host time is taken halfway the round trip.
+        Must not be called while the controller streams.
+
+        :param device: opened :class:`.Py3dpAxxel`
+        """
+        before_s = time.monotonic()
+        uptime_ms = device.get_uptime()
+        self.add_uptime(uptime_ms, (before_s + time.monotonic()) / 2.0)
+
+    def estimate(self) -> Optional[ClockEstimate]:
+        """
+        :return: estimated clock of the stream, None if the stream is too short or the receptions are implausible
+        """
+        if len(self.arrivals) < ClockEstimator.MIN_WINDOWS:
+            return None
+        first = self.arrivals[0][0]
+        width = (self.arrivals[-1][0] - first) / ClockEstimator.WINDOWS
+        if width * ClockEstimator.WINDOWS / self.nominal_rate_hz < ClockEstimator.MIN_DURATION_S:
+            return None
+
+        # earliest reception per window, relative to the nominal clock
+        nominal_s = 1.0 / self.nominal_rate_hz
+        earliest: Dict[int, Tuple[float, int, float]] = {}
+        for sample, host_s in self.arrivals:
+            window = min(int((sample - first) / width), ClockEstimator.WINDOWS - 1)
+            latency = host_s - sample * nominal_s
+            if window not in earliest or latency < earliest[window][0]:
+                earliest[window] = (latency, sample, host_s)
+        if len(earliest) < ClockEstimator.MIN_WINDOWS:
+            return None
+        points = [(sample, host_s) for _latency, sample, host_s in earliest.values()]
+
+        # least squares: host_s = start_s + sample * separation_s
+        mean_sample = sum([sample for sample, _host_s in points]) / len(points)
+        mean_host_s = sum([host_s for _sample, host_s in points]) / len(points)
+        separation_s = (sum([(sample - mean_sample) * (host_s - mean_host_s) for sample, host_s in points])
+                        / sum([(sample - mean_sample) ** 2 for sample, _host_s in points]))
+        start_s = mean_host_s - mean_sample * separation_s
+        if separation_s <= 0.0 or abs(nominal_s / separation_s - 1.0) > ClockEstimator.MAX_DEVIATION:
+            logging.warning(f"clock: implausible sample rate {1.0 / separation_s if separation_s > 0.0 else 0.0:.3f}Hz, keeping the nominal rate")
+            return None
+        residual_ms = max([abs(host_s - start_s - sample * separation_s) for sample, host_s in points]) * 1000.0
+
+        start_uptime_ms: Optional[float] = None
+        controller_clock_ppm: Optional[float] = None
+        if len(self.uptimes) > 0:
+            ratio = 1.0
+            (first_ms, first_s), (last_ms, last_s) = self.uptimes[0], self.uptimes[-1]
+            if last_s > first_s:
+                ratio = ((last_ms - first_ms) % ClockEstimator.UPTIME_WRAP_MS) / ((last_s - first_s) * 1000.0)
+                controller_clock_ppm = (ratio - 1.0) * 1e6
+            start_uptime_ms = first_ms + (start_s - first_s) * 1000.0 * ratio
+
+        return ClockEstimate(1.0 / separation_s, self.nominal_rate_hz, start_s, residual_ms, start_uptime_ms, controller_clock_ppm)
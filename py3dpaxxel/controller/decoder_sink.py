@@ -0,0 +1,42 @@
+from abc import ABCMeta, abstractmethod
+
+from .transfer_types import RxAcceleration
+
+
+class DecoderSink:
+    """
+    Consumer of decoded samples that is attached to :meth:`py3dpaxxel.controller.api.Py3dpAxxel.decode`.
+
+    Sinks are invoked from within the decoder loop, thus implementations shall return quickly.
+    """
+    __metaclass__ = metaclass = ABCMeta
+
+    def on_start(self, sequence: int, max_samples: int) -> None:
+        """
+        Invoked when the controller reports sampling started.
+
+        :param sequence: stream sequence number
+        :param max_samples: requested number of samples (0 for endless stream)
+        :return: None
+        """
+        pass
+
+    @abstractmethod
+    def on_acceleration(self, package: RxAcceleration) -> None:
+        """
+        Invoked for each decoded sample.
+
+        :param package: decoded sample
+        :return: None
+        """
+        pass
+
+    def on_stop(self, sequence: int, num_samples_received: int) -> None:
+        """
+        Invoked when the controller reports sampling stopped.
+
+        :param sequence: stream sequence number
+        :param num_samples_received: number of decoded samples of this stream
+        :return: None
+        """
+        pass
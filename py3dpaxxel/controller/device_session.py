@@ -0,0 +1,118 @@
+import logging
+import time
+from typing import Optional
+
+from .api import Py3dpAxxel
+from .constants import OutputDataRate
+
+
+class DeviceSession:
+    """
+    Keeps one controller connection open across many streams (i.e. a whole series).
+
+    - the serial port is opened once and reused by each :class:`py3dpaxxel.controller.blocking_decoder.BlockingDecoder`
+    - the output data rate is sent only if it differs from the last known setting
+    - after a failure the session is invalidated and re-opened on next use; if the device re-enumerates
+      under a different node it is found again by its serial number
+
+    Example:
+
+    .. code-block::
+
+        with DeviceSession("/dev/ttyACM0") as session:
+            for run in runs:
+                BlockingDecoder(..., device_session=session)
+    """
+
+    def __init__(self, ser_dev_name: str, reconnect_attempts: int = 5, reconnect_delay_s: float = 1.0) -> None:
+        """
+
+        :param ser_dev_name: i.e. "/dev/ttyACM0"
+        :param reconnect_attempts: how often to try opening the device before giving up (at least once)
+        :param reconnect_delay_s: delay in-between attempts (i.e. to let the device re-enumerate)
+        """
+        assert reconnect_attempts >= 1, f"reconnect attempts out of bounds: {reconnect_attempts} < 1"
+        self.ser_dev_name: str = ser_dev_name
+        self.reconnect_attempts: int = reconnect_attempts
+        self.reconnect_delay_s: float = reconnect_delay_s
+        self.device: Optional[Py3dpAxxel] = None
+        self.serial_number: Optional[str] = None
+        "serial number of the device, used to find it again after re-enumeration"
+        self.output_data_rate: Optional[OutputDataRate] = None
+        "last known output data rate, None if unknown"
+        self.open_count: int = 0
+        "number of times the serial port was opened"
+
+    def _find_device_node(self) -> str:
+        devices = Py3dpAxxel.get_devices_dict()
+        if self.serial_number is not None and self.ser_dev_name not in devices:
+            for node, info in devices.items():
+                if info["serial"] == self.serial_number:
+                    logging.info(f"device {self.serial_number} re-enumerated as {node} (was {self.ser_dev_name})")
+                    self.ser_dev_name = node
+                    break
+        elif self.serial_number is None and self.ser_dev_name in devices:
+            self.serial_number = devices[self.ser_dev_name]["serial"]
+        return self.ser_dev_name
+
+    def _open(self) -> Py3dpAxxel:
+        last_error: Optional[Exception] = None
+        for attempt in range(1, self.reconnect_attempts + 1):
+            try:
+                device = Py3dpAxxel(self._find_device_node())
+                device.open()
+                self.open_count += 1
+                if attempt > 1:
+                    logging.info(f"device {self.ser_dev_name} reconnected after {attempt} attempts")
+                return device
+            except (IOError, OSError) as e:
+                last_error = e
+                logging.warning(f"device {self.ser_dev_name}: open attempt {attempt}/{self.reconnect_attempts} failed: {e}")
+                if attempt < self.reconnect_attempts:
+                    time.sleep(self.reconnect_delay_s)
+        raise last_error
+
+    def acquire(self, output_data_rate: Optional[OutputDataRate] = None) -> Py3dpAxxel:
+        """
+        Opens the device (if not already open) and applies the output data rate (if changed).
+
+        :param output_data_rate: requested output data rate, None keeps the current one
+        :return: the opened device
+        """
+        for attempt in range(2):
+            try:
+                if self.device is None:
+                    self.device = self._open()
+                    self.output_data_rate = None
+                if output_data_rate is not None and output_data_rate != self.output_data_rate:
+                    self.device.set_output_data_rate(output_data_rate)
+                    self.output_data_rate = None
+                if self.output_data_rate is None:
+                    self.output_data_rate = self.device.get_output_data_rate()
+                return self.device
+            except (IOError, OSError) as e:
+                if attempt > 0:
+                    raise e
+                logging.warning(f"device {self.ser_dev_name}: {e}: reconnecting")
+                self.invalidate()
+
+    def invalidate(self) -> None:
+        """
+        Closes the connection after an error, the next :meth:`acquire` re-opens and re-configures the device.
+        """
+        self.close()
+
+    def close(self) -> None:
+        if self.device is not None:
+            try:
+                self.device.close()
+            except (IOError, OSError) as e:
+                logging.warning(f"device {self.ser_dev_name}: close failed: {e}")
+            self.device = None
+        self.output_data_rate = None
+
+    def __enter__(self) -> "DeviceSession":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
@@ -0,0 +1,242 @@
+#!/bin/env python3
+
+import argparse
+import logging
+import math
+import os
+import select
+import sys
+import termios
+import threading
+import time
+import tty
+from typing import Optional, Tuple
+
+from .constants import OutputDataRate, OutputDataRateDelay, Range, Scale, TransportHeaderId
+from .transfer_types import RxAcceleration
+
+
+class ControllerEmulator:
+    """
+    Emulates the controller firmware on a pseudo terminal (POSIX only) for tests and dry runs without hardware.
+
+    The host opens :attr:`device` (i.e. "/dev/pts/3") like the controller's CDC device node, i.e. with :class:`.Py3dpAxxel`
+    or :class:`.DeviceSession`.
+    The emulator answers configuration requests and streams synthetic samples at the configured output data rate:
+
+    - x: sine of `signal_hz` with `amplitude_mg`
+    - y: 0
+    - z: gravity
+
+    Streams end like the firmware's: finished (or aborted upon stop request), firmware version, buffer status, device setup and stopped.
+
+    Note: opening the port suspends the pty output (pyserial turns the flow control off by sending STOP and TCOOFF),
+    the emulator resumes it continuously and ignores STOP requests while not sampling.
+
+    Example:
+
+    .. code-block::
+
+        with ControllerEmulator(signal_hz=40.0) as emulator:
+            with Py3dpAxxel(emulator.device) as device:
+                device.start_sampling(100)
+                device.decode(return_on_stop=True)
+    """
+
+    FIRMWARE_VERSION: Tuple[int, int, int] = (0, 1, 9)
+    "version reported by the emulated firmware"
+
+    TX_PAYLOAD_LEN = {
+        TransportHeaderId.TX_SET_OUTPUT_DATA_RATE: 1,
+        TransportHeaderId.TX_SET_RANGE: 1,
+        TransportHeaderId.TX_SET_SCALE: 1,
+        TransportHeaderId.TX_SAMPLING_START: 2,
+    }
+    "payload length of requests with payload, all others have header only"
+
+    TICK_S = 0.005
+    "streaming granularity: samples due are sent in chunks of this period"
+
+    def __init__(self,
+                 output_data_rate: OutputDataRate = OutputDataRate.ODR3200,
+                 signal_hz: float = 40.0,
+                 amplitude_mg: float = 200.0,
+                 gravity_mg: float = 1000.0,
+                 clock_error_ppm: float = 0.0) -> None:
+        """
+
+        :param output_data_rate: initial output data rate (the host may change it)
+        :param signal_hz: frequency of the synthetic vibration on x
+        :param amplitude_mg: amplitude of the synthetic vibration on x
+        :param gravity_mg: static acceleration on z
+        :param clock_error_ppm: deviation of the emulated sensor oscillator, the actual output data rate is off by this
+        """
+        self.output_data_rate: OutputDataRate = output_data_rate
+        self.range: Range = Range.G4
+        self.scale: Scale = Scale.FULL_RES_4MG_LSB
+        self.signal_hz: float = signal_hz
+        self.amplitude_mg: float = amplitude_mg
+        self.gravity_mg: float = gravity_mg
+        self.clock_error_ppm: float = clock_error_ppm
+        self.streams_count: int = 0
+        "number of started streams"
+
+        self._master_fd, self._slave_fd = os.openpty()
+        tty.setraw(self._slave_fd)
+        self.device: str = os.ttyname(self._slave_fd)
+        "device node to be opened by the host"
+
+        self._boot_time: float = time.time()
+        self._rx: bytearray = bytearray()
+        self._stop: threading.Event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._sampling_start: Optional[float] = None
+        self._samples_requested: int = 0
+        self._samples_sent: int = 0
+
+    def _write(self, data: bytes) -> None:
+        while data and not self._stop.is_set():
+            _r, w, _x = select.select([], [self._master_fd], [], 0.1)
+            if w:
+                data = data[os.write(self._master_fd, data):]
+
+    def _separation_s(self) -> float:
+        return OutputDataRateDelay[self.output_data_rate] / (1.0 + self.clock_error_ppm * 1e-6)
+
+    def _sample(self, index: int) -> bytes:
+        t = index * self._separation_s()
+        lsb = [round(mg / RxAcceleration.FULL_RESOLUTION_LSB_SCALE) for mg in
+               (self.amplitude_mg * math.sin(2.0 * math.pi * self.signal_hz * t), 0.0, self.gravity_mg)]
+        frame = bytes([TransportHeaderId.RX_ACCELERATION.value]) + (index & 0xffff).to_bytes(2, "little")
+        return frame + b"".join([max(-32768, min(32767, v)).to_bytes(2, "little", signed=True) for v in lsb])
+
+    def _stream_trailer(self, finished: bool) -> bytes:
+        data = bytes([(TransportHeaderId.RX_SAMPLING_FINISHED if finished else TransportHeaderId.RX_SAMPLING_ABORTED).value])
+        data += bytes([TransportHeaderId.RX_FIRMWARE_VERSION.value, *ControllerEmulator.FIRMWARE_VERSION])
+        taken = min(self._samples_sent, 0xffff).to_bytes(2, "little")
+        data += bytes([TransportHeaderId.RX_BUFFER_STATUS.value]) + b"".join(
+            [(57600).to_bytes(2, "little"), (6400).to_bytes(2, "little"), (1).to_bytes(2, "little"), taken, taken, (RxAcceleration.LEN * 16).to_bytes(2, "little")])
+        data += bytes([TransportHeaderId.RX_DEVICE_SETUP.value, self.output_data_rate.value | (self.range.value << 4) | (self.scale.value << 5)])
+        data += bytes([TransportHeaderId.RX_SAMPLING_STOPPED.value])
+        return data
+
+    def _stop_stream(self, finished: bool) -> None:
+        self._sampling_start = None
+        self._write(self._stream_trailer(finished))
+
+    def _handle(self, header_id: TransportHeaderId, payload: bytearray) -> None:
+        if header_id == TransportHeaderId.TX_GET_FIRMWARE_VERSION:
+            self._write(bytes([TransportHeaderId.RX_FIRMWARE_VERSION.value, *ControllerEmulator.FIRMWARE_VERSION]))
+        elif header_id == TransportHeaderId.TX_GET_OUTPUT_DATA_RATE:
+            self._write(bytes([TransportHeaderId.RX_OUTPUT_DATA_RATE.value, self.output_data_rate.value]))
+        elif header_id == TransportHeaderId.TX_SET_OUTPUT_DATA_RATE:
+            self.output_data_rate = OutputDataRate(payload[0])
+        elif header_id == TransportHeaderId.TX_GET_RANGE:
+            self._write(bytes([TransportHeaderId.RX_RANGE.value, self.range.value]))
+        elif header_id == TransportHeaderId.TX_SET_RANGE:
+            self.range = Range(payload[0])
+        elif header_id == TransportHeaderId.TX_GET_SCALE:
+            self._write(bytes([TransportHeaderId.RX_SCALE.value, self.scale.value]))
+        elif header_id == TransportHeaderId.TX_SET_SCALE:
+            self.scale = Scale(payload[0])
+        elif header_id == TransportHeaderId.TX_GET_UPTIME:
+            elapsed_ms = int((time.time() - self._boot_time) * 1000) & 0xffffff
+            self._write(bytes([TransportHeaderId.RX_UPTIME.value]) + elapsed_ms.to_bytes(4, "little"))
+        elif header_id == TransportHeaderId.TX_GET_BUFFER_STATUS:
+            taken = min(self._samples_sent, 0xffff).to_bytes(2, "little")
+            self._write(bytes([TransportHeaderId.RX_BUFFER_STATUS.value]) + b"".join(
+                [(57600).to_bytes(2, "little"), (6400).to_bytes(2, "little"), (1).to_bytes(2, "little"), taken, taken, (0).to_bytes(2, "little")]))
+        elif header_id == TransportHeaderId.TX_DEVICE_REBOOT:
+            self._sampling_start = None
+            self._boot_time = time.time()
+        elif header_id == TransportHeaderId.TX_SAMPLING_START:
+            self._samples_requested = int.from_bytes(payload[0:2], "little")
+            self._samples_sent = 0
+            self._sampling_start = time.time()
+            self.streams_count += 1
+            self._write(bytes([TransportHeaderId.RX_SAMPLING_STARTED.value]) + payload[0:2])
+        elif header_id == TransportHeaderId.TX_SAMPLING_STOP:
+            # the host sends STOP (0x13) when opening the port: only meaningful while sampling
+            if self._sampling_start is not None:
+                self._stop_stream(finished=False)
+
+    def _consume(self) -> None:
+        while len(self._rx) > 0:
+            try:
+                header_id = TransportHeaderId(self._rx[0])
+            except ValueError:
+                logging.warning(f"emulator: unknown request header_id={self._rx[0]}")
+                self._rx.pop(0)
+                continue
+            length = 1 + ControllerEmulator.TX_PAYLOAD_LEN.get(header_id, 0)
+            if len(self._rx) < length:
+                return
+            payload = self._rx[1:length]
+            del self._rx[:length]
+            self._handle(header_id, payload)
+
+    def _stream(self) -> None:
+        due = int((time.time() - self._sampling_start) / self._separation_s())
+        if 0 < self._samples_requested:
+            due = min(due, self._samples_requested)
+        if due > self._samples_sent:
+            self._write(b"".join([self._sample(i) for i in range(self._samples_sent, due)]))
+            self._samples_sent = due
+        if 0 < self._samples_requested <= self._samples_sent:
+            self._stop_stream(finished=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            timeout = ControllerEmulator.TICK_S if self._sampling_start is not None else 0.05
+            try:
+                r, _w, _x = select.select([self._master_fd], [], [], timeout)
+                termios.tcflow(self._slave_fd, termios.TCOON)
+                if r:
+                    self._rx.extend(os.read(self._master_fd, 1024))
+                    self._consume()
+                if self._sampling_start is not None:
+                    self._stream()
+            except OSError as e:
+                if not self._stop.is_set():
+                    logging.error(f"emulator: {e}")
+                return
+
+    def start(self) -> "ControllerEmulator":
+        self._stop.clear()
+        self._thread = threading.Thread(name="controller_emulator", target=self._run, daemon=True)
+        self._thread.start()
+        logging.info(f"controller emulator listening on {self.device}")
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        os.close(self._master_fd)
+        os.close(self._slave_fd)
+
+    def __enter__(self) -> "ControllerEmulator":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+        description="Emulates the controller on a pseudo terminal for testing without hardware (prints the device node to use).")
+    parser.add_argument("--outputdatarate", help="Initial output data rate.", choices=[e.name for e in OutputDataRate], default=OutputDataRate.ODR3200.name)
+    parser.add_argument("--signal", help="Frequency in Hz of the synthetic vibration on x.", type=float, default=40.0)
+    parser.add_argument("--amplitude", help="Amplitude in mg of the synthetic vibration on x.", type=float, default=200.0)
+    parser.add_argument("--clockerror", help="Deviation in ppm of the emulated sensor oscillator.", type=float, default=0.0)
+    cli_args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    emulator = ControllerEmulator(OutputDataRate[cli_args.outputdatarate], cli_args.signal, cli_args.amplitude, clock_error_ppm=cli_args.clockerror).start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        emulator.stop()
+    sys.exit(0)
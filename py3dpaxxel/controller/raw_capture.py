@@ -0,0 +1,148 @@
+import json
+import struct
+import time
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union
+
+from .constants import TransportHeaderId
+from .transfer_types import RxFrameFromHeaderId
+
+
+class RawCapture:
+    """
+    Binary file of the bytes received from the controller, stored as received without decoding.
+
+    Each chunk returned by a serial read is stored with the monotonic host time of its reception,
+    the captured bytes are decoded later on (see :class:`py3dpaxxel.controller.raw_decoder.RawCaptureDecoder`).
+
+    Layout (little endian):
+
+    .. code-block::
+
+        header: "PXRW" version:u16 reserved:u16 meta_len:u32 meta:json
+        chunk:  monotonic_s:f64 data_len:u32 data
+        ...
+
+    The header metadata contains the host wall clock and monotonic time at capture start (`created`, `monotonic`),
+    so chunk timestamps can be related to the wall clock.
+    """
+
+    EXTENSION = "raw"
+    "file extension of raw captures"
+    VERSION = 1
+    "raw capture format version"
+
+    FRAME_LENGTHS: List[int] = [next((clazz.LEN for header_id, clazz in RxFrameFromHeaderId.MAPPING.items() if header_id.value == i), 0) for i in range(256)]
+    "frame length by header id, 0 for unknown header ids"
+
+    _HEADER = struct.Struct("<4sHHI")
+    _CHUNK = struct.Struct("<dI")
+
+    def __init__(self, file: BinaryIO, meta: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Writes the header of a new capture.
+
+        :param file: output file opened binary for writing
+        :param meta: additional metadata stored in the header (i.e. device, requested samples)
+        """
+        self.file: BinaryIO = file
+        self.bytes_captured: int = 0
+        header = {"created": time.time(), "monotonic": time.monotonic()}
+        header.update(meta if meta is not None else {})
+        data = json.dumps(header, separators=(",", ":")).encode("utf8")
+        self.file.write(RawCapture._HEADER.pack(b"PXRW", RawCapture.VERSION, 0, len(data)))
+        self.file.write(data)
+
+    def write(self, data: bytes, monotonic_s: Optional[float] = None) -> None:
+        """
+        :param data: received bytes
+        :param monotonic_s: monotonic host time of reception, now if None
+        """
+        self.file.write(RawCapture._CHUNK.pack(time.monotonic() if monotonic_s is None else monotonic_s, len(data)))
+        self.file.write(data)
+        self.bytes_captured += len(data)
+
+    @staticmethod
+    def scan_frames(data: bytearray, pos: int) -> Tuple[int, bool, Optional[int]]:
+        """
+        Minimal framing: skips complete frames by their length until a stopped frame (end of stream).
+
+        :param data: received bytes
+        :param pos: position of the next frame
+        :return: position of the next (incomplete) frame, whether a stopped frame was seen (position is behind it)
+            and the unknown header id the framing stopped at (if any)
+        """
+        lengths = RawCapture.FRAME_LENGTHS
+        stopped = TransportHeaderId.RX_SAMPLING_STOPPED.value
+        end = len(data)
+        while pos < end:
+            header_id = data[pos]
+            length = lengths[header_id]
+            if 0 == length:
+                return pos, False, header_id
+            if pos + length > end:
+                break
+            pos += length
+            if header_id == stopped:
+                return pos, True, None
+        return pos, False, None
+
+    @staticmethod
+    def is_frame_boundary(data: Union[bytes, bytearray], pos: int, final: bool = False) -> Optional[bool]:
+        """
+        Validates a frame boundary by looking ahead at the next frame, used to regain sync after corrupted bytes:
+
+        - acceleration frame: followed by an acceleration frame with the next sample counter or by any other known frame
+        - other frames: followed by a known frame
+
+        :param data: received bytes
+        :param pos: position of the frame to validate
+        :param final: no more bytes will be received, a complete frame at the end of data is valid
+        :return: whether `pos` is a frame boundary, None if more bytes are required to decide
+        """
+        length = RawCapture.FRAME_LENGTHS[data[pos]]
+        if 0 == length:
+            return False
+        following = pos + length
+        if following >= len(data):
+            return (following == len(data)) if final else None
+        if TransportHeaderId.RX_ACCELERATION.value == data[pos] and TransportHeaderId.RX_ACCELERATION.value == data[following]:
+            if following + 3 > len(data):
+                return False if final else None
+            index = int.from_bytes(data[pos + 1:pos + 3], "little")
+            return int.from_bytes(data[following + 1:following + 3], "little") == (index + 1) % 65536
+        return 0 != RawCapture.FRAME_LENGTHS[data[following]]
+
+    @staticmethod
+    def read(filename: str) -> Tuple[Dict[str, Any], List[float], List[int], bytes]:
+        """
+        Reads a capture, a truncated last chunk (i.e. after a crash while capturing) is ignored.
+
+        :param filename: raw capture file
+        :return: header metadata, chunk timestamps, end offset of each chunk within the data and all captured data
+        """
+        with open(filename, "rb") as f:
+            header = f.read(RawCapture._HEADER.size)
+            if len(header) < RawCapture._HEADER.size:
+                raise ValueError(f"not a raw capture: {filename}")
+            magic, version, _reserved, meta_len = RawCapture._HEADER.unpack(header)
+            if b"PXRW" != magic or version > RawCapture.VERSION:
+                raise ValueError(f"not a raw capture (version {RawCapture.VERSION}): {filename}")
+            meta = json.loads(f.read(meta_len))
+            content = f.read()
+
+        timestamps: List[float] = []
+        ends: List[int] = []
+        chunks: List[bytes] = []
+        size = 0
+        pos = 0
+        while pos + RawCapture._CHUNK.size <= len(content):
+            monotonic_s, length = RawCapture._CHUNK.unpack_from(content, pos)
+            pos += RawCapture._CHUNK.size
+            if pos + length > len(content):
+                break
+            chunks.append(content[pos:pos + length])
+            pos += length
+            size += length
+            timestamps.append(monotonic_s)
+            ends.append(size)
+        return meta, timestamps, ends, b"".join(chunks)
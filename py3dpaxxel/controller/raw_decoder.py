@@ -0,0 +1,282 @@
+import logging
+from typing import Any, Dict, List, Optional, TextIO
+
+import numpy as np
+
+from .api import ErrorBufferOverflow, ErrorControllerFault, ErrorFifoOverflow, ErrorTransmissionError, ErrorUnknownResponse
+from .clock_estimator import ClockEstimator
+from .constants import OutputDataRate, OutputDataRateDelay, TransportHeaderId
+from .raw_capture import RawCapture
+from .transfer_types import (RxAcceleration, RxBufferOverflow, RxBufferStatus, RxDeviceSetup, RxFault, RxFifoOverflow, RxFirmwareVersion,
+                             RxFrameFromHeaderId, RxSamplingFinished, RxSamplingStarted, RxSamplingStopped, RxTransmissionError)
+
+
+class RawStream:
+    """
+    One stream decoded from a raw capture.
+    """
+
+    def __init__(self, sequence: int, samples_requested: int) -> None:
+        self.sequence: int = sequence
+        "stream number within the capture"
+        self.samples_requested: int = samples_requested
+        "number of samples requested by sampling start"
+        self.index: np.ndarray = np.zeros(0, dtype=np.uint16)
+        "sample counter of each sample"
+        self.counts: np.ndarray = np.zeros((0, 3), dtype=np.int16)
+        "raw acceleration counts x, y, z of each sample"
+        self.received_s: np.ndarray = np.zeros(0)
+        "monotonic host time of the chunk the sample was completely received with"
+        self.meta: Dict[str, Any] = {}
+        "stream metadata like written by :meth:`.Py3dpAxxel.decode`, no `samples` entry if the stream did not end regularly"
+        self.finished: bool = False
+        "controller finished the requested samples"
+        self.stopped: bool = False
+        "end of stream seen"
+        self.gaps: List[List[int]] = []
+        "lost samples as pairs of first lost sample counter and count (resilient decoding)"
+        self.skipped_bytes: int = 0
+        "bytes skipped to regain sync (resilient decoding)"
+
+    @property
+    def lost(self) -> int:
+        """
+        :return: number of lost samples
+        """
+        return sum([count for _index, count in self.gaps])
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def mg(self) -> np.ndarray:
+        """
+        :return: acceleration in mg, shape (samples, 3)
+        """
+        return self.counts * RxAcceleration.FULL_RESOLUTION_LSB_SCALE
+
+
+class RawCaptureDecoder:
+    """
+    Offline decoder of raw captures (see :class:`.RawCapture`) into the stream formats of the live decoder.
+
+    Consecutive acceleration frames (the bulk of a capture) are located with strided comparisons and unpacked at once as an array of
+    fixed-size records, all other frames are unpacked one by one like :meth:`.Py3dpAxxel.decode` does.
+    The output of :meth:`write_tsv` is identical to the stream file written by live decoding.
+
+    Resilient decoding skips bytes until a valid frame boundary (see :meth:`.RawCapture.is_frame_boundary`) instead of raising on
+    unknown header ids and sample counter mismatches, the stream metadata then contains the gaps like written by live decoding.
+    The clock estimation (see :class:`.ClockEstimator`) uses the reception time of the last sample of each chunk.
+
+    Example:
+
+    .. code-block::
+
+        for stream in RawCaptureDecoder("capture.raw").decode():
+            with open(f"stream-{stream.sequence}.tsv", "w") as f:
+                RawCaptureDecoder.write_tsv(stream, f)
+    """
+
+    SEARCH_FRAMES = 4096
+    "acceleration frames compared at once while searching the end of a run of acceleration frames"
+
+    def __init__(self, filename: str, resilient: bool = False, estimate_clock: bool = False) -> None:
+        """
+
+        :param filename: raw capture file
+        :param resilient: tolerates corrupted bytes and lost samples, see :meth:`.Py3dpAxxel.decode`
+        :param estimate_clock: adds the estimated actual sample rate to the stream metadata, see :meth:`.Py3dpAxxel.decode`
+        """
+        self.filename: str = filename
+        self.resilient: bool = resilient
+        self.estimate_clock: bool = estimate_clock
+        self.meta: Dict[str, Any] = {}
+        "header metadata of the capture"
+
+    def _acceleration_run(self, data: np.ndarray, pos: int) -> int:
+        """
+        :return: number of consecutive acceleration frames at `pos`
+        """
+        header_id = TransportHeaderId.RX_ACCELERATION.value
+        available = (len(data) - pos) // RxAcceleration.LEN
+        count = 0
+        while count < available:
+            window = min(RawCaptureDecoder.SEARCH_FRAMES, available - count)
+            begin = pos + count * RxAcceleration.LEN
+            other = np.flatnonzero(data[begin:begin + window * RxAcceleration.LEN:RxAcceleration.LEN] != header_id)
+            if len(other) > 0:
+                return count + int(other[0])
+            count += window
+        return count
+
+    def decode(self) -> List[RawStream]:
+        """
+        :return: all streams of the capture, the last one may be incomplete (not stopped)
+        """
+        self.meta, timestamps, ends, raw = RawCapture.read(self.filename)
+        data = np.frombuffer(raw, dtype=np.uint8)
+        chunk_end = np.asarray(ends, dtype=np.int64)
+        chunk_time = np.asarray(timestamps, dtype=np.float64)
+
+        streams: List[RawStream] = []
+        stream: Optional[RawStream] = None
+        runs: List[np.ndarray] = []
+        offsets: List[np.ndarray] = []
+        stream_meta: Dict[str, Any] = {}
+        received = 0
+        gaps: List[List[int]] = []
+        skipped = 0
+        resync = False
+        sequence = 0
+        pos = 0
+        while pos < len(data):
+            header_id = raw[pos]
+            if self.resilient and (resync or 0 == RawCapture.FRAME_LENGTHS[header_id]):
+                if not RawCapture.is_frame_boundary(raw, pos, final=True):
+                    resync = True
+                    skipped += 1
+                    pos += 1
+                    continue
+                resync = False
+
+            if TransportHeaderId.RX_ACCELERATION.value == header_id:
+                count = self._acceleration_run(data, pos)
+                if 0 == count:
+                    break
+                frames = data[pos:pos + count * RxAcceleration.LEN].reshape(count, RxAcceleration.LEN)
+                index = frames[:, 1:3].copy().view("<u2").ravel()
+                expected = (received + sum([lost for _index, lost in gaps]) + np.arange(count)) % 65536
+                mismatch = np.flatnonzero(index != expected)
+                if 0 < len(mismatch):
+                    assert self.resilient, f"sequence error: expected={expected[mismatch[0]]} vs current={index[mismatch[0]]}"
+                    if 0 == mismatch[0]:
+                        # the frame of the unexpected sample counter is either a valid frame behind lost samples or garbage
+                        if not RawCapture.is_frame_boundary(raw, pos, final=True):
+                            resync = True
+                            skipped += 1
+                            pos += 1
+                            continue
+                        lost = (int(index[0]) - int(expected[0])) % 65536
+                        logging.warning(f"{self.filename}: {lost} samples lost after sample {received}")
+                        gaps.append([int(expected[0]), lost])
+                        expected = (expected + lost) % 65536
+                        mismatch = np.flatnonzero(index != expected)
+                    if 0 < len(mismatch):
+                        count = int(mismatch[0])
+                        frames = frames[:count]
+                runs.append(frames)
+                offsets.append(pos + np.arange(1, count + 1) * RxAcceleration.LEN)
+                received += count
+                pos += count * RxAcceleration.LEN
+                continue
+
+            length = RawCapture.FRAME_LENGTHS[header_id]
+            if 0 == length:
+                e = ErrorUnknownResponse(header_id)
+                logging.fatal(f"rx: {str(e)}")
+                raise e
+            if pos + length > len(data):
+                break
+            package = RxFrameFromHeaderId(bytearray(raw[pos:pos + length])).unpack()
+            pos += length
+
+            if isinstance(package, RxFifoOverflow):
+                raise ErrorFifoOverflow()
+            if isinstance(package, RxBufferOverflow):
+                raise ErrorBufferOverflow()
+            if isinstance(package, RxTransmissionError):
+                raise ErrorTransmissionError()
+            if isinstance(package, RxFault):
+                raise ErrorControllerFault(package.code)
+
+            if isinstance(package, RxSamplingStarted):
+                stream = RawStream(sequence, package.maxSamples)
+                runs, offsets, received, gaps, skipped = [], [], 0, [], 0
+            elif isinstance(package, RxFirmwareVersion):
+                stream_meta.update({"firmware": {"version": package.version.string}})
+            elif isinstance(package, RxBufferStatus):
+                stream_meta.update({"buffer": {
+                    "size_bytes": f"{package.size_bytes}",
+                    "capacity_total": f"{package.capacity_total}",
+                    "capacity_used_max": f"{package.capacity_used_max}",
+                    "put_count": f"{package.put_count}",
+                    "take_count": f"{package.take_count}",
+                    "largest_tx_chunk_bytes": f"{package.largest_tx_chunk_bytes}"
+                }})
+            elif isinstance(package, RxDeviceSetup):
+                stream_meta.update({"sensor": {"rate": package.outputDataRate.name, "range": package.range.name, "scale": package.scale.name}})
+                stream_meta.update({"samples": {
+                    "requested": f"{stream.samples_requested if stream is not None else 0}",
+                    "received": f"{received % 65536}",
+                }})
+                if self.resilient:
+                    stream_meta.update({"integrity": {"lost": f"{sum([lost for _index, lost in gaps])}", "skipped_bytes": f"{skipped}",
+                                                      "gaps": gaps, "truncated": "false"}})
+                if stream is not None:
+                    stream.meta = dict(stream_meta)
+            elif isinstance(package, RxSamplingFinished) and stream is not None:
+                stream.finished = True
+            elif isinstance(package, RxSamplingStopped) and stream is not None:
+                stream.stopped = True
+                stream.gaps, stream.skipped_bytes = gaps, skipped
+                self._complete(stream, runs, offsets, chunk_end, chunk_time)
+                self._add_clock(stream)
+                streams.append(stream)
+                stream = None
+                sequence += 1
+
+        if stream is not None:
+            logging.warning(f"{self.filename}: stream {stream.sequence} not stopped, capture ends after {received} samples")
+            stream.gaps, stream.skipped_bytes = gaps, skipped + len(data) - pos
+            if self.resilient:
+                stream_meta.update({"samples": {"requested": f"{stream.samples_requested}", "received": f"{received % 65536}"},
+                                    "integrity": {"lost": f"{stream.lost}", "skipped_bytes": f"{stream.skipped_bytes}", "gaps": gaps, "truncated": "true"}})
+                stream.meta = dict(stream_meta)
+            self._complete(stream, runs, offsets, chunk_end, chunk_time)
+            self._add_clock(stream)
+            streams.append(stream)
+        return streams
+
+    @staticmethod
+    def _complete(stream: RawStream, runs: List[np.ndarray], offsets: List[np.ndarray], chunk_end: np.ndarray, chunk_time: np.ndarray) -> None:
+        if not runs:
+            return
+        frames = np.concatenate(runs)
+        stream.index = frames[:, 1:3].copy().view("<u2").ravel()
+        stream.counts = frames[:, 3:9].copy().view("<i2")
+        stream.received_s = chunk_time[np.searchsorted(chunk_end, np.concatenate(offsets), side="left")]
+
+    def _add_clock(self, stream: RawStream) -> None:
+        if not self.estimate_clock or "samples" not in stream.meta or 0 == len(stream):
+            return
+        rate = stream.meta["sensor"]["rate"] if "sensor" in stream.meta else self.meta.get("output_data_rate", OutputDataRate.ODR3200.name)
+        clock = ClockEstimator(1.0 / OutputDataRateDelay[OutputDataRate[rate]])
+        for uptime_ms, host_s in self.meta.get("uptime", []):
+            clock.add_uptime(uptime_ms, host_s)
+        # the last sample of a chunk was received at the chunk's time, earlier ones before
+        index = stream.index.astype(np.int64)
+        sample = index + 65536 * np.concatenate([[0], np.cumsum(np.diff(index) < 0)])
+        last = np.flatnonzero(np.append(stream.received_s[1:] != stream.received_s[:-1], True))
+        for i in last.tolist():
+            clock.add_arrival(int(sample[i]), float(stream.received_s[i]))
+        estimate = clock.estimate()
+        if estimate is not None:
+            stream.meta.update({"clock": estimate.to_meta()})
+
+    @staticmethod
+    def write_tsv(stream: RawStream, out_file: TextIO) -> None:
+        """
+        Writes a stream like :meth:`.Py3dpAxxel.decode` does (header, samples and metadata line if the stream ended regularly).
+
+        :param stream: decoded stream
+        :param out_file: text file opened for writing
+        :return: None
+        """
+        out_file.write("seq sample x y z\n")
+        if len(stream) > 0:
+            mg = stream.mg
+            rows = zip(stream.index.tolist(), mg[:, 0].tolist(), mg[:, 1].tolist(), mg[:, 2].tolist())
+            prefix = f"{stream.sequence:02} "
+            out_file.write("".join([f"{prefix}{i:05} {x:+09.3f} {y:+09.3f} {z:+09.3f}\n" for i, x, y, z in rows]))
+        if "samples" in stream.meta:
+            out_file.write("# " + str(stream.meta).replace("'", '"') + "\n")
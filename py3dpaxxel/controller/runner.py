@@ -4,6 +4,7 @@ from typing import Literal, Optional
 
 from .api import Py3dpAxxel
 from .constants import OutputDataRate, Range, Scale
+from .raw_capture import RawCapture
 
 
 class ControllerRunner:
@@ -31,6 +32,8 @@ class ControllerRunner:
             stream_wait: bool,
             output_file: Optional[str],
             output_stdout: Optional[bool],
+            output_raw: Optional[str] = None,
+            stream_resilient: bool = False,
     ) -> None:
         self.command: Optional[str] = command
         self.controller_serial_dev_name: Optional[str] = controller_serial_dev_name
@@ -52,6 +55,8 @@ class ControllerRunner:
         self.stream_wait: bool = stream_wait
         self.output_file: Optional[str] = output_file
         self.output_stdout: Optional[bool] = output_stdout
+        self.output_raw: Optional[str] = output_raw
+        self.stream_resilient: bool = stream_resilient
         self.stream_decode_timeout_s: float = 0.0 if stream_decode_timeout_s is None else stream_decode_timeout_s
 
     def run(self) -> int:
@@ -157,13 +162,20 @@ class ControllerRunner:
                 logging.info("decode stream to stdout")
                 with Py3dpAxxel(self.controller_serial_dev_name) as sensor:
                     sensor.decode(return_on_stop=not self.stream_wait,
-                                  message_timeout_s=self.stream_decode_timeout_s)
+                                  message_timeout_s=self.stream_decode_timeout_s, resilient=self.stream_resilient)
             elif self.output_file:
                 logging.info(f"decode stream to file {self.output_file}")
                 with open(self.output_file, "w") as file:
                     with Py3dpAxxel(self.controller_serial_dev_name) as sensor:
                         sensor.decode(return_on_stop=not self.stream_wait,
-                                      message_timeout_s=self.stream_decode_timeout_s, out_file=file)
+                                      message_timeout_s=self.stream_decode_timeout_s, out_file=file, resilient=self.stream_resilient)
+            elif self.output_raw:
+                logging.info(f"capture raw stream to file {self.output_raw}")
+                with open(self.output_raw, "wb") as file:
+                    with Py3dpAxxel(self.controller_serial_dev_name) as sensor:
+                        sensor.capture(RawCapture(file, {"device": self.controller_serial_dev_name}),
+                                       return_on_stop=not self.stream_wait,
+                                       message_timeout_s=self.stream_decode_timeout_s)
             else:
                 logging.warning("noting to do")
                 return 1
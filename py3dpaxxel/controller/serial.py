@@ -1,5 +1,7 @@
+import fcntl
 import os
 import select
+import struct
 import termios
 from typing import Optional
 
@@ -32,6 +34,18 @@ class CdcPySerial:
             return rx_bytes
         return self.dev.read(num_bytes)
 
+    def read_available(self, max_bytes: int, timeout: Optional[float] = None) -> bytes:
+        """
+        Reads all bytes received so far (at most `max_bytes`), waits for the first byte until timeout if none is available.
+        """
+        return self.read_bytes(max(1, min(max_bytes, self.dev.in_waiting)), timeout)
+
+    def bytes_pending(self) -> int:
+        """
+        :return: number of received bytes waiting to be read
+        """
+        return self.dev.in_waiting
+
     def open(self) -> None:
         self.dev = Serial(port=self.ser_dev_name,
                           timeout=self.read_timeout,
@@ -91,6 +105,19 @@ class CdcOsSerial:
                 return bs
         return bs
 
+    def read_available(self, max_bytes: int, timeout: Optional[float] = None) -> bytes:
+        """
+        Reads all bytes received so far (at most `max_bytes`), waits for the first byte until timeout if none is available.
+        """
+        r, w, e = select.select([self.fd], [], [], self.read_timeout if timeout is None else timeout)
+        return os.read(self.fd, max_bytes) if self.fd in r else bytes()
+
+    def bytes_pending(self) -> int:
+        """
+        :return: number of received bytes waiting to be read
+        """
+        return struct.unpack("I", fcntl.ioctl(self.fd, termios.FIONREAD, b"\0\0\0\0"))[0]
+
     def open(self) -> None:
         """
         Proudly stolen implementation details from serialposix.py
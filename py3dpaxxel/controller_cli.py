@@ -6,6 +6,7 @@ from typing import Literal, Optional
 
 from py3dpaxxel.cli.args import convert_uint16_from_str
 from py3dpaxxel.controller.constants import OutputDataRate, Range, Scale
+from py3dpaxxel.controller.raw_capture import RawCapture
 from py3dpaxxel.controller.runner import ControllerRunner
 from py3dpaxxel.log.setup import configure_logging
 from py3dpaxxel.storage import filename
@@ -134,6 +135,10 @@ class Args:
             "--wait",
             help="Does not return on last decoded package but waits for the next stream. Times out if --timeout is not 0.0.",
             action="store_true")
+        sup.add_argument(
+            "--resilient",
+            help="Tolerates corrupted bytes and lost samples: resynchronizes and records the gaps in the metadata line instead of failing.",
+            action="store_true")
         grp = sup.add_mutually_exclusive_group()
         grp.add_argument(
             "-", "--stdout",
@@ -147,6 +152,14 @@ class Args:
             type=str,
             nargs='?',
             const=self.default_filename)
+        grp.add_argument(
+            "--raw",
+            help="Writes the received bytes to file without decoding (raw capture), decode it later with decode_raw.py. "
+                 "Leaves more CPU to the serial reads on weak hosts. "
+                 f"Leave empty string for default fallback filename \"{filename.generate_filename(ext=RawCapture.EXTENSION)}\".",
+            type=str,
+            nargs='?',
+            const=filename.generate_filename(ext=RawCapture.EXTENSION))
 
         sub_group = self.parser.add_argument_group(
             "Flags",
@@ -203,6 +216,8 @@ class Runner:
 
         output_file = self.args.file if hasattr(self.args, "file") else None
         output_stdout = self.args.stdout if hasattr(self.args, "stdout") else None
+        output_raw = self.args.raw if hasattr(self.args, "raw") else None
+        stream_resilient = self.args.resilient if hasattr(self.args, "resilient") else False
 
         ret = ControllerRunner(
             command=command,
@@ -225,7 +240,9 @@ class Runner:
             stream_decode_timeout_s=stream_decode_timeout_s,
             stream_wait=stream_wait,
             output_file=output_file,
-            output_stdout=output_stdout).run()
+            output_stdout=output_stdout,
+            output_raw=output_raw,
+            stream_resilient=stream_resilient).run()
 
         if ret == -1:
             self.parser.print_help()
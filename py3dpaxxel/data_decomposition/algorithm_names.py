@@ -0,0 +1,25 @@
+"""
+Names of the registered algorithms, the first entry is the default.
+
+Declared without importing numpy, scipy or matplotlib, so that command line parsers can offer them as choices
+without loading the algorithm implementations.
+Each tuple must match the keys of the `algorithms` registry of the referenced class.
+"""
+
+DATAVIS_FFT_1D = ("discrete", "discrete_blackman")
+"see :class:`py3dpaxxel.data_decomposition.datavis_algorithms.DataVisFftAlgorithms1D`"
+
+DATAVIS_FFT_2D = ("discrete",)
+"see :class:`py3dpaxxel.data_decomposition.datavis_algorithms.DataVisFftAlgorithms2D`"
+
+DATAVIS_FFT_3D = ("trajectory",)
+"see :class:`py3dpaxxel.data_decomposition.datavis_algorithms.DataVisFftAlgorithms3D`"
+
+DECOMPOSE_FFT_1D = ("discrete", "discrete_blackman")
+"see :class:`py3dpaxxel.data_decomposition.decompose_algorithms.DecomposeFftAlgorithms1D`"
+
+DECOMPOSE_PSD_SEQUENCE = ("welch",)
+"see :class:`py3dpaxxel.data_decomposition.decompose_algorithms.DecomposePsdAlgorithmsSequence`"
+
+PLOT_DECIMATION = ("minmax", "lttb", "none")
+"see :class:`py3dpaxxel.data_decomposition.decimation.PlotDecimation`"
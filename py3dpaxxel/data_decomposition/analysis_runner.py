@@ -0,0 +1,130 @@
+import json
+import logging
+import os
+from typing import Optional, Tuple, Callable
+
+import numpy as np
+
+from py3dpaxxel.data_decomposition.chirp_response import ChirpResponseAnalysis
+from py3dpaxxel.data_decomposition.resonance_analysis import ResonanceAnalysis
+from py3dpaxxel.data_decomposition.spectra_loader import SpectraLoader
+from py3dpaxxel.data_decomposition.spectrum_cube import SpectrumCube
+from py3dpaxxel.samples.loader import SamplesLoader
+
+
+class DataAnalysisRunner(Callable[[], int]):
+
+    def __init__(self,
+                 command: Optional[str],
+                 input_dir: str,
+                 input_file_prefix: str,
+                 input_run_hash: Optional[str],
+                 band_hz: Tuple[float, float],
+                 num_peaks: int,
+                 num_ranked: int,
+                 output_filename: Optional[str],
+                 output_dir: Optional[str] = None,
+                 output_file_prefix: str = "cube",
+                 input_filename: Optional[str] = None,
+                 chirp_analysis: Optional[ChirpResponseAnalysis] = None) -> None:
+        """
+
+        :param input_filename: stream file (command "chirp")
+        :param chirp_analysis: chirp parameters (command "chirp")
+        """
+        self.command: Optional[str] = command
+        self.input_dir: str = input_dir
+        self.input_file_prefix: str = input_file_prefix
+        self.input_run_hash: Optional[str] = input_run_hash
+        self.band_hz: Tuple[float, float] = band_hz
+        self.num_peaks: int = num_peaks
+        self.num_ranked: int = num_ranked
+        self.output_filename: Optional[str] = output_filename
+        self.output_dir: Optional[str] = output_dir
+        self.output_file_prefix: str = output_file_prefix
+        self.input_filename: Optional[str] = input_filename
+        self.chirp_analysis: Optional[ChirpResponseAnalysis] = chirp_analysis
+
+    def __call__(self) -> int:
+        return self.run()
+
+    def run(self) -> int:
+        if not self.command:
+            return -1
+
+        if self.command == "shaper":
+            spectra = SpectraLoader(self.input_dir, self.input_file_prefix, self.input_run_hash).load()
+            if 0 == len(spectra):
+                logging.warning("no spectra found: nothing to analyze")
+                return 1
+
+            analysis = ResonanceAnalysis(spectra, self.band_hz, self.num_peaks)
+            resonance = analysis.dominant_resonance_hz()
+            ranking = analysis.rank()
+
+            report = {}
+            for ax, candidates in ranking.items():
+                logging.info(f"axis {ax}: dominant resonance {resonance.get(ax, np.nan):.1f}Hz, {len(candidates)} grid points ranked")
+                for rank, candidate in enumerate(candidates[:self.num_ranked]):
+                    logging.info(f"axis {ax}: rank {rank + 1}: {candidate}")
+                logging.info(f"axis {ax}: recommended {candidates[0].gcode}")
+                report[ax] = {
+                    "resonance_hz": resonance.get(ax, None),
+                    "recommended": candidates[0].gcode,
+                    "ranking": [{"frequency_hz": c.frequency_hz,
+                                 "zeta_em2": c.zeta_em2,
+                                 "energy": c.energy,
+                                 "repetitions": c.repetitions} for c in candidates[:self.num_ranked]],
+                }
+
+            if self.output_filename is not None:
+                with open(self.output_filename, "w") as f:
+                    json.dump(report, f, indent=2)
+                logging.info(f"report saved to {self.output_filename}")
+
+            return 0
+
+        elif self.command == "cube":
+            spectra = SpectraLoader(self.input_dir, self.input_file_prefix, self.input_run_hash).load()
+            if 0 == len(spectra):
+                logging.warning("no spectra found: nothing to assemble")
+                return 1
+
+            output_dir = self.output_dir if self.output_dir is not None else self.input_dir
+            for run_hash in np.unique(spectra.run_hash):
+                cube = SpectrumCube.build(spectra.select(spectra.run_hash == run_hash), str(run_hash))
+                out_filename = os.path.join(output_dir, f"{self.output_file_prefix}-{run_hash}.{SpectrumCube.EXTENSION}")
+                cube.save(out_filename)
+                logging.info(f"run {run_hash}: cube {dict(zip(SpectrumCube.DIMENSIONS, cube.data.shape))} saved to {out_filename}")
+
+            return 0
+
+        elif self.command == "chirp":
+            samples = SamplesLoader(self.input_filename).load()
+            if samples.is_empty():
+                logging.warning(f"no samples found in {self.input_filename}: nothing to analyze")
+                return 1
+
+            response = self.chirp_analysis.analyze(samples)
+            logging.info(f"chirp found {response.lag_s:.3f}s after recording start")
+            report = {"lag_s": response.lag_s, "frequency_hz": response.frequency_hz.tolist()}
+            for j, (ax, peaks_hz) in enumerate(response.resonance_hz(self.num_peaks).items()):
+                peaks_hz = [float(f) for f in peaks_hz if np.isfinite(f)]
+                logging.info(f"measured axis {ax}: resonance peaks {', '.join([f'{f:.1f}Hz' for f in peaks_hz])} "
+                             f"(mean coherence {np.mean(response.coherence[j]):.2f})")
+                report[ax] = {
+                    "resonance_hz": peaks_hz,
+                    "gain": response.magnitude[j].tolist(),
+                    "coherence": response.coherence[j].tolist(),
+                }
+
+            if self.output_filename is not None:
+                with open(self.output_filename, "w") as f:
+                    json.dump(report, f, indent=2)
+                logging.info(f"report saved to {self.output_filename}")
+
+            return 0
+
+        else:
+            logging.info("nothing to do")
+            return -1
@@ -0,0 +1,122 @@
+from typing import Dict, Literal
+
+import numpy as np
+from scipy.signal import csd, welch, coherence, correlate
+
+from py3dpaxxel.data_decomposition.resonance_analysis import find_peaks_parabolic
+from py3dpaxxel.gcode.trajectory_generator import ChirpTrajectory
+from py3dpaxxel.samples.samples import Samples
+
+
+class FrequencyResponse:
+    """
+    Frequency response of the printer obtained from one chirp recording.
+    """
+
+    AXIS = ("x", "y", "z")
+    "order of the measured axis in :attr:`magnitude` and :attr:`coherence`"
+
+    def __init__(self) -> None:
+        self.frequency_hz: np.ndarray = np.zeros(0)
+        "frequency bins within the swept range, shape `(bins,)`"
+        self.magnitude: np.ndarray = np.zeros((3, 0))
+        "gain from commanded to measured acceleration per measured axis, shape `(3, bins)`"
+        self.coherence: np.ndarray = np.zeros((3, 0))
+        "magnitude squared coherence (0..1) of commanded and measured acceleration, shape `(3, bins)`"
+        self.lag_s: float = 0.0
+        "offset of the chirp start relative to the first sample"
+
+    def resonance_hz(self, num_peaks: int = 3) -> Dict[str, np.ndarray]:
+        """
+        :return: for each measured axis, the frequencies of the largest gain peaks (descending gain)
+        """
+        peaks_hz, _peaks_mag = find_peaks_parabolic(self.frequency_hz, self.magnitude, num_peaks)
+        return {ax: peaks_hz[j] for j, ax in enumerate(FrequencyResponse.AXIS)}
+
+
+class ChirpResponseAnalysis:
+    """
+    Extracts the frequency response from a single recording of a :class:`py3dpaxxel.gcode.trajectory_generator.ChirpTrajectory`.
+
+    - synthesizes the commanded acceleration (square wave of each cycle: +a, -a, -a, +a per quarter period) at the sample rate
+    - aligns it to the recording by cross-correlation with the measured acceleration along the axis of motion
+      (the chirp starts after unknown homing, positioning and transmission delays)
+    - estimates the gain by the H1 estimator `|Pxy| / Pxx` (Welch averaging) for all measured axis,
+      i.e. cross-coupling shows up as gain on the other axis
+
+    The chirp parameters must match the ones used to generate the trajectory.
+    """
+
+    MG_PER_MM_S2 = 1.0 / 9.80665
+    "1mm/s^2 = 0.102mg"
+
+    def __init__(self,
+                 axis: Literal["x", "y", "z"],
+                 fx_start_hz: float,
+                 fx_stop_hz: float,
+                 hz_per_s: float = 2.0,
+                 accel_per_hz_mm_s2: float = 75.0,
+                 resolution_hz: float = 1.0) -> None:
+        """
+
+        :param axis: axis of motion
+        :param resolution_hz: frequency resolution, sets the Welch segment length
+        """
+        self.axis: Literal["x", "y", "z"] = axis
+        self.fx_start_hz: float = fx_start_hz
+        self.fx_stop_hz: float = fx_stop_hz
+        self.hz_per_s: float = hz_per_s
+        self.accel_per_hz_mm_s2: float = accel_per_hz_mm_s2
+        self.resolution_hz: float = resolution_hz
+
+    def excitation_mg(self, separation_s: float) -> np.ndarray:
+        """
+        :param separation_s: time in-between samples
+        :return: commanded acceleration along the axis of motion in mg, starting with the first cycle
+        """
+        cycles = ChirpTrajectory.schedule(self.fx_start_hz, self.fx_stop_hz, self.hz_per_s, self.accel_per_hz_mm_s2)
+        start_s = np.array([c.start_s for c in cycles])
+        frequency_hz = np.array([c.frequency_hz for c in cycles])
+        acceleration = np.array([c.acceleration_mm_s2 for c in cycles]) * ChirpResponseAnalysis.MG_PER_MM_S2
+
+        t = np.arange(int((start_s[-1] + 1.0 / frequency_hz[-1]) / separation_s)) * separation_s
+        cycle = np.clip(np.searchsorted(start_s, t, side="right") - 1, 0, len(cycles) - 1)
+        quarter = np.minimum(((t - start_s[cycle]) * frequency_hz[cycle] * 4.0).astype(int), 3)
+        return np.array([1.0, -1.0, -1.0, 1.0])[quarter] * acceleration[cycle]
+
+    @staticmethod
+    def _lag(reference: np.ndarray, measured: np.ndarray) -> int:
+        """
+        :return: number of samples `reference` is delayed within `measured` (>= 0)
+        """
+        correlation = correlate(measured - np.mean(measured), reference, mode="full", method="fft")
+        # index len(reference) - 1 is zero lag
+        return int(np.argmax(np.abs(correlation[len(reference) - 1:])))
+
+    def analyze(self, samples: Samples) -> FrequencyResponse:
+        """
+        :param samples: recording of the chirp, the recording must cover the whole chirp
+        :return: frequency response within the swept range
+        """
+        fs = 1.0 / samples.separation_s
+        measured = np.row_stack((samples.x, samples.y, samples.z)).astype(np.float64)
+        excitation = self.excitation_mg(samples.separation_s)
+        assert measured.shape[1] >= len(excitation), f"recording too short for the chirp: {measured.shape[1]} < {len(excitation)} samples"
+
+        lag = self._lag(excitation, measured[FrequencyResponse.AXIS.index(self.axis)])
+        lag = min(lag, measured.shape[1] - len(excitation))
+        commanded = np.zeros(measured.shape[1])
+        commanded[lag:lag + len(excitation)] = excitation
+
+        nperseg = min(measured.shape[1], int(fs / self.resolution_hz))
+        frequency_hz, pxx = welch(commanded, fs=fs, nperseg=nperseg)
+        _frequency_hz, pxy = csd(commanded, measured, fs=fs, nperseg=nperseg, axis=-1)
+        _frequency_hz, cxy = coherence(commanded, measured, fs=fs, nperseg=nperseg, axis=-1)
+
+        in_band = (frequency_hz >= self.fx_start_hz) & (frequency_hz <= self.fx_stop_hz) & (pxx > 0.0)
+        response = FrequencyResponse()
+        response.frequency_hz = frequency_hz[in_band]
+        response.magnitude = np.abs(pxy[:, in_band]) / pxx[in_band]
+        response.coherence = cxy[:, in_band]
+        response.lag_s = lag * samples.separation_s
+        return response
@@ -1,14 +1,62 @@
 import logging
 import os.path
-from typing import List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
+import matplotlib
 from matplotlib import pyplot as plt
 from matplotlib.axes import Axes
 from matplotlib.figure import Figure
 
+from py3dpaxxel.calibration.profile import CalibrationProfile
+from py3dpaxxel.data_decomposition import algorithm_names
 from py3dpaxxel.data_decomposition.datavis_algorithms import DataVisFftAlgorithms1D, DataVisFftAlgorithms2D, DataVisFftAlgorithms3D
+from py3dpaxxel.data_decomposition.decimation import PlotDecimation
 from py3dpaxxel.samples.loader import Samples, SamplesLoader
-from py3dpaxxel.storage.file_filter import FileSelector
+from py3dpaxxel.storage.file_filter import FileSelector, File
+
+_figure_templates: Dict[Tuple[str, str], Tuple[Figure, List[Axes]]] = {}
+"figures reused by the batch worker process, keyed by (dimension, algorithm)"
+
+
+def _init_batch_worker() -> None:
+    matplotlib.use("Agg")
+
+
+def _render_batch_file(dimension: str,
+                       algorithm: str,
+                       in_filename: str,
+                       out_filename: str,
+                       window_title: str,
+                       calibration: Optional[CalibrationProfile],
+                       decimation: PlotDecimation) -> str:
+    """
+    Renders one stream file into the figure template of the current worker process and saves it.
+
+    :return: the input file name
+    """
+    samples = SamplesLoader(in_filename, calibration).load()
+    assert (len(samples) % 2) == 0, "found odd number of samples, FFT needs even length of sample"
+
+    key = (dimension, algorithm)
+    if key not in _figure_templates:
+        fig = Figure()
+        if dimension == "d1":
+            axes = DataVisualizerRunner.fft_1d_axes(algorithm, fig)
+        else:
+            axes = [fig.add_subplot(projection="3d")]
+        _figure_templates[key] = (fig, axes)
+
+    fig, axes = _figure_templates[key]
+    for ax in axes:
+        ax.cla()
+
+    if dimension == "d1":
+        DataVisualizerRunner.fft_1d_plot(algorithm, samples, window_title, fig, axes, decimation)
+    else:
+        DataVisFftAlgorithms3D().compute(algorithm, samples, axes[0])
+    fig.savefig(out_filename)
+    return in_filename
 
 
 class DataVisualizerRunner:
@@ -20,7 +68,16 @@ class DataVisualizerRunner:
                  algorithm_d2: Optional[str],
                  algorithm_d3: Optional[str],
                  output_save: bool,
-                 output_plot: bool) -> None:
+                 output_plot: bool,
+                 calibration: Optional[CalibrationProfile] = None,
+                 num_workers: int = 0,
+                 decimation: str = "minmax") -> None:
+        """
+
+        :param num_workers: if > 0 and output is saved but not plotted, renders headless (Agg backend) in a pool of worker processes:
+            each figure is saved right away and its template is reused for the next file
+        :param decimation: reduces plotted points to the figure width, see :class:`PlotDecimation`
+        """
         self.command: Optional[str] = command
         self.input_filename: str = input_filename
         self.algorithm_d1: Optional[str] = algorithm_d1
@@ -28,24 +85,33 @@ class DataVisualizerRunner:
         self.algorithm_d3: Optional[str] = algorithm_d3
         self.do_save_to_file: bool = output_save
         self.do_plot: bool = output_plot
+        self.calibration: Optional[CalibrationProfile] = calibration
+        self.num_workers: int = num_workers
+        self.decimation: PlotDecimation = PlotDecimation(decimation)
 
     @staticmethod
-    def _fft_1d(algorithm: str, samples: Samples, window_title: Optional[str], save_filename: Optional[str]):
+    def fft_1d_axes(algorithm: str, fig: Figure) -> List[Axes]:
+        """
+        Lays out the acceleration (x, y, z) and FFT axes.
+        """
+        num_fft_axes = len(algorithm_names.DATAVIS_FFT_1D) if algorithm == "all" else 1
+        axes = fig.subplots(3 + num_fft_axes, 1)
+        fig.set_size_inches(60 / 2.45, 30 / 2.45)
+        return list(axes)
 
-        fig_acc: Figure
-        axes: List[Axes]
-        num_fft_axes = len(DataVisFftAlgorithms1D().algorithms) if algorithm == "all" else 1
-        fig_acc, axes = plt.subplots(3 + num_fft_axes, 1)
-        fig_acc.suptitle("Acceleration over Time / FFT" + ("\n" + window_title) if window_title else "")
-        if window_title:
-            fig_acc.canvas.manager.set_window_title(window_title)
-        # fig_acc.canvas.manager. full_screen_toggle()
-        fig_acc.set_size_inches(60 / 2.45, 30 / 2.45)
+    @staticmethod
+    def fft_1d_plot(algorithm: str,
+                    samples: Samples,
+                    window_title: Optional[str],
+                    fig: Figure,
+                    axes: List[Axes],
+                    decimation: PlotDecimation) -> None:
+        fig.suptitle("Acceleration over Time / FFT" + ("\n" + window_title) if window_title else "")
 
         xax, yax, zax = axes[:3]
-        xax.plot(samples.timestamp_ms, samples.x, color="r", linestyle="solid", marker=None, label="x")
-        yax.plot(samples.timestamp_ms, samples.y, color="g", linestyle="solid", marker=None, label="y")
-        zax.plot(samples.timestamp_ms, samples.z, color="b", linestyle="solid", marker=None, label="z")
+        decimation.plot(xax, samples.timestamp_ms, samples.x, color="r", linestyle="solid", marker=None, label="x")
+        decimation.plot(yax, samples.timestamp_ms, samples.y, color="g", linestyle="solid", marker=None, label="y")
+        decimation.plot(zax, samples.timestamp_ms, samples.z, color="b", linestyle="solid", marker=None, label="z")
 
         for ax in xax, yax, zax:
             ax.grid()
@@ -57,35 +123,71 @@ class DataVisualizerRunner:
         # FftAlgorithms1D.plot_ifft(samples, xax, yax, zax)
 
         # fft
+        algorithms = DataVisFftAlgorithms1D()
         if algorithm == "all":
             fft_ax_nr = 3
-            for a in DataVisFftAlgorithms1D().algorithms.keys():
+            for a in algorithms.algorithms.keys():
                 fftax = axes[fft_ax_nr]
-                DataVisFftAlgorithms1D().compute(a, samples, fftax)
+                algorithms.compute(a, samples, fftax, decimation)
                 fft_ax_nr += 1
         else:
             fftax = axes[3]
-            DataVisFftAlgorithms1D().compute(algorithm, samples, fftax)
+            algorithms.compute(algorithm, samples, fftax, decimation)
+
+    @staticmethod
+    def _fft_1d(algorithm: str, samples: Samples, window_title: Optional[str], save_filename: Optional[str], decimation: PlotDecimation) -> Figure:
+        fig_acc: Figure = plt.figure()
+        axes = DataVisualizerRunner.fft_1d_axes(algorithm, fig_acc)
+        if window_title:
+            fig_acc.canvas.manager.set_window_title(window_title)
+        # fig_acc.canvas.manager. full_screen_toggle()
+        DataVisualizerRunner.fft_1d_plot(algorithm, samples, window_title, fig_acc, axes, decimation)
 
         if save_filename:
             fig_acc.savefig(save_filename)
-        return 0
+        return fig_acc
 
     @staticmethod
     def _fft_2d(algorithm: str, samples: Samples, _window_title: Optional[str], _save_filename: Optional[str]):
+        algorithms = DataVisFftAlgorithms2D()
         if algorithm == "all":
-            for a in DataVisFftAlgorithms2D().algorithms.keys():
-                return DataVisFftAlgorithms2D().compute(a, samples)
+            for a in algorithms.algorithms.keys():
+                return algorithms.compute(a, samples)
         else:
-            return DataVisFftAlgorithms2D().compute(algorithm, samples)
+            return algorithms.compute(algorithm, samples)
 
     @staticmethod
     def _trajectory_3d(algorithm: str, samples: Samples, _window_title: Optional[str], _save_filename: Optional[str]):
+        algorithms = DataVisFftAlgorithms3D()
         if algorithm == "all":
-            for a in DataVisFftAlgorithms2D().algorithms.keys():
-                return DataVisFftAlgorithms3D().compute(a, samples)
+            for a in algorithms.algorithms.keys():
+                return algorithms.compute(a, samples)
+        else:
+            return algorithms.compute(algorithm, samples)
+
+    def _run_batch(self, files: List[File]) -> int:
+        if self.algorithm_d1 is not None:
+            dimension, algorithm = "d1", self.algorithm_d1
+        elif self.algorithm_d3 is not None:
+            dimension = "d3"
+            algorithm = self.algorithm_d3 if self.algorithm_d3 != "all" else algorithm_names.DATAVIS_FFT_3D[0]
         else:
-            return DataVisFftAlgorithms3D().compute(algorithm, samples)
+            logging.info("nothing to do")
+            return 0
+
+        logging.info(f"rendering {len(files)} files headless with {self.num_workers} workers...")
+        with ProcessPoolExecutor(max_workers=self.num_workers, initializer=_init_batch_worker) as executor:
+            futures = [executor.submit(_render_batch_file,
+                                       dimension,
+                                       algorithm,
+                                       file.full_path,
+                                       os.path.join(file.directory, file.filename_no_ext),
+                                       file.filename_no_ext,
+                                       self.calibration,
+                                       self.decimation) for file in files]
+            for i, future in enumerate(futures):
+                logging.info(f"rendered input file {i} {os.path.basename(future.result())}")
+        return 0
 
     def run(self) -> int:
         if not self.command:
@@ -99,9 +201,14 @@ class DataVisualizerRunner:
             for i in range(0, len(files)):
                 logging.debug(f"file {i} {files[i].full_path}")
 
+            if self.num_workers > 0:
+                if self.do_save_to_file and not self.do_plot:
+                    return self._run_batch(files)
+                logging.warning("batch rendering requires --save without --plot: falling back to sequential rendering")
+
             for i in range(0, len(files)):
                 file = files[i]
-                loader = SamplesLoader(file.full_path)
+                loader = SamplesLoader(file.full_path, self.calibration)
                 samples = loader.load()
 
                 assert (len(samples) % 2) == 0, "found odd number of samples, FFT needs even length of sample"
@@ -113,7 +220,9 @@ class DataVisualizerRunner:
                     logging.debug(f"rendering image {file.filename_no_ext} upon user request")
 
                 if self.algorithm_d1 is not None:
-                    self._fft_1d(self.algorithm_d1, samples, window_title, out_filename)
+                    fig = self._fft_1d(self.algorithm_d1, samples, window_title, out_filename, self.decimation)
+                    if not self.do_plot:
+                        plt.close(fig)
                 elif self.algorithm_d2 is not None:
                     self._fft_2d(self.algorithm_d2, samples, window_title, out_filename)
                 elif self.algorithm_d3 is not None:
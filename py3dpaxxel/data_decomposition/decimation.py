@@ -0,0 +1,111 @@
+from typing import Dict, Tuple, Union, List
+
+import numpy as np
+from matplotlib.axes import Axes
+
+
+class PlotDecimation:
+    """
+    Reduces the number of points of a line plot to roughly the horizontal resolution of the axes.
+
+    - "minmax": keeps minimum and maximum of each pixel column (envelope), peaks are preserved exactly
+    - "lttb": largest triangle three buckets, keeps one visually significant point per pixel column
+    - "none": plots all points
+
+    Both are applied vectorized over all buckets (LTTB iterates once per bucket, not per point).
+
+    Example:
+
+    .. code-block::
+
+        decimation = PlotDecimation("minmax")
+        decimation.plot(ax, samples.timestamp_ms, samples.x, color="r", label="x")
+    """
+
+    def __init__(self, algorithm: str = "minmax", points_per_column: float = 1.0) -> None:
+        """
+
+        :param algorithm: one of :attr:`algorithms`
+        :param points_per_column: number of buckets per pixel column (i.e. 2.0 for high-dpi output)
+        """
+        self.algorithms: Dict[str, callable] = {
+            "minmax": PlotDecimation._min_max,
+            "lttb": PlotDecimation._lttb,
+            "none": PlotDecimation._none,
+        }
+        assert algorithm in self.algorithms, f"unknown decimation algorithm: {algorithm}"
+        self.algorithm: str = algorithm
+        self.points_per_column: float = points_per_column
+
+    @staticmethod
+    def columns_of(ax: Axes) -> int:
+        """
+        :return: width of the axes in pixels (depends on figure size and dpi)
+        """
+        return max(1, int(round(ax.bbox.width)))
+
+    @staticmethod
+    def _none(x: np.ndarray, y: np.ndarray, _num_buckets: int) -> Tuple[np.ndarray, np.ndarray]:
+        return x, y
+
+    @staticmethod
+    def _min_max(x: np.ndarray, y: np.ndarray, num_buckets: int) -> Tuple[np.ndarray, np.ndarray]:
+        n = len(y)
+        if n <= 2 * num_buckets:
+            return x, y
+
+        bucket_size = -(-n // num_buckets)
+        num_buckets = -(-n // bucket_size)
+        buckets = np.pad(y, (0, num_buckets * bucket_size - n), mode="edge").reshape(num_buckets, bucket_size)
+        offset = np.arange(num_buckets) * bucket_size
+        i_min = np.minimum(np.argmin(buckets, axis=1) + offset, n - 1)
+        i_max = np.minimum(np.argmax(buckets, axis=1) + offset, n - 1)
+
+        # keep chronological order within each bucket
+        index = np.column_stack((np.minimum(i_min, i_max), np.maximum(i_min, i_max))).ravel()
+        return x[index], y[index]
+
+    @staticmethod
+    def _lttb(x: np.ndarray, y: np.ndarray, num_buckets: int) -> Tuple[np.ndarray, np.ndarray]:
+        n = len(y)
+        if n <= num_buckets + 2 or num_buckets < 1:
+            return x, y
+
+        # first and last point are kept, the remaining are split into equally sized buckets [edges[i], edges[i + 1])
+        edges = np.linspace(1, n - 1, num_buckets + 1).astype(int)
+        # mean of the bucket following bucket i, the last bucket is followed by the last point
+        counts = np.diff(np.append(edges[1:], n))
+        next_mean_x = np.add.reduceat(x.astype(np.float64), edges[1:]) / counts
+        next_mean_y = np.add.reduceat(y.astype(np.float64), edges[1:]) / counts
+
+        index = np.empty(num_buckets + 2, dtype=int)
+        index[0] = 0
+        index[-1] = n - 1
+        a = 0
+        for i in range(num_buckets):
+            s, e = edges[i], edges[i + 1]
+            area = np.abs((x[a] - next_mean_x[i]) * (y[s:e] - y[a]) - (x[a] - x[s:e]) * (next_mean_y[i] - y[a]))
+            a = s + int(np.argmax(area))
+            index[i + 1] = a
+        return x[index], y[index]
+
+    def decimate(self,
+                 x: Union[np.ndarray, List[float]],
+                 y: Union[np.ndarray, List[float]],
+                 num_columns: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :param x: monotonic x-values
+        :param y: y-values
+        :param num_columns: horizontal resolution in pixels
+        :return: decimated (x, y)
+        """
+        num_buckets = max(1, int(num_columns * self.points_per_column))
+        return self.algorithms[self.algorithm](np.asarray(x), np.asarray(y), num_buckets)
+
+    def plot(self, ax: Axes, x: Union[np.ndarray, List[float]], y: Union[np.ndarray, List[float]], *args, **kwargs):
+        """
+        Decimates to the width of `ax`, then plots.
+        All further arguments are forwarded to :meth:`matplotlib.axes.Axes.plot`.
+        """
+        return ax.plot(*self.decimate(x, y, PlotDecimation.columns_of(ax)), *args, **kwargs)
+
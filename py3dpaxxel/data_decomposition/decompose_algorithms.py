@@ -3,6 +3,7 @@ from typing import Dict, Optional, List
 import numpy as np
 from numpy import blackman
 from scipy.fft import fft, fftfreq
+from scipy.signal import welch
 
 from py3dpaxxel.samples.loader import Samples
 
@@ -52,10 +53,52 @@ class DecomposeFftAlgorithms1D:
         decomposed = FftXYZ()
         decomposed.frequency_hz = xff[1:n // 2]
         decomposed.x = 2.0 / n * np.abs(yff_x[1:n // 2])
-        decomposed.y = 2.0 / n * np.abs(yff_y[0:n // 2])
-        decomposed.z = 2.0 / n * np.abs(yff_z[0:n // 2])
+        decomposed.y = 2.0 / n * np.abs(yff_y[1:n // 2])
+        decomposed.z = 2.0 / n * np.abs(yff_z[1:n // 2])
 
         return decomposed
 
     def compute(self, algo: str, samples: Samples) -> FftXYZ:
         return self.algorithms[algo](samples)
+
+
+class PsdXYZ:
+    def __init__(self):
+        self.frequency_hz: Optional[np.ndarray] = None
+        self.mean: Optional[np.ndarray] = None
+        "averaged PSD, shape `(3, bins)` for x, y, z"
+        self.std: Optional[np.ndarray] = None
+        "standard deviation of PSD across repetitions, shape `(3, bins)` for x, y, z"
+        self.repetitions: int = 0
+        "number of averaged streams"
+
+
+class DecomposePsdAlgorithmsSequence:
+    """
+    Algorithms that decompose all sequence repetitions of one recording step at once.
+    """
+
+    def __init__(self) -> None:
+        self.algorithms: Dict[str, callable] = {
+            "welch": DecomposePsdAlgorithmsSequence._compute_psd_welch,
+        }
+
+    @staticmethod
+    def _compute_psd_welch(samples: List[Samples], segment_length: int = 1024) -> PsdXYZ:
+        # streams of one sequence may differ by a few samples: truncate to the shortest
+        n = min([len(s) for s in samples])
+        stacked = np.array([[s.x[:n], s.y[:n], s.z[:n]] for s in samples], dtype=np.float64)
+
+        # one pass over all repetitions and axis: shape (repetitions, 3, bins)
+        xff, pxx = welch(stacked, fs=1.0 / samples[0].separation_s, window="hann", nperseg=min(n, segment_length), axis=-1)
+
+        decomposed = PsdXYZ()
+        decomposed.frequency_hz = xff
+        decomposed.mean = pxx.mean(axis=0)
+        decomposed.std = pxx.std(axis=0)
+        decomposed.repetitions = len(samples)
+
+        return decomposed
+
+    def compute(self, algo: str, samples: List[Samples]) -> PsdXYZ:
+        return self.algorithms[algo](samples)
@@ -1,11 +1,15 @@
 import logging
 import os.path
-from typing import Optional, Callable, Tuple
+from typing import Optional, Callable, Tuple, Literal, Dict, List
 
-from py3dpaxxel.data_decomposition.decompose_algorithms import DecomposeFftAlgorithms1D, FftXYZ
+import numpy as np
+
+from py3dpaxxel.calibration.profile import CalibrationProfile
+from py3dpaxxel.data_decomposition.decompose_algorithms import DecomposeFftAlgorithms1D, FftXYZ, DecomposePsdAlgorithmsSequence, PsdXYZ
 from py3dpaxxel.samples.loader import Samples, SamplesLoader
 from py3dpaxxel.storage.file_filter import FileSelector
 from py3dpaxxel.storage.filename_meta import FilenameMetaStream, FilenameMetaFft
+from py3dpaxxel.storage.spectrum_file import SpectrumFile
 
 
 class DataDecomposeRunner(Callable[[], Tuple[int, int, int, int]]):
@@ -17,7 +21,10 @@ class DataDecomposeRunner(Callable[[], Tuple[int, int, int, int]]):
                  algorithm_d1: Optional[str],
                  output_dir: str,
                  output_file_prefix: str,
-                 output_overwrite: bool) -> None:
+                 output_overwrite: bool,
+                 output_format: Literal["tsv", "npz"] = "tsv",
+                 algorithm_sequence: Optional[str] = None,
+                 calibration: Optional[CalibrationProfile] = None) -> None:
         self.command: Optional[str] = command
         self.input_dir: str = input_dir
         self.input_file_prefix: str = input_file_prefix
@@ -25,21 +32,47 @@ class DataDecomposeRunner(Callable[[], Tuple[int, int, int, int]]):
         self.output_dir: str = output_dir
         self.output_file_prefix: str = output_file_prefix
         self.output_overwrite: bool = output_overwrite
+        self.output_format: Literal["tsv", "npz"] = output_format
+        self.algorithm_sequence: Optional[str] = algorithm_sequence
+        self.calibration: Optional[CalibrationProfile] = calibration
 
     @staticmethod
-    def _fft_1d(algorithm: str,
-                samples: Samples,
-                in_file_meta: FilenameMetaStream,
-                out_dir: str,
-                out_file_prefix: str,
-                overwrite_existing_file: bool) -> Tuple[int, int, int]:
+    def fft_1d(algorithm: str,
+               samples: Samples,
+               in_file_meta: FilenameMetaStream,
+               out_dir: str,
+               out_file_prefix: str,
+               overwrite_existing_file: bool,
+               out_format: Literal["tsv", "npz"] = "tsv",
+               fft_xyz: Optional[FftXYZ] = None) -> Tuple[int, int, int]:
+        """
+        Decomposes one stream and writes the spectra.
+
+        :param fft_xyz: already computed spectra (skips computation), None to compute them
+        :return: tuple of total, processed and skipped output files
+        """
         out_file_meta = FilenameMetaFft().from_filename_meta_stream(in_file_meta)
         out_file_meta.prefix = out_file_prefix
-        fft_xyz: FftXYZ = DecomposeFftAlgorithms1D().compute(algorithm, samples)
+        fft_xyz: FftXYZ = DecomposeFftAlgorithms1D().compute(algorithm, samples) if fft_xyz is None else fft_xyz
         total = 0
         processed = 0
         skipped = 0
 
+        if out_format == "npz":
+            total += 1
+            out_file_meta.fft_axis = SpectrumFile.FFT_AXIS
+            out_file_meta.file_extension = SpectrumFile.EXTENSION
+            out_file_full_path = os.path.join(out_dir, out_file_meta.to_filename(with_current_timestamp=False))
+            if not overwrite_existing_file and os.path.isfile(out_file_full_path):
+                skipped += 1
+            else:
+                SpectrumFile.save(out_file_full_path,
+                                  fft_xyz.frequency_hz, fft_xyz.x, fft_xyz.y, fft_xyz.z,
+                                  out_file_meta,
+                                  {"algorithm": algorithm, "separation_s": samples.separation_s})
+                processed += 1
+            return total, processed, skipped
+
         for ax in ["x", "y", "z"]:
             total += 1
             out_file_meta.fft_axis = ax
@@ -55,6 +88,64 @@ class DataDecomposeRunner(Callable[[], Tuple[int, int, int, int]]):
 
         return total, processed, skipped
 
+    @staticmethod
+    def _psd_sequence(algorithm: str,
+                      samples: List[Samples],
+                      in_files_meta: List[FilenameMetaStream],
+                      out_dir: str,
+                      out_file_prefix: str,
+                      overwrite_existing_file: bool,
+                      out_format: Literal["tsv", "npz"] = "tsv") -> Tuple[int, int, int]:
+        """
+        Averages the PSD of all sequence repetitions of one step (same run hash, axis, frequency and zeta) into one output file.
+
+        Output columns: frequency, then mean and standard deviation for each axis x, y, z.
+        The output file is named after the first repetition, the algorithm is appended to the prefix (i.e. "fft_welch-...").
+
+        :return: tuple of total, processed and skipped output files
+        """
+        out_file_meta = FilenameMetaFft().from_filename_meta_stream(in_files_meta[0])
+        out_file_meta.prefix = f"{out_file_prefix}_{algorithm}"
+        out_file_meta.fft_axis = "xyz"
+        out_file_meta.file_extension = out_format
+        out_file_full_path = os.path.join(out_dir, out_file_meta.to_filename(with_current_timestamp=False))
+        if not overwrite_existing_file and os.path.isfile(out_file_full_path):
+            return 1, 0, 1
+
+        psd_xyz: PsdXYZ = DecomposePsdAlgorithmsSequence().compute(algorithm, samples)
+        columns = ("freq_hz", "x_mean", "x_std", "y_mean", "y_std", "z_mean", "z_std")
+        spectrum = np.column_stack((psd_xyz.frequency_hz,
+                                    psd_xyz.mean[0], psd_xyz.std[0],
+                                    psd_xyz.mean[1], psd_xyz.std[1],
+                                    psd_xyz.mean[2], psd_xyz.std[2]))
+
+        if out_format == "npz":
+            SpectrumFile.save_columns(out_file_full_path, columns, spectrum, out_file_meta,
+                                      {"algorithm": algorithm,
+                                       "separation_s": samples[0].separation_s,
+                                       "repetitions": psd_xyz.repetitions,
+                                       "stream_hashes": ",".join([m.stream_hash for m in in_files_meta])})
+        else:
+            np.savetxt(out_file_full_path, spectrum, fmt="%.9g", header=" ".join(columns), comments="")
+
+        return 1, 1, 0
+
+    def _psd_group(self, key: Tuple[str, str, int, int], group: List[Tuple[FilenameMetaStream, Samples]]) -> Tuple[int, int]:
+        """
+        :return: number of processed and skipped input files
+        """
+        run_hash, axis, frequency_hz, zeta_em2 = key
+        group.sort(key=lambda meta_samples: meta_samples[0].sequence_nr)
+        logging.info(f"averaging {len(group)} repetitions of run={run_hash} axis={axis} fx={frequency_hz} zeta={zeta_em2}")
+        _psd_total, psd_processed, psd_skipped = self._psd_sequence(self.algorithm_sequence,
+                                                                    [s for _m, s in group],
+                                                                    [m for m, _s in group],
+                                                                    self.output_dir,
+                                                                    self.output_file_prefix,
+                                                                    self.output_overwrite,
+                                                                    self.output_format)
+        return len(group) if psd_processed > 0 else 0, len(group) if psd_skipped > 0 else 0
+
     def __call__(self) -> Tuple[int, int, int, int]:
         return self.run()
 
@@ -71,39 +162,57 @@ class DataDecomposeRunner(Callable[[], Tuple[int, int, int, int]]):
             fs = (FileSelector(os.path.join(self.input_dir, self.input_file_prefix) + "*"))
             in_files = fs.filter()
             logging.info(f"selected {len(in_files)} for FFT from {fs.directory} (filter: {fs.filename})")
+            sequence_groups: Dict[Tuple[str, str, int, int], List[Tuple[FilenameMetaStream, Samples]]] = {}
+            # each group of repetitions is averaged and released once its last file is loaded
+            group_keys: List[Optional[Tuple[str, str, int, int]]] = [None] * len(in_files)
+            group_remaining: Dict[Tuple[str, str, int, int], int] = {}
+            if self.algorithm_d1 is None and self.algorithm_sequence is not None:
+                for i, in_file in enumerate(in_files):
+                    meta = FilenameMetaStream().from_filename(in_file.filename_ext)
+                    group_keys[i] = (meta.run_hash, meta.sequence_axis, meta.sequence_frequency_hz, meta.sequence_zeta_em2)
+                    group_remaining[group_keys[i]] = group_remaining.get(group_keys[i], 0) + 1
 
             for i in range(0, len(in_files)):
                 in_file = in_files[i]
-                loader = SamplesLoader(in_file.full_path)
+                loader = SamplesLoader(in_file.full_path, self.calibration)
                 samples = loader.load()
                 total += 1
 
                 if not samples.has_meta():
                     skipped += 1
-                    continue
 
-                if samples.is_empty():
+                elif samples.is_empty():
                     skipped += 1
                     logging.warning(f"skip empty stream: file nr={i} file={in_file.filename_ext}")
-                    continue
-
-                assert (len(samples) % 2) == 0, "found odd number of samples, FFT needs even length of sample"
 
-                in_file_meta = FilenameMetaStream().from_filename(in_file.filename_ext)
-
-                if self.algorithm_d1 is not None:
-                    fft_total, fft_processed, fft_skipped = self._fft_1d(self.algorithm_d1,
+                elif self.algorithm_d1 is not None:
+                    assert (len(samples) % 2) == 0, "found odd number of samples, FFT needs even length of sample"
+                    in_file_meta = FilenameMetaStream().from_filename(in_file.filename_ext)
+                    fft_total, fft_processed, fft_skipped = self.fft_1d(self.algorithm_d1,
                                                                          samples,
                                                                          in_file_meta,
                                                                          in_file.directory,
                                                                          self.output_file_prefix,
-                                                                         self.output_overwrite)
+                                                                         self.output_overwrite,
+                                                                         self.output_format)
                     skipped += 1 if fft_skipped > 0 else 0
                     processed += 1 if fft_processed == fft_total else 0
 
+                elif self.algorithm_sequence is not None:
+                    in_file_meta = FilenameMetaStream().from_filename(in_file.filename_ext)
+                    sequence_groups.setdefault(group_keys[i], []).append((in_file_meta, samples))
+
                 else:
                     logging.info("nothing to do")
 
+                key = group_keys[i]
+                if key is not None:
+                    group_remaining[key] -= 1
+                    if 0 == group_remaining[key] and key in sequence_groups:
+                        group_processed, group_skipped = self._psd_group(key, sequence_groups.pop(key))
+                        processed += group_processed
+                        skipped += group_skipped
+
             logging.info(f"decompose runner traversed input files: total={total} processed={processed} skipped={skipped}")
             return 0, total, processed, skipped
 
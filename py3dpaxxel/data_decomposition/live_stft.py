@@ -0,0 +1,129 @@
+import logging
+import threading
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from py3dpaxxel.controller.decoder_sink import DecoderSink
+from py3dpaxxel.controller.transfer_types import RxAcceleration
+
+
+class StftPeaks:
+    """
+    Dominant peaks of one short-time spectrum.
+    """
+
+    def __init__(self, sequence: int, sample_index: int, peaks: List[List[Tuple[float, float]]]):
+        self.sequence: int = sequence
+        "stream sequence number"
+        self.sample_index: int = sample_index
+        "number of samples decoded when the spectrum was computed"
+        self.peaks: List[List[Tuple[float, float]]] = peaks
+        "for x, y, z: list of (frequency [Hz], magnitude [mg]) sorted by descending magnitude"
+
+    def __str__(self) -> str:
+        axis = " ".join([f"{ax}=[" + ", ".join([f"{f:.1f}Hz/{m:.1f}mg" for f, m in p]) + "]" for ax, p in zip("xyz", self.peaks)])
+        return f"seq={self.sequence:02} sample={self.sample_index:05} {axis}"
+
+
+class LiveStftSink(DecoderSink):
+    """
+    Online short-time FFT attached to the decoder.
+
+    Keeps a rolling window of the latest samples and computes the magnitude spectra of x, y, z every `hop_size` samples.
+    Window function and frequency bins are computed once at construction.
+    The dominant peaks per axis are published to `on_peaks` (or logged if no callback is given) while sampling is still running.
+    Optionally the decoder is aborted (see `do_abort_flag`) once a peak magnitude exceeds `abort_above_mg`.
+    """
+
+    def __init__(self,
+                 separation_s: float,
+                 window_size: int = 1024,
+                 hop_size: Optional[int] = None,
+                 num_peaks: int = 3,
+                 min_frequency_hz: float = 5.0,
+                 on_peaks: Optional[Callable[[StftPeaks], None]] = None,
+                 abort_above_mg: Optional[float] = None,
+                 do_abort_flag: Optional[threading.Event] = None) -> None:
+        """
+
+        :param separation_s: time in-between samples (`1/ODR`)
+        :param window_size: number of samples per spectrum
+        :param hop_size: compute a spectrum each `hop_size` samples, defaults to a quarter of `window_size`
+        :param num_peaks: number of peaks to publish per axis
+        :param min_frequency_hz: ignore peaks below (i.e. DC and drift)
+        :param on_peaks: callback receiving the peaks of each spectrum, logs peaks if None
+        :param abort_above_mg: set `do_abort_flag` if any peak exceeds this magnitude, None to disable
+        :param do_abort_flag: the decoder's stop flag
+        """
+        self.window_size: int = window_size
+        self.hop_size: int = hop_size if hop_size is not None else max(1, window_size // 4)
+        self.num_peaks: int = num_peaks
+        self.on_peaks: Callable[[StftPeaks], None] = on_peaks if on_peaks is not None else lambda p: logging.info(f"live fft: {p}")
+        self.abort_above_mg: Optional[float] = abort_above_mg
+        self.do_abort_flag: Optional[threading.Event] = do_abort_flag
+
+        # cached per window size
+        self._window: np.ndarray = np.hanning(window_size)
+        self._amplitude_scale: float = 2.0 / np.sum(self._window)
+        self.frequency_hz: np.ndarray = np.fft.rfftfreq(window_size, separation_s)
+        self._valid_bins: np.ndarray = self.frequency_hz >= min_frequency_hz
+
+        self._buffer: np.ndarray = np.zeros((3, window_size))
+        self._pending: List[Tuple[float, float, float]] = []
+        self._num_samples: int = 0
+        self._sequence: int = 0
+        self.latest: Optional[StftPeaks] = None
+        "last published peaks"
+
+    def on_start(self, sequence: int, max_samples: int) -> None:
+        self._buffer[:] = 0
+        self._pending.clear()
+        self._num_samples = 0
+        self._sequence = sequence
+        self.latest = None
+
+    def on_acceleration(self, package: RxAcceleration) -> None:
+        self._pending.append((package.x, package.y, package.z))
+        self._num_samples += 1
+        if len(self._pending) >= self.hop_size:
+            self._shift_in_pending()
+            if self._num_samples >= self.window_size:
+                self._publish(self._compute_peaks())
+
+    def _shift_in_pending(self) -> None:
+        hop = min(len(self._pending), self.window_size)
+        self._buffer[:, :-hop] = self._buffer[:, hop:]
+        self._buffer[:, -hop:] = np.array(self._pending[-hop:]).T
+        self._pending.clear()
+
+    def compute_spectrum(self) -> np.ndarray:
+        """
+        Magnitude spectra of the current window.
+
+        :return: array of shape `(3, bins)` in mg, see :attr:`frequency_hz`
+        """
+        detrended = self._buffer - self._buffer.mean(axis=1, keepdims=True)
+        return np.abs(np.fft.rfft(detrended * self._window, axis=1)) * self._amplitude_scale
+
+    def _compute_peaks(self) -> StftPeaks:
+        spectrum = self.compute_spectrum()
+
+        # local maxima of all axis at once
+        is_peak = np.zeros(spectrum.shape, dtype=bool)
+        is_peak[:, 1:-1] = (spectrum[:, 1:-1] > spectrum[:, :-2]) & (spectrum[:, 1:-1] >= spectrum[:, 2:])
+        is_peak &= self._valid_bins
+        candidates = np.where(is_peak, spectrum, 0.0)
+        top = np.argsort(candidates, axis=1)[:, :-self.num_peaks - 1:-1]
+
+        peaks = [[(float(self.frequency_hz[b]), float(spectrum[ax, b])) for b in top[ax] if candidates[ax, b] > 0.0] for ax in range(3)]
+        return StftPeaks(self._sequence, self._num_samples, peaks)
+
+    def _publish(self, peaks: StftPeaks) -> None:
+        self.latest = peaks
+        self.on_peaks(peaks)
+
+        if self.abort_above_mg is not None and self.do_abort_flag is not None:
+            if any([m > self.abort_above_mg for axis_peaks in peaks.peaks for _f, m in axis_peaks]):
+                logging.warning(f"live fft: peak above {self.abort_above_mg}mg, aborting decoder")
+                self.do_abort_flag.set()
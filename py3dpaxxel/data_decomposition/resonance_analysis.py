@@ -0,0 +1,175 @@
+from typing import Dict, List, Literal, Tuple, Callable
+
+import numpy as np
+
+from py3dpaxxel.data_decomposition.decompose_algorithms import DecomposeFftAlgorithms1D
+from py3dpaxxel.data_decomposition.spectra_loader import SweepSpectra
+from py3dpaxxel.samples.loader import SamplesLoader
+
+
+def find_peaks_parabolic(frequency_hz: np.ndarray, magnitude: np.ndarray, num_peaks: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Finds the largest local maxima along the last axis of `magnitude` and refines them by parabolic interpolation.
+
+    Vectorized over all leading dimensions, i.e. `magnitude` of shape `(streams, 3, bins)` yields peaks of shape `(streams, 3, num_peaks)`.
+    Missing peaks (less local maxima than `num_peaks`) are reported as `nan`.
+
+    :param frequency_hz: equidistant frequency bins, shape `(bins,)`
+    :param magnitude: spectra, shape `(..., bins)`
+    :param num_peaks: number of peaks per spectrum, sorted by descending magnitude
+    :return: tuple of interpolated peak frequencies and peak magnitudes, both of shape `(..., num_peaks)`
+    """
+    a = magnitude[..., :-2]
+    b = magnitude[..., 1:-1]
+    c = magnitude[..., 2:]
+    candidates = np.where((b > a) & (b >= c), b, -np.inf)
+
+    num_peaks = min(num_peaks, candidates.shape[-1])
+    top = np.argpartition(-candidates, num_peaks - 1, axis=-1)[..., :num_peaks]
+    order = np.argsort(-np.take_along_axis(candidates, top, axis=-1), axis=-1)
+    top = np.take_along_axis(top, order, axis=-1)
+
+    ya = np.take_along_axis(a, top, axis=-1)
+    yb = np.take_along_axis(b, top, axis=-1)
+    yc = np.take_along_axis(c, top, axis=-1)
+    denominator = ya - 2.0 * yb + yc
+    with np.errstate(divide="ignore", invalid="ignore"):
+        offset = np.where(denominator != 0.0, 0.5 * (ya - yc) / denominator, 0.0)
+
+    bin_width_hz = frequency_hz[1] - frequency_hz[0]
+    peak_frequency_hz = frequency_hz[1:-1][top] + offset * bin_width_hz
+    peak_magnitude = yb - 0.25 * (ya - yc) * offset
+
+    valid = np.isfinite(np.take_along_axis(candidates, top, axis=-1))
+    return np.where(valid, peak_frequency_hz, np.nan), np.where(valid, peak_magnitude, np.nan)
+
+
+def band_energy(frequency_hz: np.ndarray, magnitude: np.ndarray, band_hz: Tuple[float, float]) -> np.ndarray:
+    """
+    Residual vibration energy: sum of squared magnitudes within a frequency band.
+
+    :param frequency_hz: frequency bins, shape `(bins,)`
+    :param magnitude: spectra, shape `(..., bins)`
+    :param band_hz: lower and upper band limit (inclusive)
+    :return: energy of shape `(...)`
+    """
+    in_band = (frequency_hz >= band_hz[0]) & (frequency_hz <= band_hz[1])
+    return np.sum(np.square(magnitude[..., in_band], dtype=np.float64), axis=-1)
+
+
+class StreamScore(Callable[[str, str], float]):
+    """
+    Scores one recorded stream right after recording: residual vibration energy along the axis of motion within `band_hz`
+    (same measure as :meth:`ResonanceAnalysis.stream_energy`).
+    """
+
+    def __init__(self, band_hz: Tuple[float, float] = (5.0, 200.0), algorithm: str = "discrete") -> None:
+        self.band_hz: Tuple[float, float] = band_hz
+        self.algorithm: str = algorithm
+
+    def __call__(self, filename: str, axis: str) -> float:
+        """
+        :param filename: stream file
+        :param axis: axis of motion
+        :return: energy, `nan` if the stream could not be decomposed
+        """
+        samples = SamplesLoader(filename).load()
+        if not samples.has_meta() or samples.is_empty():
+            return np.nan
+        fft_xyz = DecomposeFftAlgorithms1D().compute(self.algorithm, samples)
+        return float(band_energy(np.asarray(fft_xyz.frequency_hz), np.asarray(getattr(fft_xyz, axis)), self.band_hz))
+
+
+class ShaperCandidate:
+    """
+    One input shaper grid point (M593 frequency and damping) with its score.
+    """
+
+    def __init__(self, axis: Literal["x", "y", "z"], frequency_hz: int, zeta_em2: int, energy: float, repetitions: int) -> None:
+        self.axis: Literal["x", "y", "z"] = axis
+        self.frequency_hz: int = frequency_hz
+        self.zeta_em2: int = zeta_em2
+        self.energy: float = energy
+        "residual vibration energy averaged over all repetitions"
+        self.repetitions: int = repetitions
+
+    @property
+    def gcode(self) -> str:
+        return f"M593 {self.axis.upper()} F{self.frequency_hz} D{round((self.zeta_em2 / 100.0), 2)}"
+
+    def __str__(self) -> str:
+        return f"axis={self.axis} fx={self.frequency_hz:03} zeta={self.zeta_em2:03} energy={self.energy:.3f} repetitions={self.repetitions} gcode=\"{self.gcode}\""
+
+
+class ResonanceAnalysis:
+    """
+    Turns the spectra of an input shaper sweep (see :class:`py3dpaxxel.sampling_tasks.series_argument_generator.RunArgsGenerator`)
+    into resonance peaks and a ranking of the swept (frequency, zeta) grid points per axis.
+
+    The score of a stream is the residual vibration energy measured in the direction of motion within `band_hz`.
+    """
+
+    def __init__(self, spectra: SweepSpectra, band_hz: Tuple[float, float] = (5.0, 200.0), num_peaks: int = 3) -> None:
+        self.spectra: SweepSpectra = spectra
+        self.band_hz: Tuple[float, float] = band_hz
+        self.num_peaks: int = num_peaks
+
+    def stream_energy(self) -> np.ndarray:
+        """
+        :return: residual energy of each stream along its axis of motion, shape `(streams,)`
+        """
+        measured_axis = np.searchsorted(np.array(SweepSpectra.AXIS), self.spectra.sequence_axis)
+        energy = band_energy(self.spectra.frequency_hz, self.spectra.magnitude, self.band_hz)
+        return energy[np.arange(len(self.spectra)), measured_axis]
+
+    def peaks(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :return: peak frequencies and magnitudes of all streams and measured axis, both of shape `(streams, 3, num_peaks)`
+        """
+        in_band = (self.spectra.frequency_hz >= self.band_hz[0]) & (self.spectra.frequency_hz <= self.band_hz[1])
+        return find_peaks_parabolic(self.spectra.frequency_hz[in_band], self.spectra.magnitude[..., in_band], self.num_peaks)
+
+    def dominant_resonance_hz(self) -> Dict[str, float]:
+        """
+        :return: for each moved axis, the strongest peak of the averaged spectrum along the axis of motion
+        """
+        peaks_hz, peaks_mag = self.peaks()
+        resonance: Dict[str, float] = {}
+        for j, ax in enumerate(SweepSpectra.AXIS):
+            selected = self.spectra.sequence_axis == ax
+            if not np.any(selected):
+                continue
+            # strongest peak of each stream, weighted by its magnitude
+            strongest_hz = peaks_hz[selected, j, 0]
+            strongest_mag = peaks_mag[selected, j, 0]
+            valid = np.isfinite(strongest_hz)
+            if np.any(valid):
+                resonance[ax] = float(np.average(strongest_hz[valid], weights=strongest_mag[valid]))
+        return resonance
+
+    def rank(self) -> Dict[str, List[ShaperCandidate]]:
+        """
+        Ranks all grid points by residual energy averaged over their repetitions.
+
+        :return: for each moved axis, the candidates sorted by ascending energy (best first)
+        """
+        energy = self.stream_energy()
+        ranking: Dict[str, List[ShaperCandidate]] = {}
+
+        for ax in SweepSpectra.AXIS:
+            selected = self.spectra.sequence_axis == ax
+            if not np.any(selected):
+                continue
+            grid = np.stack((self.spectra.sequence_frequency_hz[selected], self.spectra.sequence_zeta_em2[selected]), axis=1)
+            points, inverse, counts = np.unique(grid, axis=0, return_inverse=True, return_counts=True)
+            mean_energy = np.bincount(inverse.reshape(-1), weights=energy[selected]) / counts
+            order = np.argsort(mean_energy)
+            ranking[ax] = [ShaperCandidate(ax, int(points[i, 0]), int(points[i, 1]), float(mean_energy[i]), int(counts[i])) for i in order]
+
+        return ranking
+
+    def recommend(self) -> Dict[str, ShaperCandidate]:
+        """
+        :return: for each moved axis, the grid point with the least residual energy
+        """
+        return {ax: candidates[0] for ax, candidates in self.rank().items()}
@@ -0,0 +1,142 @@
+import logging
+import os
+from typing import Dict, List, Tuple, Optional
+
+import numpy as np
+
+from py3dpaxxel.storage.file_filter import FileSelector
+from py3dpaxxel.storage.filename import timestamp_from_args
+from py3dpaxxel.storage.filename_meta import FilenameMetaFft
+from py3dpaxxel.storage.spectrum_file import SpectrumFile
+
+
+class SweepSpectra:
+    """
+    Decomposed spectra of many streams with columnar metadata.
+
+    All spectra share the same frequency grid, the i-th entry of each metadata array belongs to `magnitude[i]`.
+    """
+
+    AXIS = ("x", "y", "z")
+    "order of the measured axis in :attr:`magnitude`"
+
+    def __init__(self) -> None:
+        self.frequency_hz: np.ndarray = np.zeros(0)
+        "frequency bins, shape `(bins,)`"
+        self.magnitude: np.ndarray = np.zeros((0, 3, 0))
+        "magnitude of measured x, y, z, shape `(streams, 3, bins)`"
+        self.run_hash: np.ndarray = np.zeros(0, dtype=object)
+        self.stream_hash: np.ndarray = np.zeros(0, dtype=object)
+        self.timestamp: np.ndarray = np.zeros(0, dtype="<U18")
+        "recording time from the file name, i.e. \"20231110-182030456\" (sortable)"
+        self.sequence_nr: np.ndarray = np.zeros(0, dtype=int)
+        self.sequence_axis: np.ndarray = np.zeros(0, dtype="<U1")
+        "axis the printer moved along"
+        self.sequence_frequency_hz: np.ndarray = np.zeros(0, dtype=int)
+        "input shaper frequency (M593 F)"
+        self.sequence_zeta_em2: np.ndarray = np.zeros(0, dtype=int)
+        "input shaper damping (M593 D) times 100"
+
+    def __len__(self) -> int:
+        return self.magnitude.shape[0]
+
+    def select(self, selected: np.ndarray) -> "SweepSpectra":
+        """
+        :param selected: boolean mask or indices of streams
+        :return: subset of streams
+        """
+        subset = SweepSpectra()
+        subset.frequency_hz = self.frequency_hz
+        subset.magnitude = self.magnitude[selected]
+        subset.run_hash = self.run_hash[selected]
+        subset.stream_hash = self.stream_hash[selected]
+        subset.timestamp = self.timestamp[selected]
+        subset.sequence_nr = self.sequence_nr[selected]
+        subset.sequence_axis = self.sequence_axis[selected]
+        subset.sequence_frequency_hz = self.sequence_frequency_hz[selected]
+        subset.sequence_zeta_em2 = self.sequence_zeta_em2[selected]
+        return subset
+
+
+class SpectraLoader:
+    """
+    Loads decomposed spectra (see :class:`py3dpaxxel.data_decomposition.decompose_runner.DataDecomposeRunner`) into one :class:`SweepSpectra`.
+
+    Supports per-axis text files (`*-[xyz].tsv`) and binary files containing all axis (`*-xyz.npz`).
+    Text files of the same stream are merged into one entry.
+    """
+
+    def __init__(self, input_dir: str, input_file_prefix: str, run_hash: Optional[str] = None) -> None:
+        """
+
+        :param input_dir: directory containing decomposed spectra
+        :param input_file_prefix: prefix of decomposed spectra files, i.e. "fft"
+        :param run_hash: load only spectra of this run (series), None loads all
+        """
+        self.input_dir: str = input_dir
+        self.input_file_prefix: str = input_file_prefix
+        self.run_hash: Optional[str] = run_hash
+
+    @staticmethod
+    def _load_text(filename: str) -> Tuple[np.ndarray, np.ndarray]:
+        table = np.loadtxt(filename, skiprows=1, ndmin=2)
+        return table[:, 0], table[:, 1]
+
+    def load(self) -> SweepSpectra:
+        """
+        Loads all selected spectra.
+
+        :return: spectra of all streams, spectra with deviating frequency grid are interpolated onto the grid of the first stream
+        """
+        run_filter = f"-{self.run_hash}" if self.run_hash is not None else ""
+        fs = FileSelector(os.path.join(self.input_dir, self.input_file_prefix) + run_filter + r"-.*-[xyz]{1,3}\.(tsv|npz)$")
+        files = fs.filter()
+        logging.info(f"selected {len(files)} spectra files from {fs.directory} (filter: {fs.filename})")
+
+        streams: Dict[Tuple, Tuple[FilenameMetaFft, Dict[str, Tuple[np.ndarray, np.ndarray]]]] = {}
+        for file in files:
+            meta = FilenameMetaFft().from_filename(file.filename_ext)
+            if self.run_hash is not None and meta.run_hash != self.run_hash:
+                continue
+            key = (meta.prefix, meta.run_hash, meta.stream_hash, meta.sequence_nr, meta.sequence_axis, meta.sequence_frequency_hz, meta.sequence_zeta_em2)
+            _meta, axis = streams.setdefault(key, (meta, {}))
+
+            if meta.file_extension == SpectrumFile.EXTENSION:
+                spectrum, header = SpectrumFile.load(file.full_path)
+                columns: List[str] = header.get("columns", list(SpectrumFile.COLUMNS))
+                if not all([ax in columns for ax in SweepSpectra.AXIS]):
+                    logging.warning(f"skip spectrum without x, y, z magnitude columns: {file.filename_ext}")
+                    continue
+                for ax in SweepSpectra.AXIS:
+                    axis[ax] = (spectrum[:, 0], spectrum[:, columns.index(ax)])
+            else:
+                axis[meta.fft_axis] = self._load_text(file.full_path)
+
+        complete = [(meta, axis) for meta, axis in streams.values() if all([ax in axis for ax in SweepSpectra.AXIS])]
+        if len(complete) < len(streams):
+            logging.warning(f"skip {len(streams) - len(complete)} streams with incomplete x, y, z spectra")
+
+        spectra = SweepSpectra()
+        if 0 == len(complete):
+            return spectra
+
+        spectra.frequency_hz = complete[0][1]["x"][0]
+        spectra.magnitude = np.empty((len(complete), 3, len(spectra.frequency_hz)), dtype=np.float32)
+        for i, (_meta, axis) in enumerate(complete):
+            for j, ax in enumerate(SweepSpectra.AXIS):
+                frequency_hz, magnitude = axis[ax]
+                if len(frequency_hz) == len(spectra.frequency_hz) and np.allclose(frequency_hz, spectra.frequency_hz):
+                    spectra.magnitude[i, j] = magnitude
+                else:
+                    spectra.magnitude[i, j] = np.interp(spectra.frequency_hz, frequency_hz, magnitude)
+
+        metas = [meta for meta, _axis in complete]
+        spectra.run_hash = np.array([m.run_hash for m in metas], dtype=object)
+        spectra.stream_hash = np.array([m.stream_hash for m in metas], dtype=object)
+        spectra.timestamp = np.array([timestamp_from_args(m.year, m.month, m.day, m.hour, m.minute, m.second, m.milli_second) for m in metas],
+                                     dtype="<U18")
+        spectra.sequence_nr = np.array([m.sequence_nr for m in metas], dtype=int)
+        spectra.sequence_axis = np.array([m.sequence_axis for m in metas], dtype="<U1")
+        spectra.sequence_frequency_hz = np.array([m.sequence_frequency_hz for m in metas], dtype=int)
+        spectra.sequence_zeta_em2 = np.array([m.sequence_zeta_em2 for m in metas], dtype=int)
+        return spectra
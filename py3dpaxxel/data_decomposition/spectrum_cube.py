@@ -0,0 +1,144 @@
+import json
+import logging
+import struct
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from py3dpaxxel.data_decomposition.spectra_loader import SweepSpectra
+
+
+class SpectrumCube:
+    """
+    Dense N-D array of all decomposed spectra of one run (series).
+
+    Dimensions (see :attr:`DIMENSIONS`): moved axis × input shaper frequency × zeta × sequence × measured axis × frequency bin.
+    Grid points that were not recorded are `nan`.
+
+    The cube is stored as one file: a JSON header with the coordinate labels followed by the raw `float32` array,
+    thus it can be memory-mapped and sliced without reading the whole file.
+
+    Example:
+
+    .. code-block::
+
+        cube = SpectrumCube.load("cube-a81829a6.cube")
+        # heatmap of residual magnitude at 45Hz measured along x when moving x, averaged over sequences
+        heatmap = np.nanmean(cube.sel(axis="x", measured_axis="x")[..., cube.bin_index(45.0)], axis=-1)
+    """
+
+    EXTENSION = "cube"
+    MAGIC = b"3DPAXCUB"
+    "file signature"
+    ALIGNMENT = 64
+    "data block alignment in bytes"
+    DIMENSIONS = ("axis", "frequency_hz", "zeta_em2", "sequence", "measured_axis", "bin")
+
+    def __init__(self, data: np.ndarray, coordinates: Dict[str, List[Union[str, int, float]]], run_hash: Optional[str] = None) -> None:
+        """
+
+        :param data: array of shape according to the lengths of all coordinates in :attr:`DIMENSIONS`
+        :param coordinates: labels of each dimension, `bin` contains the frequencies in Hz
+        :param run_hash: run the spectra belong to
+        """
+        assert data.shape == tuple([len(coordinates[d]) for d in SpectrumCube.DIMENSIONS]), "shape does not match coordinates"
+        self.data: np.ndarray = data
+        self.coordinates: Dict[str, List[Union[str, int, float]]] = coordinates
+        self.run_hash: Optional[str] = run_hash
+
+    @staticmethod
+    def build(spectra: SweepSpectra, run_hash: Optional[str] = None) -> "SpectrumCube":
+        """
+        Scatters all spectra into the cube in one vectorized assignment.
+        Of spectra recorded again at the same grid point (i.e. resumed series, retries) the newest one is kept.
+
+        :param spectra: spectra of one run
+        :param run_hash: run the spectra belong to
+        :return: the cube
+        """
+        axis, axis_index = np.unique(spectra.sequence_axis, return_inverse=True)
+        frequency_hz, frequency_index = np.unique(spectra.sequence_frequency_hz, return_inverse=True)
+        zeta_em2, zeta_index = np.unique(spectra.sequence_zeta_em2, return_inverse=True)
+        sequence, sequence_index = np.unique(spectra.sequence_nr, return_inverse=True)
+
+        coordinates = {
+            "axis": [str(a) for a in axis],
+            "frequency_hz": [int(f) for f in frequency_hz],
+            "zeta_em2": [int(z) for z in zeta_em2],
+            "sequence": [int(s) for s in sequence],
+            "measured_axis": list(SweepSpectra.AXIS),
+            "bin": [float(f) for f in spectra.frequency_hz],
+        }
+
+        data = np.full(tuple([len(coordinates[d]) for d in SpectrumCube.DIMENSIONS]), np.nan, dtype=np.float32)
+        grid_index = np.ravel_multi_index((axis_index, frequency_index, zeta_index, sequence_index), data.shape[:4])
+        newest_first = np.argsort(spectra.timestamp, kind="stable")[::-1]
+        _grid_index, first = np.unique(grid_index[newest_first], return_index=True)
+        keep = newest_first[first]
+        if len(keep) < len(spectra):
+            logging.warning(f"{len(spectra) - len(keep)} spectra recorded again at the same grid point: keeping the newest")
+        data[axis_index[keep], frequency_index[keep], zeta_index[keep], sequence_index[keep]] = spectra.magnitude[keep]
+        return SpectrumCube(data, coordinates, run_hash)
+
+    def save(self, filename: str) -> None:
+        """
+        Writes header and data into one file.
+
+        :param filename: output file name
+        :return: None
+        """
+        header = json.dumps({
+            "run_hash": self.run_hash,
+            "dimensions": list(SpectrumCube.DIMENSIONS),
+            "shape": list(self.data.shape),
+            "dtype": "<f4",
+            "coordinates": self.coordinates,
+        }).encode("utf8")
+        prefix_len = len(SpectrumCube.MAGIC) + 4
+        padding = (-(prefix_len + len(header))) % SpectrumCube.ALIGNMENT
+
+        with open(filename, "wb") as f:
+            f.write(SpectrumCube.MAGIC)
+            f.write(struct.pack("<I", len(header) + padding))
+            f.write(header + b" " * padding)
+            f.write(np.ascontiguousarray(self.data, dtype="<f4").tobytes())
+
+    @staticmethod
+    def load(filename: str, mmap_mode: str = "r") -> "SpectrumCube":
+        """
+        Memory-maps a stored cube.
+
+        :param filename: input file name
+        :param mmap_mode: see :class:`numpy.memmap`, "r" for read-only
+        :return: the cube, its data is backed by the file
+        """
+        with open(filename, "rb") as f:
+            magic = f.read(len(SpectrumCube.MAGIC))
+            assert magic == SpectrumCube.MAGIC, f"not a spectrum cube file: {filename}"
+            header_len = struct.unpack("<I", f.read(4))[0]
+            header = json.loads(f.read(header_len).decode("utf8"))
+
+        data = np.memmap(filename, dtype=header["dtype"], mode=mmap_mode, offset=len(SpectrumCube.MAGIC) + 4 + header_len, shape=tuple(header["shape"]))
+        return SpectrumCube(data, header["coordinates"], header["run_hash"])
+
+    def index(self, dimension: str, label: Union[str, int, float]) -> int:
+        """
+        :return: index of a coordinate label within a dimension
+        """
+        return self.coordinates[dimension].index(label)
+
+    def bin_index(self, frequency_hz: float) -> int:
+        """
+        :return: index of the frequency bin nearest to `frequency_hz`
+        """
+        return int(np.argmin(np.abs(np.asarray(self.coordinates["bin"]) - frequency_hz)))
+
+    def sel(self, **labels: Union[str, int, float]) -> np.ndarray:
+        """
+        Selects by coordinate labels, i.e. `cube.sel(axis="x", zeta_em2=15)`.
+        Dimensions not given are kept entirely.
+
+        :return: view into :attr:`data`
+        """
+        assert all([d in SpectrumCube.DIMENSIONS for d in labels.keys()]), f"unknown dimension in {list(labels.keys())}"
+        return self.data[tuple([self.index(d, labels[d]) if d in labels else slice(None) for d in SpectrumCube.DIMENSIONS])]
@@ -0,0 +1,109 @@
+from typing import Tuple, Optional
+
+import numpy as np
+from scipy.integrate import cumulative_trapezoid
+from scipy.signal import detrend
+
+from py3dpaxxel.samples.samples import Samples
+
+
+class Trajectory:
+    """
+    Result of the double integration of an acceleration stream, all arrays have shape `(samples, 3)` for x, y, z.
+    """
+
+    def __init__(self) -> None:
+        self.timestamp_s: np.ndarray = np.zeros(0)
+        "time of each sample, shape `(samples,)`"
+        self.acceleration_mm_s2: np.ndarray = np.zeros((0, 3))
+        "bias corrected acceleration"
+        self.velocity_mm_s: np.ndarray = np.zeros((0, 3))
+        "drift corrected velocity"
+        self.position_mm: np.ndarray = np.zeros((0, 3))
+        "position relative to the first sample"
+        self.rest: np.ndarray = np.zeros(0, dtype=bool)
+        "true for samples where the sensor is considered at rest, shape `(samples,)`"
+
+
+class TrajectoryIntegrator:
+    """
+    Reconstructs velocity and position from an acceleration stream without per-sample Python loops.
+
+    - subtracts gravity (given or estimated as static level of the stream), samples are expected to be calibrated,
+      see :class:`py3dpaxxel.calibration.profile.CalibrationProfile`
+    - detects rest segments (low moving standard deviation and moving mean close to the static level)
+    - removes the acceleration bias by interpolating the residual acceleration in-between rest segments
+    - integrates by cumulative trapezoid
+    - removes velocity drift by forcing zero velocity at rest (linear interpolation in-between),
+      falls back to linear detrending if no rest segment was found
+    """
+
+    MG_TO_MM_S2 = 9.80665
+    "1mg = 9.80665mm/s^2"
+
+    def __init__(self,
+                 orientation_calibration_mg: Optional[Tuple[float, float, float]] = None,
+                 rest_window: int = 64,
+                 rest_threshold_mg: float = 20.0) -> None:
+        """
+
+        :param orientation_calibration_mg: static acceleration (gravity) subtracted from each sample,
+            None estimates it from the stream (median) assuming the orientation never changes
+        :param rest_window: number of samples of the moving standard deviation used for rest detection
+        :param rest_threshold_mg: samples with moving standard deviation and deviation of the moving mean
+            from the static level (median), both as norm over x, y, z, below are at rest
+        """
+        self.orientation_calibration_mg: Optional[np.ndarray] = None if orientation_calibration_mg is None else np.asarray(orientation_calibration_mg, dtype=np.float64)
+        self.rest_window: int = rest_window
+        self.rest_threshold_mg: float = rest_threshold_mg
+
+    @staticmethod
+    def _moving_mean_std(values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Centered moving mean and standard deviation along axis 0 by cumulative sums.
+        """
+        n = values.shape[0]
+        window = max(1, min(window, n))
+        padded = np.pad(values, ((window // 2, window - 1 - window // 2), (0, 0)), mode="edge")
+        c1 = np.concatenate((np.zeros((1, values.shape[1])), np.cumsum(padded, axis=0)))
+        c2 = np.concatenate((np.zeros((1, values.shape[1])), np.cumsum(padded * padded, axis=0)))
+        mean = (c1[window:window + n] - c1[:n]) / window
+        mean_sq = (c2[window:window + n] - c2[:n]) / window
+        return mean, np.sqrt(np.maximum(mean_sq - mean * mean, 0.0))
+
+    @staticmethod
+    def _interpolate_at_rest(timestamp_s: np.ndarray, values: np.ndarray, rest: np.ndarray) -> np.ndarray:
+        """
+        Linear interpolation (per column) of values seen at rest over the whole time span.
+        """
+        return np.column_stack([np.interp(timestamp_s, timestamp_s[rest], values[rest, i]) for i in range(values.shape[1])])
+
+    def integrate(self, samples: Samples) -> Trajectory:
+        """
+        :param samples: acceleration stream in mg
+        :return: reconstructed trajectory
+        """
+        trajectory = Trajectory()
+        trajectory.timestamp_s = np.asarray(samples.timestamp_ms, dtype=np.float64) / 1000.0
+        acceleration_mg = np.column_stack((samples.x, samples.y, samples.z)).astype(np.float64)
+        acceleration_mg -= np.median(acceleration_mg, axis=0) if self.orientation_calibration_mg is None else self.orientation_calibration_mg
+
+        moving_mean, moving_std = self._moving_mean_std(acceleration_mg, self.rest_window)
+        static_level = np.median(acceleration_mg, axis=0)
+        trajectory.rest = ((np.linalg.norm(moving_std, axis=1) < self.rest_threshold_mg)
+                           & (np.linalg.norm(moving_mean - static_level, axis=1) < self.rest_threshold_mg))
+        acceleration = acceleration_mg * TrajectoryIntegrator.MG_TO_MM_S2
+
+        if np.any(trajectory.rest):
+            acceleration -= self._interpolate_at_rest(trajectory.timestamp_s, acceleration, trajectory.rest)
+        trajectory.acceleration_mm_s2 = acceleration
+
+        velocity = cumulative_trapezoid(acceleration, trajectory.timestamp_s, axis=0, initial=0.0)
+        if np.any(trajectory.rest):
+            velocity -= self._interpolate_at_rest(trajectory.timestamp_s, velocity, trajectory.rest)
+        else:
+            velocity = detrend(velocity, axis=0, type="linear")
+        trajectory.velocity_mm_s = velocity
+
+        trajectory.position_mm = cumulative_trapezoid(velocity, trajectory.timestamp_s, axis=0, initial=0.0)
+        return trajectory
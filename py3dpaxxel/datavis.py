@@ -4,12 +4,10 @@ import argparse
 import sys
 from typing import Optional
 
-from py3dpaxxel.data_decomposition.datavis_algorithms import DataVisFftAlgorithms1D, DataVisFftAlgorithms2D, DataVisFftAlgorithms3D
-from py3dpaxxel.data_decomposition.datavis_runner import DataVisualizerRunner
+from py3dpaxxel.cli import args
+from py3dpaxxel.data_decomposition import algorithm_names
 from py3dpaxxel.log.setup import configure_logging
 
-configure_logging()
-
 
 def args_for_sphinx():
     return Args().parser
@@ -34,22 +32,22 @@ class Args:
             help="Performs FFT 1D algorithms: discrete 1D, discrete 1D with Blackman window or both.",
             type=str,
             nargs='?',
-            choices=["all"] + [k for k in DataVisFftAlgorithms1D().algorithms.keys()],
-            const=[k for k in DataVisFftAlgorithms1D().algorithms.keys()][0])
+            choices=["all", *algorithm_names.DATAVIS_FFT_1D],
+            const=algorithm_names.DATAVIS_FFT_1D[0])
         grp.add_argument(
             "-2", "--d2",
             help="FFT 2D algorithms: no algorithm implemented yet (TODO)",
             type=str,
             nargs='?',
-            choices=["all"] + [k for k in DataVisFftAlgorithms2D().algorithms.keys()],
-            const=[k for k in DataVisFftAlgorithms2D().algorithms.keys()][0])
+            choices=["all", *algorithm_names.DATAVIS_FFT_2D],
+            const=algorithm_names.DATAVIS_FFT_2D[0])
         grp.add_argument(
             "-3", "--d3",
-            help="FFT 3D algorithms: compute trajectory from acceleration. Requires offset, gain and orientation calibration.",
+            help="FFT 3D algorithms: compute trajectory from acceleration. Requires offset, gain and orientation calibration (see --calibration).",
             type=str,
             nargs='?',
-            choices=["all"] + [k for k in DataVisFftAlgorithms3D().algorithms.keys()],
-            const=[k for k in DataVisFftAlgorithms3D().algorithms.keys()][0])
+            choices=["all", *algorithm_names.DATAVIS_FFT_3D],
+            const=algorithm_names.DATAVIS_FFT_3D[0])
 
         sub_group = self.parser.add_argument_group(
             "Flags",
@@ -67,6 +65,22 @@ class Args:
             "-s", "--save",
             help="Saves plots as PNG format.",
             action="store_true")
+        sub_group.add_argument(
+            "-c", "--calibration",
+            help="Device calibration profile (JSON) applied to the samples before plotting, see calibrate.py.",
+            type=args.path_exists_and_is_file,
+            default=None)
+        sub_group.add_argument(
+            "-j", "--jobs",
+            help="Renders headless in batch mode with the given number of worker processes (requires --save without --plot, 0 renders sequentially).",
+            type=int,
+            default=0)
+        sub_group.add_argument(
+            "--decimation",
+            help="Reduces plotted points to the figure width: min-max envelope per pixel column, largest triangle three buckets or none.",
+            type=str,
+            choices=algorithm_names.PLOT_DECIMATION,
+            default=algorithm_names.PLOT_DECIMATION[0])
 
         self.args: Optional[argparse.Namespace] = None
 
@@ -79,6 +93,7 @@ class Runner:
 
     def __init__(self) -> None:
         self._cli_args: Args = Args().parse()
+        configure_logging()
 
     @property
     def args(self):
@@ -93,6 +108,10 @@ class Runner:
             self.parser.print_help()
             return 1
 
+        # heavy dependencies (numpy, scipy, matplotlib) are loaded only when a command runs
+        from py3dpaxxel.calibration.profile import CalibrationProfile
+        from py3dpaxxel.data_decomposition.datavis_runner import DataVisualizerRunner
+
         ret = DataVisualizerRunner(
             command=self.args.command,
             input_filename=self.args.file,
@@ -100,7 +119,10 @@ class Runner:
             algorithm_d2=self.args.d2,
             algorithm_d3=self.args.d3,
             output_save=self.args.save,
-            output_plot=self.args.plot).run()
+            output_plot=self.args.plot,
+            calibration=CalibrationProfile.from_file(self.args.calibration) if self.args.calibration else None,
+            num_workers=self.args.jobs,
+            decimation=self.args.decimation).run()
 
         if ret == -1:
             self.parser.print_help()
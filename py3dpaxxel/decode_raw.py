@@ -0,0 +1,127 @@
+#!/bin/env python3
+
+import argparse
+import logging
+import os
+import sys
+import time
+from typing import Optional
+
+from py3dpaxxel.cli import args
+from py3dpaxxel.controller.raw_capture import RawCapture
+from py3dpaxxel.log.setup import configure_logging
+from py3dpaxxel.storage.file_filter import FileSelector
+
+configure_logging()
+
+
+def args_for_sphinx():
+    return Args().parser
+
+
+class Args:
+    def __init__(self) -> None:
+        self.parser: argparse.ArgumentParser = argparse.ArgumentParser(
+            formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+            description="Decodes raw captures (see controller.py decode --raw) into stream files.")
+
+        sub_group = self.parser.add_argument_group(
+            "Input",
+            description="Raw captures to decode.")
+        sub_group.add_argument(
+            "-f", "--file",
+            help=f"Input file name or regexp-pattern. Examples: \"capture.{RawCapture.EXTENSION}\", \"data/.*\\.{RawCapture.EXTENSION}\"",
+            type=str,
+            default=f"./test_data/.*\\.{RawCapture.EXTENSION}$")
+
+        sub_group = self.parser.add_argument_group(
+            "Output",
+            description="Output arguments.")
+        sub_group.add_argument(
+            "--outdir",
+            help="Output path, defaults to the directory of each capture.",
+            type=args.path_exists_and_is_dir,
+            default=None)
+        sub_group.add_argument(
+            "--outformat",
+            help="One stream file (tsv) per stream, named like the capture (\"-<sequence>\" appended if a capture contains several streams), "
+                 "or appended to the sweep container (pxc) of the run hash (requires stream file names, see record_step_series.py).",
+            type=str,
+            choices=["tsv", "pxc"],
+            default="tsv")
+        sub_group.add_argument(
+            "--resilient",
+            help="Skips corrupted bytes and lost samples instead of failing, the gaps are stored in the stream metadata (see controller.py decode --resilient).",
+            action="store_true")
+        sub_group.add_argument(
+            "--clock",
+            help="Estimates the actual sample rate from the chunk reception times, stored in the stream metadata (see record_step.py --clock).",
+            action="store_true")
+
+        self.args: Optional[argparse.Namespace] = None
+
+    def parse(self) -> "Args":
+        self.args = self.parser.parse_args()
+        return self
+
+
+class Runner:
+
+    def __init__(self) -> None:
+        self._cli_args: Args = Args().parse()
+
+    @property
+    def args(self):
+        return self._cli_args.args
+
+    @property
+    def parser(self):
+        return self._cli_args.parser
+
+    def run(self) -> int:
+        # numpy is loaded only when decoding
+        from py3dpaxxel.controller.raw_decoder import RawCaptureDecoder
+        from py3dpaxxel.storage.filename_meta import FilenameMetaStream
+        from py3dpaxxel.storage.sweep_container import SweepContainer
+
+        files = FileSelector(self.args.file).filter()
+        if 0 == len(files):
+            logging.error(f"no raw capture matches {self.args.file}")
+            return 1
+
+        failed = 0
+        for file in files:
+            start = time.time()
+            try:
+                streams = RawCaptureDecoder(file.full_path, resilient=self.args.resilient, estimate_clock=self.args.clock).decode()
+            except Exception as e:
+                logging.error(f"{file.filename_ext}: decoding failed: {e}")
+                failed += 1
+                continue
+
+            out_dir = self.args.outdir if self.args.outdir is not None else file.directory
+            for stream in streams:
+                name = file.filename_no_ext if 1 == len(streams) else f"{file.filename_no_ext}-{stream.sequence:02}"
+                if "pxc" == self.args.outformat:
+                    try:
+                        meta = FilenameMetaStream().from_filename(f"{name}.tsv")
+                    except ValueError:
+                        logging.error(f"{file.filename_ext}: no stream file name, cannot assign a sweep container")
+                        failed += 1
+                        break
+                    container = SweepContainer(SweepContainer.filename_for(out_dir, meta.prefix, meta.run_hash))
+                    mg = stream.mg
+                    container.append(f"{name}.tsv", {"seq": [stream.sequence] * len(stream), "sample": stream.index,
+                                                     "x": mg[:, 0], "y": mg[:, 1], "z": mg[:, 2]}, stream.meta)
+                    logging.info(f"{file.filename_ext}: stream {stream.sequence} ({len(stream)} samples) appended to {container.filename}")
+                else:
+                    out_filename = os.path.join(out_dir, f"{name}.tsv")
+                    with open(out_filename, "w") as f:
+                        RawCaptureDecoder.write_tsv(stream, f)
+                    logging.info(f"{file.filename_ext}: stream {stream.sequence} ({len(stream)} samples) saved to {out_filename}")
+            logging.info(f"{file.filename_ext}: {len(streams)} streams decoded in {time.time() - start:.3f}s")
+        return 0 if 0 == failed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(Runner().run())
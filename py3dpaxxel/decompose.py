@@ -5,12 +5,9 @@ import sys
 from typing import Optional
 
 from py3dpaxxel.cli import args
-from py3dpaxxel.data_decomposition.decompose_algorithms import DecomposeFftAlgorithms1D
-from py3dpaxxel.data_decomposition.decompose_runner import DataDecomposeRunner
+from py3dpaxxel.data_decomposition import algorithm_names
 from py3dpaxxel.log.setup import configure_logging
 
-configure_logging()
-
 
 def args_for_sphinx():
     return Args().parser
@@ -35,8 +32,16 @@ class Args:
             help="Performs FFT 1D algorithms: discrete 1D, discrete 1D with Blackman window.",
             type=str,
             nargs='?',
-            choices=[k for k in DecomposeFftAlgorithms1D().algorithms.keys()],
-            const=[k for k in DecomposeFftAlgorithms1D().algorithms.keys()][0])
+            choices=algorithm_names.DECOMPOSE_FFT_1D,
+            const=algorithm_names.DECOMPOSE_FFT_1D[0])
+        grp.add_argument(
+            "-s", "--sequence",
+            help="Averages the power spectral density (PSD) over all sequence repetitions of a step (same run hash, axis, frequency and zeta) "
+                 "into one output file with mean and standard deviation per axis.",
+            type=str,
+            nargs='?',
+            choices=algorithm_names.DECOMPOSE_PSD_SEQUENCE,
+            const=algorithm_names.DECOMPOSE_PSD_SEQUENCE[0])
 
         sub_group = self.parser.add_argument_group(
             "Flags",
@@ -62,6 +67,17 @@ class Args:
             help="Prefix of output files.",
             type=str,
             default="fft")
+        sub_group.add_argument(
+            "--outformat",
+            help="Output file format: one text file per FFT axis (tsv) or one binary file per stream containing all axis (npz).",
+            type=str,
+            choices=["tsv", "npz"],
+            default="tsv")
+        sub_group.add_argument(
+            "--calibration",
+            help="Device calibration profile (JSON) applied to the samples before decomposition, see calibrate.py.",
+            type=args.path_exists_and_is_file,
+            default=None)
         sub_group.add_argument(
             "--force",
             help="Overwrite existing output files.",
@@ -78,6 +94,7 @@ class Runner:
 
     def __init__(self) -> None:
         self._cli_args: Args = Args().parse()
+        configure_logging()
 
     @property
     def args(self):
@@ -92,6 +109,10 @@ class Runner:
             self.parser.print_help()
             return 1
 
+        # heavy dependencies (numpy, scipy) are loaded only when a command runs
+        from py3dpaxxel.calibration.profile import CalibrationProfile
+        from py3dpaxxel.data_decomposition.decompose_runner import DataDecomposeRunner
+
         ret = DataDecomposeRunner(
             command=self.args.command,
             input_dir=self.args.indir,
@@ -99,7 +120,10 @@ class Runner:
             algorithm_d1=self.args.d1,
             output_dir=self.args.outdir,
             output_file_prefix=self.args.outfileprefix,
-            output_overwrite=self.args.force).run()
+            output_overwrite=self.args.force,
+            output_format=self.args.outformat,
+            algorithm_sequence=self.args.sequence,
+            calibration=CalibrationProfile.from_file(self.args.calibration) if self.args.calibration else None).run()
 
         if ret == -1:
             self.parser.print_help()
@@ -0,0 +1,166 @@
+import math
+import re
+from typing import Dict, List, Optional, Tuple
+
+AXIS = ("X", "Y", "Z")
+
+
+class MotionLimits:
+    """
+    Kinematic limits of the printer as used by the firmware planner.
+
+    Defaults are conservative values of common Marlin printers, configure them or query them (see :meth:`from_report`).
+    """
+
+    def __init__(self,
+                 max_feedrate_mm_s: Tuple[float, float, float] = (200.0, 200.0, 12.0),
+                 max_acceleration_mm_s2: Tuple[float, float, float] = (1000.0, 1000.0, 200.0),
+                 travel_acceleration_mm_s2: float = 1250.0,
+                 default_feedrate_mm_s: float = 25.0,
+                 homing_duration_s: float = 15.0) -> None:
+        """
+
+        :param max_feedrate_mm_s: maximum feedrate per axis (M203)
+        :param max_acceleration_mm_s2: maximum acceleration per axis (M201)
+        :param travel_acceleration_mm_s2: acceleration of moves (M204 T, or P if no T is reported)
+        :param default_feedrate_mm_s: feedrate of moves without F parameter before any F was given
+        :param homing_duration_s: assumed duration of auto homing (G28)
+        """
+        self.max_feedrate_mm_s: Dict[str, float] = dict(zip(AXIS, max_feedrate_mm_s))
+        self.max_acceleration_mm_s2: Dict[str, float] = dict(zip(AXIS, max_acceleration_mm_s2))
+        self.travel_acceleration_mm_s2: float = travel_acceleration_mm_s2
+        self.default_feedrate_mm_s: float = default_feedrate_mm_s
+        self.homing_duration_s: float = homing_duration_s
+
+    REPORT_REGEX = re.compile(r"\b(M20[134])\b((?:\s+[A-Z]-?[0-9.]+)+)")
+    PARAM_REGEX = re.compile(r"([A-Z])(-?[0-9.]+)")
+
+    @staticmethod
+    def from_report(lines: List[str], defaults: Optional["MotionLimits"] = None) -> "MotionLimits":
+        """
+        Parses limits from the firmware settings report (M503 response, i.e. `echo:  M203 X200.00 Y200.00 Z12.00 E120.00`).
+
+        :param lines: received lines
+        :param defaults: limits taken for values missing in the report
+        :return: limits
+        """
+        limits = defaults if defaults is not None else MotionLimits()
+        limits = MotionLimits(
+            tuple(limits.max_feedrate_mm_s[a] for a in AXIS),
+            tuple(limits.max_acceleration_mm_s2[a] for a in AXIS),
+            limits.travel_acceleration_mm_s2,
+            limits.default_feedrate_mm_s,
+            limits.homing_duration_s)
+
+        for line in lines:
+            for code, params in MotionLimits.REPORT_REGEX.findall(line):
+                values = {k: float(v) for k, v in MotionLimits.PARAM_REGEX.findall(params)}
+                if "M203" == code:
+                    limits.max_feedrate_mm_s.update({a: values[a] for a in AXIS if a in values})
+                elif "M201" == code:
+                    limits.max_acceleration_mm_s2.update({a: values[a] for a in AXIS if a in values})
+                elif "T" in values or "P" in values:
+                    limits.travel_acceleration_mm_s2 = values.get("T", values.get("P"))
+        return limits
+
+    def __str__(self) -> str:
+        return (f"max_feedrate_mm_s={self.max_feedrate_mm_s} max_acceleration_mm_s2={self.max_acceleration_mm_s2} "
+                f"travel_acceleration_mm_s2={self.travel_acceleration_mm_s2} default_feedrate_mm_s={self.default_feedrate_mm_s}")
+
+
+class MotionTimeEstimator:
+    """
+    Predicts how long the printer takes to execute G-Code, i.e. a trajectory generated by :class:`.CoplanarTrajectory`.
+
+    Each linear move (G0/G1) is modelled as trapezoidal velocity profile that starts and ends at rest, which is exact for
+    the forth and back steps (direction reversal) and conservative otherwise.
+    Feedrate and acceleration of a move are limited by the per-axis limits scaled to the share of the axis in the move.
+    Supported: G0/G1 (X, Y, Z, F), G4 (P, S), G28, G90/G91, M204 (T, P); other commands are assumed to take no time.
+    """
+
+    COMMAND_REGEX = re.compile(r"^\s*([GM][0-9]+)\b(.*)$", re.IGNORECASE)
+    PARAM_REGEX = re.compile(r"([A-Z])\s*(-?[0-9]*\.?[0-9]+)", re.IGNORECASE)
+
+    def __init__(self, limits: MotionLimits = MotionLimits(), home_xyz_mm: Tuple[float, float, float] = (0.0, 0.0, 0.0)) -> None:
+        """
+
+        :param limits: kinematic limits of the printer
+        :param home_xyz_mm: position after auto homing
+        """
+        self.limits: MotionLimits = limits
+        self.home_xyz_mm: Tuple[float, float, float] = home_xyz_mm
+
+    def move_duration_s(self, delta_xyz_mm: Tuple[float, float, float], feedrate_mm_s: float, acceleration_mm_s2: Optional[float] = None) -> float:
+        """
+        :param delta_xyz_mm: travel per axis
+        :param feedrate_mm_s: requested feedrate
+        :param acceleration_mm_s2: requested acceleration (M204), defaults to the travel acceleration of the limits
+        :return: duration of the move from rest to rest
+        """
+        length = math.sqrt(sum([d * d for d in delta_xyz_mm]))
+        if length <= 0.0:
+            return 0.0
+
+        velocity = feedrate_mm_s
+        acceleration = acceleration_mm_s2 if acceleration_mm_s2 is not None else self.limits.travel_acceleration_mm_s2
+        for a, d in zip(AXIS, delta_xyz_mm):
+            if d != 0.0:
+                share = abs(d) / length
+                velocity = min(velocity, self.limits.max_feedrate_mm_s[a] / share)
+                acceleration = min(acceleration, self.limits.max_acceleration_mm_s2[a] / share)
+
+        if length >= velocity * velocity / acceleration:
+            # trapezoid: accelerate, cruise, decelerate
+            return length / velocity + velocity / acceleration
+        # triangle: peak velocity not reached
+        return 2.0 * math.sqrt(length / acceleration)
+
+    def estimate(self, commands: List[str], start_xyz_mm: Optional[Tuple[float, float, float]] = None) -> float:
+        """
+        :param commands: G-Code commands
+        :param start_xyz_mm: position before the first command, the home position is assumed if None
+        :return: predicted duration in seconds
+        """
+        position = list(start_xyz_mm if start_xyz_mm is not None else self.home_xyz_mm)
+        feedrate_mm_s = self.limits.default_feedrate_mm_s
+        acceleration_mm_s2 = self.limits.travel_acceleration_mm_s2
+        relative = False
+        duration_s = 0.0
+
+        for command in commands:
+            match = MotionTimeEstimator.COMMAND_REGEX.match(command.split(";")[0])
+            if match is None:
+                continue
+            code = match.group(1).upper()
+            params = {k.upper(): float(v) for k, v in MotionTimeEstimator.PARAM_REGEX.findall(match.group(2))}
+
+            if code in ("G0", "G1", "G00", "G01"):
+                if "F" in params:
+                    feedrate_mm_s = params["F"] / 60.0
+                target = [(position[i] + params[a] if relative else params[a]) if a in params else position[i] for i, a in enumerate(AXIS)]
+                duration_s += self.move_duration_s((target[0] - position[0], target[1] - position[1], target[2] - position[2]), feedrate_mm_s, acceleration_mm_s2)
+                position = target
+            elif code in ("G4", "G04"):
+                duration_s += params.get("P", 0.0) / 1000.0 + params.get("S", 0.0)
+            elif code == "G28":
+                duration_s += self.limits.homing_duration_s
+                position = list(self.home_xyz_mm)
+            elif code == "M204" and ("T" in params or "P" in params):
+                acceleration_mm_s2 = params.get("T", params.get("P"))
+            elif code == "G90":
+                relative = False
+            elif code == "G91":
+                relative = True
+
+        return duration_s
+
+    def recording_time_s(self, commands: List[str], start_xyz_mm: Optional[Tuple[float, float, float]] = None,
+                         margin_factor: float = 0.1, margin_s: float = 0.3) -> float:
+        """
+        Recording time lapse that covers the predicted motion.
+
+        :param margin_factor: relative margin on top of the prediction
+        :param margin_s: absolute margin, covers transmission of the commands and the firmware planner lead time
+        :return: predicted duration including margins
+        """
+        return self.estimate(commands, start_xyz_mm) * (1.0 + margin_factor) + margin_s
@@ -48,3 +48,108 @@ class CoplanarTrajectory:
             commands.append(f"G1 {ax}{start_axis_mm}")
 
         return commands
+
+
+class ChirpCycle:
+    """
+    One forth and back cycle of a chirp.
+    """
+
+    def __init__(self, start_s: float, frequency_hz: float, acceleration_mm_s2: float, distance_mm: float) -> None:
+        self.start_s: float = start_s
+        "begin of the cycle relative to the first cycle"
+        self.frequency_hz: float = frequency_hz
+        "excitation frequency, the cycle lasts `1/frequency_hz`"
+        self.acceleration_mm_s2: float = acceleration_mm_s2
+        "commanded acceleration (M204 T)"
+        self.distance_mm: float = distance_mm
+        "travel of the forth (and back) move"
+
+    @property
+    def peak_velocity_mm_s(self) -> float:
+        return self.acceleration_mm_s2 * 0.25 / self.frequency_hz
+
+
+class ChirpTrajectory:
+    """
+    Generates a frequency sweep (chirp) as series of short forth and back moves in X, Y or Z direction.
+
+    Each move accelerates for a quarter period and decelerates for a quarter period (triangular velocity profile),
+    hence one forth and back cycle lasts one period of the excitation frequency.
+    The frequency rises linearly by `hz_per_s` from cycle to cycle, the acceleration scales with the frequency (`accel_per_hz_mm_s2`)
+    so the travel shrinks with rising frequency.
+    The frequency response is obtained from the single recording, see :class:`py3dpaxxel.data_decomposition.chirp_response.ChirpResponseAnalysis`.
+    """
+
+    @staticmethod
+    def schedule(fx_start_hz: float,
+                 fx_stop_hz: float,
+                 hz_per_s: float = 2.0,
+                 accel_per_hz_mm_s2: float = 75.0) -> List[ChirpCycle]:
+        """
+        :param fx_start_hz: first excitation frequency
+        :param fx_stop_hz: last excitation frequency
+        :param hz_per_s: sweep rate
+        :param accel_per_hz_mm_s2: commanded acceleration per Hz excitation frequency
+        :return: cycles of the chirp
+        """
+        assert 0.0 < fx_start_hz <= fx_stop_hz, f"invalid frequency range: {fx_start_hz}Hz..{fx_stop_hz}Hz"
+        assert 0.0 < hz_per_s, f"invalid sweep rate: {hz_per_s}Hz/s"
+
+        cycles: List[ChirpCycle] = []
+        start_s = 0.0
+        frequency_hz = fx_start_hz
+        while frequency_hz <= fx_stop_hz:
+            acceleration = float(round(accel_per_hz_mm_s2 * frequency_hz))
+            quarter_period_s = 0.25 / frequency_hz
+            cycles.append(ChirpCycle(start_s, frequency_hz, acceleration, acceleration * quarter_period_s * quarter_period_s))
+            start_s += 1.0 / frequency_hz
+            frequency_hz += hz_per_s / frequency_hz
+        return cycles
+
+    @staticmethod
+    def generate(axis: Literal["x", "y", "z"],
+                 start_xyz_mm: Tuple[int, int, int],
+                 fx_start_hz: float,
+                 fx_stop_hz: float,
+                 hz_per_s: float = 2.0,
+                 accel_per_hz_mm_s2: float = 75.0,
+                 go_to_start: bool = True,
+                 return_to_start: bool = True,
+                 auto_home=True) -> List[str]:
+        """
+        Generates a chirp in X, Y or Z direction starting at the start point, see :meth:`schedule`.
+
+        The printer must allow the commanded accelerations (M201) and peak velocities (M203),
+        the travel acceleration (M204 T) is changed by the trajectory and not restored.
+
+        :param axis: coplanar axis (X, Y or Z)
+        :param start_xyz_mm: trajectory start point
+        :param go_to_start: go to start position first before the chirp
+        :param return_to_start: return to start after the chirp
+        :param auto_home:
+        :return: list of G-Code commands
+        """
+        start_x_mm, start_y_mm, start_z_mm = start_xyz_mm
+        ax = axis.upper()
+        start_axis_mm = {"X": start_x_mm, "Y": start_y_mm, "Z": start_z_mm}[ax]
+
+        commands: List[str] = []
+
+        if auto_home:
+            commands.append("G28 O X Y Z")
+
+        if go_to_start:
+            commands.append(f"G1 X{start_x_mm} Y{start_y_mm} Z{start_z_mm}")
+
+        for cycle in ChirpTrajectory.schedule(fx_start_hz, fx_stop_hz, hz_per_s, accel_per_hz_mm_s2):
+            # feedrate above the peak velocity: the move is limited by acceleration only
+            feedrate_mm_min = int(cycle.peak_velocity_mm_s * 60.0) + 1
+            commands.append(f"M204 T{cycle.acceleration_mm_s2:.0f}")
+            commands.append(f"G1 {ax}{start_axis_mm + cycle.distance_mm:.3f} F{feedrate_mm_min}")
+            commands.append(f"G1 {ax}{start_axis_mm}")
+
+        if return_to_start:
+            commands.append(f"G1 {ax}{start_axis_mm}")
+
+        return commands
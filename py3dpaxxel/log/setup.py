@@ -1,8 +1,6 @@
 import logging.config
 import os
 
-import yaml
-
 
 def configure_logging() -> None:
     """
@@ -10,6 +8,8 @@ def configure_logging() -> None:
 
     :return: None
     """
+    import yaml
+
     with open(os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "logging.yaml"), "rt") as f:
         cfg = yaml.safe_load(f.read())
         logging.config.dictConfig(cfg)
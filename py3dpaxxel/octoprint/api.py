@@ -1,5 +1,5 @@
 from abc import ABCMeta, abstractmethod
-from typing import List
+from typing import List, Optional
 
 
 class OctoApi:
@@ -8,3 +8,47 @@ class OctoApi:
     @abstractmethod
     def send_commands(self, commands: List[str]) -> int:
         pass
+
+    @property
+    def supports_motion_finished(self) -> bool:
+        """
+        :return: True if :meth:`send_commands_and_wait` blocks until the printer finished all motion
+        """
+        return False
+
+    def prepare_motion_finished(self) -> bool:
+        """
+        Establishes what :meth:`send_commands_and_wait` depends on ahead of time (i.e. connections), hence before recording.
+
+        :return: True if :meth:`send_commands_and_wait` is able to wait until the printer finished all motion
+        """
+        return self.supports_motion_finished
+
+    def send_commands_and_wait(self, commands: List[str], timeout_s: float) -> int:
+        """
+        Sends commands and waits until the printer finished all motion (see :attr:`supports_motion_finished`).
+        The default implementation does not wait.
+
+        :param commands: list of G-Code commands to send
+        :param timeout_s: maximum time to wait for the printer
+        :return: 0 once the printer finished all motion, 1 if the commands were sent but not waited for (not supported or timeout),
+            -1 if sending the commands failed
+        """
+        return 1 if 0 == self.send_commands(commands) else -1
+
+    def query(self, commands: List[str], timeout_s: float) -> Optional[List[str]]:
+        """
+        Sends commands and collects the lines the printer answered.
+        The default implementation does not support reading back.
+
+        :param commands: list of G-Code commands to send, i.e. ["M503"]
+        :param timeout_s: maximum time to wait for the answer
+        :return: received lines, None if not supported, on error or timeout
+        """
+        return None
+
+    def close(self) -> None:
+        """
+        Releases connections held by the implementation, if any.
+        """
+        pass
@@ -0,0 +1,221 @@
+import json
+import logging
+import random
+import string
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from py3dpaxxel.octoprint.api import OctoApi
+
+
+class PrinterLogWatcher:
+    """
+    Watches the serial log of OctoPrint via the push API (SockJS, xhr-polling transport) in a background thread.
+
+    Callers register a token and get an event that is set once a received line (`Recv: ...`) contains the token.
+    """
+
+    def __init__(self, session: requests.Session, url: str, poll_timeout_s: float = 30.0) -> None:
+        """
+
+        :param session: authenticated session (API key)
+        :param url: OctoPrint base URL, i.e. "http://octopi.local:80"
+        :param poll_timeout_s: HTTP timeout of one long-polling request
+        """
+        self.session: requests.Session = session
+        self.url: str = url
+        self.poll_timeout_s: float = poll_timeout_s
+        server_id = f"{random.randint(0, 999):03}"
+        session_id = "".join(random.choices(string.ascii_lowercase + string.digits, k=8))
+        self.sockjs_url: str = f"{url}/sockjs/{server_id}/{session_id}"
+        self._tokens: Dict[str, Tuple[threading.Event, Optional[List[str]]]] = {}
+        self._lock: threading.Lock = threading.Lock()
+        self._stop: threading.Event = threading.Event()
+        self._connected: threading.Event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def expect(self, token: str, received_lines: Optional[List[str]] = None) -> threading.Event:
+        """
+        :param token: text to wait for in received serial lines
+        :param received_lines: if given, collects all received lines until the token was seen
+        :return: event set when the token was seen
+        """
+        with self._lock:
+            event, _lines = self._tokens.setdefault(token, (threading.Event(), received_lines))
+            return event
+
+    def _on_log_line(self, line: str) -> None:
+        if not line.startswith("Recv:"):
+            return
+        with self._lock:
+            for token, (event, received_lines) in list(self._tokens.items()):
+                if received_lines is not None:
+                    received_lines.append(line[len("Recv:"):].strip())
+                if token in line:
+                    logging.debug(f"printer log: token {token} seen")
+                    self._tokens.pop(token)
+                    event.set()
+
+    def _on_frame(self, frame: str) -> None:
+        if frame.startswith("o"):
+            self._connected.set()
+        elif frame.startswith("a"):
+            for message in json.loads(frame[1:]):
+                message = json.loads(message) if isinstance(message, str) else message
+                for line in message.get("current", {}).get("logs", []):
+                    self._on_log_line(line)
+        elif frame.startswith("c"):
+            logging.warning(f"printer log: push API closed the connection: {frame[1:]}")
+            self._stop.set()
+
+    def _authenticate(self) -> None:
+        response = self.session.post(f"{self.url}/api/login", json={"passive": True}, timeout=self.poll_timeout_s)
+        response.raise_for_status()
+        login = response.json()
+        auth = json.dumps({"auth": f"{login['name']}:{login['session']}"})
+        self.session.post(f"{self.sockjs_url}/xhr_send", data=json.dumps([auth]), timeout=self.poll_timeout_s).raise_for_status()
+
+    def _poll(self) -> None:
+        try:
+            while not self._stop.is_set():
+                response = self.session.post(f"{self.sockjs_url}/xhr", timeout=self.poll_timeout_s)
+                response.raise_for_status()
+                for frame in response.text.splitlines():
+                    first_connect = not self._connected.is_set()
+                    self._on_frame(frame)
+                    if first_connect and self._connected.is_set():
+                        self._authenticate()
+        except Exception as e:
+            logging.error(f"printer log: watcher stopped: {e}")
+            self._stop.set()
+
+    def start(self, connect_timeout_s: float = 5.0) -> bool:
+        """
+        :return: True if the push API connection was established in time
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(name="octoprint_log_watcher", target=self._poll, daemon=True)
+        self._thread.start()
+        return self._connected.wait(connect_timeout_s)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and not self._stop.is_set()
+
+
+class OctoPooledApi(OctoApi):
+    """
+    Sends G-Code commands to OctoPrint by REST API over one pooled, retrying HTTP session. Requires API key.
+
+    Supports motion-complete synchronization: a completion marker (`M400` to wait for all moves to finish, then `M118` echoing a unique token)
+    is appended to the commands and the serial log is watched (see :class:`PrinterLogWatcher`) until the token comes back.
+    """
+
+    MARKER_PREFIX = "py3dpaxxel-done-"
+
+    def __init__(self, api_key: str, address: str, port: int, do_dry_run: bool, pool_size: int = 4, retries: int = 3) -> None:
+        """
+
+        :param api_key: API key do authenticate at OctoPrint
+        :param address: OctoPrint IP-Address
+        :param port: OctoPrint API port number
+        :param do_dry_run: it true, will not attempt to send G-Code but only print in logs
+        :param pool_size: number of kept-alive connections
+        :param retries: retries on failed connection attempts (requests are never re-sent once transmitted to not duplicate motion)
+        """
+        self.url: str = f"http://{address}:{port}"
+        self.do_dry_run: bool = do_dry_run
+        self.session: requests.Session = requests.Session()
+        self.session.headers.update({'X-Api-Key': api_key, 'Content-Type': 'application/json'})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                              max_retries=Retry(total=retries, connect=retries, read=0, status=0, backoff_factor=0.2, allowed_methods=None))
+        self.session.mount("http://", adapter)
+        self.watcher: Optional[PrinterLogWatcher] = None
+
+    @staticmethod
+    def completion_marker(token: str) -> List[str]:
+        """
+        :return: commands that echo the token once all previous moves are finished
+        """
+        return ["M400", f"M118 {OctoPooledApi.MARKER_PREFIX}{token}"]
+
+    def send_commands(self, commands: List[str]) -> int:
+        """
+        Sent commands to Octoprint.
+
+        :param commands: list of G-Code commands to send
+        :return: 0 in case OctoPrint returned 204 (no error)
+        """
+        api_url = f"{self.url}/api/printer/command"
+
+        logging.debug(f"sending {commands} to {api_url}")
+        if not self.do_dry_run:
+            response = self.session.post(api_url, json={"commands": commands})
+            logging.debug(response)
+            return 0 if 204 == response.status_code else -1
+        else:
+            return 0
+
+    @property
+    def supports_motion_finished(self) -> bool:
+        return True
+
+    def prepare_motion_finished(self) -> bool:
+        return self.do_dry_run or self._ensure_watcher()
+
+    def _ensure_watcher(self) -> bool:
+        if self.watcher is None or not self.watcher.is_running:
+            self.watcher = PrinterLogWatcher(self.session, self.url)
+            if not self.watcher.start():
+                logging.error("printer log: failed to connect to push API")
+                return False
+        return True
+
+    def send_commands_and_wait(self, commands: List[str], timeout_s: float) -> int:
+        if self.do_dry_run:
+            return self.send_commands(commands)
+        if not self._ensure_watcher():
+            logging.warning("printer log: not waiting for the motion to finish")
+            return 1 if 0 == self.send_commands(commands) else -1
+
+        token = f"{uuid.uuid4().time_low:x}"
+        motion_finished = self.watcher.expect(f"{OctoPooledApi.MARKER_PREFIX}{token}")
+        start = time.time()
+        if 0 != self.send_commands(commands + OctoPooledApi.completion_marker(token)):
+            return -1
+        if not motion_finished.wait(timeout_s):
+            logging.warning(f"motion not finished within {timeout_s}s")
+            return 1
+        logging.debug(f"motion finished after {time.time() - start:.3f}s")
+        return 0
+
+    def query(self, commands: List[str], timeout_s: float) -> Optional[List[str]]:
+        if self.do_dry_run:
+            return None
+        if not self._ensure_watcher():
+            return None
+
+        token = f"{uuid.uuid4().time_low:x}"
+        received_lines: List[str] = []
+        answered = self.watcher.expect(f"{OctoPooledApi.MARKER_PREFIX}{token}", received_lines)
+        if 0 != self.send_commands(commands + [f"M118 {OctoPooledApi.MARKER_PREFIX}{token}"]):
+            return None
+        if not answered.wait(timeout_s):
+            logging.warning(f"no answer to {commands} within {timeout_s}s")
+            return None
+        return received_lines
+
+    def close(self) -> None:
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        self.session.close()
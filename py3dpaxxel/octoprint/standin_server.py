@@ -0,0 +1,178 @@
+#!/bin/env python3
+
+import argparse
+import json
+import logging
+import queue
+import re
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List, Optional
+
+
+class OctoPrintStandIn:
+    """
+    Minimal local stand-in for the parts of the OctoPrint API used by this package (for tests and dry runs without printer).
+
+    - `POST /api/printer/command`: queues G-Code, answers 204
+    - `POST /api/login` (passive): returns user name and session
+    - `POST /sockjs/<server>/<session>/xhr` and `xhr_send`: push API via SockJS xhr-polling transport
+
+    Queued commands are "executed" one by one: each move (G0/G1/G28) takes `move_duration_s`,
+    `M118 <text>` is echoed as `Recv: <text>` in the serial log once all previous commands are done,
+    `M503` answers with :attr:`settings_report`.
+
+    Example:
+
+    .. code-block::
+
+        with OctoPrintStandIn() as standin:
+            api = OctoPooledApi("key", "127.0.0.1", standin.port, do_dry_run=False)
+            api.send_commands_and_wait(["G1 X10"], timeout_s=5.0)
+    """
+
+    MOVE_REGEX = re.compile(r"^(G0|G1|G28)\b", re.IGNORECASE)
+
+    def __init__(self, address: str = "127.0.0.1", port: int = 0, move_duration_s: float = 0.05, poll_timeout_s: float = 1.0) -> None:
+        """
+
+        :param address: address to bind
+        :param port: port to bind, 0 selects a free port
+        :param move_duration_s: simulated duration of each move command
+        :param poll_timeout_s: how long a long-polling request is held open without news (then answered with heartbeat)
+        """
+        self.move_duration_s: float = move_duration_s
+        self.poll_timeout_s: float = poll_timeout_s
+        self.received_commands: List[str] = []
+        "all commands received so far"
+        self.settings_report: List[str] = [
+            "echo:  M203 X200.00 Y200.00 Z12.00 E120.00",
+            "echo:  M201 X1000.00 Y1000.00 Z200.00 E5000.00",
+            "echo:  M204 P1250.00 R1250.00 T1250.00",
+        ]
+        "lines answered to M503"
+        self._commands: queue.Queue = queue.Queue()
+        self._sessions: Dict[str, queue.Queue] = {}
+        self._sessions_lock: threading.Lock = threading.Lock()
+        self._stop: threading.Event = threading.Event()
+        self._server: ThreadingHTTPServer = ThreadingHTTPServer((address, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def _publish_log(self, lines: List[str]) -> None:
+        frame = "a" + json.dumps([json.dumps({"current": {"logs": lines}})])
+        with self._sessions_lock:
+            for messages in self._sessions.values():
+                messages.put(frame)
+
+    def _execute(self) -> None:
+        while not self._stop.is_set():
+            try:
+                command: str = self._commands.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            lines = [f"Send: {command}"]
+            if OctoPrintStandIn.MOVE_REGEX.match(command):
+                time.sleep(self.move_duration_s)
+            if command.upper().startswith("M503"):
+                lines.extend([f"Recv: {line}" for line in self.settings_report])
+            if command.upper().startswith("M118 "):
+                lines.append(f"Recv: {command[5:].strip()}")
+            lines.append("Recv: ok")
+            self._publish_log(lines)
+
+    def _handler_class(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, fmt, *args) -> None:
+                logging.debug(f"standin: {fmt % args}")
+
+            def _reply(self, status: int, body: Optional[str] = None, content_type: str = "application/json") -> None:
+                data = body.encode("utf8") if body is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _body(self) -> str:
+                length = int(self.headers.get("Content-Length", 0))
+                return self.rfile.read(length).decode("utf8") if length > 0 else ""
+
+            def do_POST(self) -> None:
+                body = self._body()
+                if self.path == "/api/printer/command":
+                    commands = json.loads(body).get("commands", [])
+                    standin.received_commands.extend(commands)
+                    for command in commands:
+                        standin._commands.put(command)
+                    self._reply(204)
+                elif self.path == "/api/login":
+                    self._reply(200, json.dumps({"name": "standin", "session": "standin-session"}))
+                elif self.path.startswith("/sockjs/") and self.path.endswith("/xhr"):
+                    session_id = self.path.split("/")[3]
+                    with standin._sessions_lock:
+                        messages = standin._sessions.get(session_id)
+                        if messages is None:
+                            standin._sessions[session_id] = queue.Queue()
+                    if messages is None:
+                        self._reply(200, "o\n", "application/javascript")
+                        return
+                    try:
+                        frames = [messages.get(timeout=standin.poll_timeout_s)]
+                        while not messages.empty():
+                            frames.append(messages.get_nowait())
+                    except queue.Empty:
+                        frames = ["h"]
+                    self._reply(200, "\n".join(frames) + "\n", "application/javascript")
+                elif self.path.startswith("/sockjs/") and self.path.endswith("/xhr_send"):
+                    self._reply(204)
+                else:
+                    self._reply(404, json.dumps({"error": "not found"}))
+
+        return Handler
+
+    def start(self) -> "OctoPrintStandIn":
+        self._stop.clear()
+        self._threads = [threading.Thread(name="standin_http", target=self._server.serve_forever, daemon=True),
+                         threading.Thread(name="standin_printer", target=self._execute, daemon=True)]
+        for t in self._threads:
+            t.start()
+        logging.info(f"OctoPrint stand-in listening on {self._server.server_address[0]}:{self.port}")
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "OctoPrintStandIn":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+        description="Runs a local OctoPrint stand-in (printer command, login and push API) for testing without printer.")
+    parser.add_argument("--address", help="Address to bind.", type=str, default="127.0.0.1")
+    parser.add_argument("--port", help="Port to bind.", type=int, default=5000)
+    parser.add_argument("--moveduration", help="Simulated duration of each move in seconds.", type=float, default=0.05)
+    cli_args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    server = OctoPrintStandIn(cli_args.address, cli_args.port, cli_args.moveduration).start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+    sys.exit(0)
@@ -0,0 +1,296 @@
+#!/bin/env python3
+
+import argparse
+import logging
+import sys
+import uuid
+from typing import List, Optional
+
+from py3dpaxxel.cli import args
+from py3dpaxxel.controller.constants import OutputDataRate
+from py3dpaxxel.gcode.motion_estimator import MotionLimits, MotionTimeEstimator
+from py3dpaxxel.log.setup import configure_logging
+from py3dpaxxel.octoprint.api import OctoApi
+from py3dpaxxel.octoprint.pooled_api import OctoPooledApi
+from py3dpaxxel.octoprint.remote_api import OctoRemoteApi
+from py3dpaxxel.sampling_tasks.farm_scheduler import FarmPrinter, FarmSweep, PrinterFarmScheduler
+from py3dpaxxel.sampling_tasks.series_argument_generator import RunArgsGenerator
+
+configure_logging()
+
+
+def args_for_sphinx():
+    return Args().parser
+
+
+class Args:
+    def __init__(self) -> None:
+        self.parser: argparse.ArgumentParser = argparse.ArgumentParser(
+            formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+            description="Records series of recording-steps on several printers concurrently (printer farm), "
+                        "each printer with its own OctoPrint instance and controller.")
+
+        sub_group = self.parser.add_argument_group(
+            "Farm",
+            description="Printers of the farm.")
+        sub_group.add_argument(
+            "--printer",
+            help="Printer as \"address:port,device[,key]\": OctoPrint address and port, controller serial device and OctoPrint API key "
+                 "(defaults to --key). Repeat for each printer.",
+            type=args.convert_printer_from_str,
+            action="append",
+            default=[])
+        sub_group.add_argument(
+            "--key",
+            help="OctoPrint API key of printers without key.",
+            type=str,
+            default="")
+        sub_group.add_argument(
+            "--waitmotion",
+            help="Keeps one pooled connection per printer, waits until the printer finished all moves and stops sampling right then.",
+            action="store_true")
+        sub_group.add_argument(
+            "--emulate",
+            help="Adds this many emulated printers: a local OctoPrint stand-in and an emulated controller each (for testing without hardware).",
+            type=int,
+            default=0)
+        sub_group.add_argument(
+            "--attempts",
+            help="How often a run is recorded at most (on any printer) until it is given up.",
+            type=int,
+            default=2)
+        sub_group.add_argument(
+            "--maxfailures",
+            help="Failed recordings in a row until a printer is retired.",
+            type=int,
+            default=3)
+
+        sub_group = self.parser.add_argument_group(
+            "Trajectory",
+            description="Trajectory settings")
+        sub_group.add_argument(
+            "--axis",
+            help="Axis to move.",
+            type=str,
+            choices=["x", "y", "z", "xy", "xz", "yz", "xyz"],
+            default="x")
+        sub_group.add_argument(
+            "--start",
+            help="Start pont in mm to begin trajectory at.",
+            type=args.convert_xyz_pos_from_str,
+            default="\"200,140,20\"")
+        sub_group.add_argument(
+            "--distance",
+            help="Distance in mm to travel back and forth.",
+            type=int,
+            default=20)
+        sub_group.add_argument(
+            "--stepcount",
+            help="Repeat travel back and forth (steps) stepcount-times.",
+            type=int,
+            default=2)
+
+        sub_group = self.parser.add_argument_group(
+            "Task",
+            description="Capturing task repetitions with different parameters")
+        sub_group.add_argument(
+            "--sweeps",
+            help="Number of sweeps to distribute, each sweep records the whole grid with its own run hash and manifest.",
+            type=int,
+            default=1)
+        sub_group.add_argument(
+            "--sequencecount",
+            help="Repeats steps sequencecount-times.",
+            type=int,
+            default=1)
+        sub_group.add_argument(
+            "--fxstart",
+            help="Start frequency in Hz. See https://marlinfw.org/docs/gcode/M593.html",
+            type=args.assert_uint16,
+            default="10")
+        sub_group.add_argument(
+            "--fxstop",
+            help="Start frequency in Hz.",
+            type=args.assert_uint16,
+            default="80")
+        sub_group.add_argument(
+            "--fxstep",
+            help="Frequency increment in Hz.",
+            type=args.assert_uint16,
+            default=10)
+        sub_group.add_argument(
+            "--zetastart",
+            help="Zeta damping factor (times 100). See https://marlinfw.org/docs/gcode/M593.html",
+            type=args.assert_uint_0_100,
+            default=0)
+        sub_group.add_argument(
+            "--zetastop",
+            help="Zeta damping factor (times 100).",
+            type=args.assert_uint_0_100,
+            default=25)
+        sub_group.add_argument(
+            "--zetastep",
+            help="Zeta damping factor increment (times 100).",
+            type=args.assert_uint_0_100,
+            default=5)
+
+        sub_group = self.parser.add_argument_group(
+            "Controller",
+            description="Acceleration microcontroller arguments.")
+        sub_group.add_argument(
+            "--outputdatarate",
+            help="Set specified sampling rate before sending G-Code.",
+            choices=[e.name for e in OutputDataRate],
+            default=OutputDataRate.ODR3200.name)
+        sub_group.add_argument(
+            "--timelapse",
+            help="Timespan to record captured samples in seconds.",
+            type=float,
+            default=1.0)
+
+        sub_group = self.parser.add_argument_group(
+            "Motion estimation",
+            description="Sizes the recording to the predicted duration of the trajectory.")
+        sub_group.add_argument(
+            "--autotimelapse",
+            help="Derives the recording time from the generated G-Code and the motion limits (replaces --timelapse).",
+            action="store_true")
+        sub_group.add_argument(
+            "--maxfeedrate",
+            help="Maximum feedrate per axis in mm/s (M203).",
+            type=args.convert_xyz_float_from_str,
+            default="\"200,200,12\"")
+        sub_group.add_argument(
+            "--maxacceleration",
+            help="Maximum acceleration per axis in mm/s^2 (M201).",
+            type=args.convert_xyz_float_from_str,
+            default="\"1000,1000,200\"")
+        sub_group.add_argument(
+            "--acceleration",
+            help="Travel acceleration in mm/s^2 (M204 T).",
+            type=float,
+            default=1250.0)
+        sub_group.add_argument(
+            "--feedrate",
+            help="Feedrate in mm/s of moves without F parameter.",
+            type=float,
+            default=25.0)
+        sub_group.add_argument(
+            "--homingduration",
+            help="Assumed duration of auto homing in seconds.",
+            type=float,
+            default=15.0)
+
+        sub_group = self.parser.add_argument_group(
+            "Output",
+            description="Output arguments.")
+        sub_group.add_argument(
+            "--timeout",
+            help="Duration in seconds the script waits until data is received (left unset or 0.0 waits forever). Raises exception otherwise.",
+            type=float,
+            default=0.0)
+        sub_group.add_argument(
+            "--dryrun",
+            help="Pretends to run but does not invoke either Octoprint nor controller.",
+            action="store_true")
+        sub_group.add_argument(
+            "--fileprefix",
+            help="Specify prefix of output file (<prefix>-<run>-<timestamp>.tsv)",
+            type=str,
+            default="octo-capture")
+        sub_group.add_argument(
+            "--directory",
+            help="Output path of streams, sweep manifests and the farm catalog (farm-<hash>.jsonl).",
+            type=args.path_exists_and_is_dir,
+            default="./test_data/")
+
+        self.args: Optional[argparse.Namespace] = None
+
+    def parse(self) -> "Args":
+        self.args = self.parser.parse_args()
+        return self
+
+
+class Runner:
+
+    def __init__(self) -> None:
+        self._cli_args: Args = Args().parse()
+
+    @property
+    def args(self):
+        return self._cli_args.args
+
+    @property
+    def parser(self):
+        return self._cli_args.parser
+
+    def _octo_api(self, address: str, port: int, key: str) -> OctoApi:
+        if self.args.waitmotion:
+            return OctoPooledApi(key, address, port, self.args.dryrun)
+        return OctoRemoteApi(key, address, port, self.args.dryrun)
+
+    def run(self) -> int:
+        emulated = []
+        printers: List[FarmPrinter] = []
+        for address, port, device, key in self.args.printer:
+            printers.append(FarmPrinter(f"{address}:{port}", self._octo_api(address, port, key if key is not None else self.args.key), device))
+
+        if self.args.emulate > 0:
+            # emulators are loaded on demand only, they are not needed with real printers
+            from py3dpaxxel.controller.emulator import ControllerEmulator
+            from py3dpaxxel.octoprint.standin_server import OctoPrintStandIn
+            for i in range(self.args.emulate):
+                standin = OctoPrintStandIn().start()
+                emulator = ControllerEmulator(OutputDataRate[self.args.outputdatarate]).start()
+                emulated.extend([standin, emulator])
+                printers.append(FarmPrinter(f"emulated-{i}", self._octo_api("127.0.0.1", standin.port, "emulated"), emulator.device))
+
+        if 0 == len(printers):
+            logging.error("no printer given")
+            self.parser.print_help()
+            return -1
+
+        sweeps = [FarmSweep(
+            RunArgsGenerator(
+                sequence_repeat_count=self.args.sequencecount,
+                fx_start_hz=self.args.fxstart,
+                fx_stop_hz=self.args.fxstop,
+                fx_step_hz=self.args.fxstep,
+                zeta_start_em2=self.args.zetastart,
+                zeta_stop_em2=self.args.zetastop,
+                zeta_step_em2=self.args.zetastep,
+                axis=args.convert_axis_from_str(self.args.axis),
+                out_file_prefix_1=self.args.fileprefix,
+                out_file_prefix_2=f"{uuid.uuid1().time_low:x}"),  # each sweep shall have a pseudo UUID appended to prefix_1
+            gcode_start_point_mm=self.args.start,
+            gcode_distance_mm=self.args.distance,
+            gcode_step_repeat_count=self.args.stepcount) for _ in range(self.args.sweeps)]
+
+        motion_estimator = None
+        if self.args.autotimelapse:
+            limits = MotionLimits(self.args.maxfeedrate, self.args.maxacceleration, self.args.acceleration, self.args.feedrate, self.args.homingduration)
+            logging.info(f"motion limits: {limits}")
+            motion_estimator = MotionTimeEstimator(limits)
+
+        try:
+            return PrinterFarmScheduler(
+                printers=printers,
+                sweeps=sweeps,
+                controller_record_timelapse_s=self.args.timelapse,
+                controller_decode_timeout_s=self.args.timeout,
+                sensor_odr=OutputDataRate[self.args.outputdatarate],
+                output_dir=self.args.directory,
+                do_dry_run=self.args.dryrun,
+                stop_on_motion_finished=self.args.waitmotion,
+                motion_estimator=motion_estimator,
+                max_attempts=self.args.attempts,
+                max_consecutive_failures=self.args.maxfailures)()
+        finally:
+            for p in printers:
+                p.octoprint_api.close()
+            for e in emulated:
+                e.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(Runner().run())
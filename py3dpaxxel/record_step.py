@@ -1,13 +1,21 @@
 #!/bin/env python3
 
 import argparse
+import logging
 import sys
+import threading
 from typing import Optional
 
+from py3dpaxxel.calibration.profile import CalibrationStore
+from py3dpaxxel.calibration.sink import CalibratedSink
 from py3dpaxxel.cli import args
-from py3dpaxxel.controller.constants import OutputDataRate
+from py3dpaxxel.controller.constants import OutputDataRate, OutputDataRateDelay
+from py3dpaxxel.data_decomposition.live_stft import LiveStftSink
+from py3dpaxxel.gcode.motion_estimator import MotionLimits, MotionTimeEstimator
+from py3dpaxxel.gcode.trajectory_generator import ChirpTrajectory
 from py3dpaxxel.log.setup import configure_logging
 from py3dpaxxel.octoprint.api import OctoApi
+from py3dpaxxel.octoprint.pooled_api import OctoPooledApi
 from py3dpaxxel.octoprint.remote_api import OctoRemoteApi
 from py3dpaxxel.sampling_tasks.steps_runner import SamplingStepsRunner
 from py3dpaxxel.storage.filename import generate_filename
@@ -42,6 +50,10 @@ class Args:
             help="OctoPrint API key.",
             type=str,
             default=80)
+        sub_group.add_argument(
+            "--waitmotion",
+            help="Keeps one pooled connection, waits until the printer finished all moves (M400 + M118 marker seen in the serial log via push API) and stops sampling right then.",
+            action="store_true")
 
         sub_group = self.parser.add_argument_group(
             "Trajectory",
@@ -84,6 +96,34 @@ class Args:
             "--autohome",
             help="Perform auto homing before trajectory.",
             action="store_true")
+        sub_group = self.parser.add_argument_group(
+            "Chirp",
+            description="Frequency sweep in one recording instead of the step trajectory (analyze with: analyze.py chirp).")
+        sub_group.add_argument(
+            "--chirp",
+            help="Sends a chirp (forth and back moves of rising frequency) along --axis, --distance and --stepcount are ignored.",
+            action="store_true")
+        sub_group.add_argument(
+            "--chirpstart",
+            help="Start frequency of the chirp in Hz.",
+            type=float,
+            default=5.0)
+        sub_group.add_argument(
+            "--chirpstop",
+            help="Stop frequency of the chirp in Hz.",
+            type=float,
+            default=100.0)
+        sub_group.add_argument(
+            "--chirprate",
+            help="Sweep rate of the chirp in Hz/s.",
+            type=float,
+            default=2.0)
+        sub_group.add_argument(
+            "--chirpaccel",
+            help="Commanded acceleration per Hz in mm/s^2 (the printer must allow chirpaccel * chirpstop by M201).",
+            type=float,
+            default=75.0)
+
         sub_group = self.parser.add_argument_group(
             "Controller",
             description="Acceleration microcontroller arguments.")
@@ -102,6 +142,65 @@ class Args:
             type=float,
             default=1.0)
 
+        sub_group = self.parser.add_argument_group(
+            "Motion estimation",
+            description="Sizes the recording to the predicted duration of the trajectory.")
+        sub_group.add_argument(
+            "--autotimelapse",
+            help="Derives the recording time from the generated G-Code and the motion limits (replaces --timelapse).",
+            action="store_true")
+        sub_group.add_argument(
+            "--maxfeedrate",
+            help="Maximum feedrate per axis in mm/s (M203).",
+            type=args.convert_xyz_float_from_str,
+            default="\"200,200,12\"")
+        sub_group.add_argument(
+            "--maxacceleration",
+            help="Maximum acceleration per axis in mm/s^2 (M201).",
+            type=args.convert_xyz_float_from_str,
+            default="\"1000,1000,200\"")
+        sub_group.add_argument(
+            "--acceleration",
+            help="Travel acceleration in mm/s^2 (M204 T).",
+            type=float,
+            default=1250.0)
+        sub_group.add_argument(
+            "--feedrate",
+            help="Feedrate in mm/s of moves without F parameter.",
+            type=float,
+            default=25.0)
+        sub_group.add_argument(
+            "--homingduration",
+            help="Assumed duration of auto homing in seconds.",
+            type=float,
+            default=15.0)
+        sub_group.add_argument(
+            "--querylimits",
+            help="Queries the motion limits from the printer (M503), requires --waitmotion.",
+            action="store_true")
+
+        sub_group = self.parser.add_argument_group(
+            "Live FFT",
+            description="Short-time FFT computed while sampling.")
+        sub_group.add_argument(
+            "--livefft",
+            help="Logs the dominant frequency peaks per axis while sampling is still running.",
+            action="store_true")
+        sub_group.add_argument(
+            "--livefftwindow",
+            help="Number of samples per short-time FFT (a spectrum is computed each quarter window).",
+            type=int,
+            default=1024)
+        sub_group.add_argument(
+            "--livefftabort",
+            help="Aborts recording if any peak exceeds the given magnitude in mg (0 disables).",
+            type=float,
+            default=0.0)
+        sub_group.add_argument(
+            "--livefftcalibrated",
+            help="Applies the stored calibration profile of the device (see calibrate.py) before the short-time FFT.",
+            action="store_true")
+
         sub_group = self.parser.add_argument_group(
             "Output",
             description="Output arguments.")
@@ -114,6 +213,15 @@ class Args:
             "--dryrun",
             help="Pretends to run but does not invoke either Octoprint nor controller.",
             action="store_true")
+        sub_group.add_argument(
+            "--resilient",
+            help="Keeps the stream with corrupted bytes or lost samples: resynchronizes and records the gaps in the metadata line.",
+            action="store_true")
+        sub_group.add_argument(
+            "--clock",
+            help="Estimates the actual sample rate from the host reception times and controller uptimes, stored in the metadata line "
+                 "and used for timestamps and FFT frequencies instead of the nominal output data rate.",
+            action="store_true")
         mux_grp = sub_group.add_mutually_exclusive_group()
         mux_grp.add_argument(
             "-", "--stdout",
@@ -155,24 +263,79 @@ class Runner:
         if self.args.stdout:
             self.args.file = None
 
-        octo_api = OctoRemoteApi(self.args.key, self.args.address, self.args.port, self.args.dryrun)
-
-        ret = SamplingStepsRunner(
-            input_serial_device=self.args.device,
-            intput_sensor_odr=OutputDataRate[self.args.outputdatarate],
-            record_timelapse_s=self.args.timelapse,
-            record_timeout_s=self.args.timeout,
-            output_filename=self.args.file,
-            octoprint_api=octo_api,
-            gcode_start_point_mm=self.args.start,
-            gcode_extra_gcode=self.args.extragcode,
-            gcode_axis=self.args.axis,
-            gcode_distance_mm=self.args.distance,
-            gcode_step_repeat_count=self.args.stepcount,
-            gcode_go_start=self.args.gostart,
-            gcode_return_start=self.args.returnstart,
-            gcode_auto_home=self.args.autohome,
-            do_dry_run=self.args.dryrun)()
+        if self.args.waitmotion:
+            octo_api = OctoPooledApi(self.args.key, self.args.address, self.args.port, self.args.dryrun)
+        else:
+            octo_api = OctoRemoteApi(self.args.key, self.args.address, self.args.port, self.args.dryrun)
+
+        do_abort_flag = threading.Event()
+        decoder_sinks = []
+        if self.args.livefft:
+            decoder_sinks.append(LiveStftSink(
+                separation_s=OutputDataRateDelay[OutputDataRate[self.args.outputdatarate]],
+                window_size=self.args.livefftwindow,
+                abort_above_mg=self.args.livefftabort if self.args.livefftabort > 0.0 else None,
+                do_abort_flag=do_abort_flag))
+            if self.args.livefftcalibrated and not self.args.dryrun:
+                calibration = CalibrationStore().load_for_device(self.args.device)
+                if calibration is not None:
+                    logging.info(f"live FFT applies calibration {calibration}")
+                    decoder_sinks = [CalibratedSink(calibration, decoder_sinks)]
+                else:
+                    logging.warning(f"no calibration profile found for device {self.args.device}: live FFT uses raw samples")
+
+        motion_estimator = None
+        if self.args.autotimelapse:
+            limits = MotionLimits(self.args.maxfeedrate, self.args.maxacceleration, self.args.acceleration, self.args.feedrate, self.args.homingduration)
+            if self.args.querylimits:
+                report = octo_api.query(["M503"], timeout_s=5.0)
+                if report is not None:
+                    limits = MotionLimits.from_report(report, limits)
+                else:
+                    logging.warning("could not query motion limits: using configured limits")
+            logging.info(f"motion limits: {limits}")
+            motion_estimator = MotionTimeEstimator(limits)
+
+        gcode_trajectory = None
+        if self.args.chirp:
+            gcode_trajectory = ChirpTrajectory.generate(
+                axis=self.args.axis,
+                start_xyz_mm=self.args.start,
+                fx_start_hz=self.args.chirpstart,
+                fx_stop_hz=self.args.chirpstop,
+                hz_per_s=self.args.chirprate,
+                accel_per_hz_mm_s2=self.args.chirpaccel,
+                go_to_start=self.args.gostart,
+                return_to_start=self.args.returnstart,
+                auto_home=self.args.autohome)
+            logging.info(f"chirp {self.args.chirpstart}Hz..{self.args.chirpstop}Hz: {len(gcode_trajectory)} commands")
+
+        try:
+            ret = SamplingStepsRunner(
+                input_serial_device=self.args.device,
+                intput_sensor_odr=OutputDataRate[self.args.outputdatarate],
+                record_timelapse_s=self.args.timelapse,
+                record_timeout_s=self.args.timeout,
+                output_filename=self.args.file,
+                octoprint_api=octo_api,
+                gcode_start_point_mm=self.args.start,
+                gcode_extra_gcode=self.args.extragcode,
+                gcode_axis=self.args.axis,
+                gcode_distance_mm=self.args.distance,
+                gcode_step_repeat_count=self.args.stepcount,
+                gcode_go_start=self.args.gostart,
+                gcode_return_start=self.args.returnstart,
+                gcode_auto_home=self.args.autohome,
+                do_dry_run=self.args.dryrun,
+                do_abort_flag=do_abort_flag,
+                decoder_sinks=decoder_sinks,
+                stop_on_motion_finished=self.args.waitmotion,
+                motion_estimator=motion_estimator,
+                gcode_trajectory=gcode_trajectory,
+                resilient_decoding=self.args.resilient,
+                estimate_clock=self.args.clock)()
+        finally:
+            octo_api.close()
 
         if ret == -1:
             self.parser.print_help()
@@ -1,14 +1,20 @@
 #!/bin/env python3
 
 import argparse
+import logging
+import os
 import sys
 from typing import Optional
 
 from py3dpaxxel.cli import args
 from py3dpaxxel.controller.constants import OutputDataRate
+from py3dpaxxel.gcode.motion_estimator import MotionLimits, MotionTimeEstimator
 from py3dpaxxel.log.setup import configure_logging
+from py3dpaxxel.octoprint.pooled_api import OctoPooledApi
 from py3dpaxxel.octoprint.remote_api import OctoRemoteApi
 from py3dpaxxel.sampling_tasks.steps_series_runner import SamplingStepsSeriesRunner
+from py3dpaxxel.sampling_tasks.stream_post_processor import StreamPostProcessor
+from py3dpaxxel.storage.catalog import Catalog
 
 configure_logging()
 
@@ -40,6 +46,10 @@ class Args:
             help="OctoPrint API key.",
             type=str,
             default=80)
+        sub_group.add_argument(
+            "--waitmotion",
+            help="Keeps one pooled connection, waits until the printer finished all moves (M400 + M118 marker seen in the serial log via push API) and stops sampling right then.",
+            action="store_true")
 
         sub_group = self.parser.add_argument_group(
             "Trajectory",
@@ -105,6 +115,30 @@ class Args:
             type=args.assert_uint_0_100,
             default=5)
 
+        sub_group = self.parser.add_argument_group(
+            "Adaptive sweep",
+            description="Records a coarse grid first and refines only around the best scored grid points (same file names as the full grid).")
+        sub_group.add_argument(
+            "--budget",
+            help="Maximum number of recordings of the adaptive sweep (0 records the full grid).",
+            type=int,
+            default=0)
+        sub_group.add_argument(
+            "--coarse",
+            help="Step of the coarse grid in multiples of --fxstep and --zetastep.",
+            type=int,
+            default=4)
+        sub_group.add_argument(
+            "--refine",
+            help="Number of best grid points per axis to refine around.",
+            type=int,
+            default=2)
+        sub_group.add_argument(
+            "--scoreband",
+            help="Frequency band \"fmin,fmax\" in Hz of the residual vibration energy used as score.",
+            type=lambda band: tuple([float(f) for f in band.strip("\"").split(",")]),
+            default="\"5,200\"")
+
         sub_group = self.parser.add_argument_group(
             "Controller",
             description="Acceleration microcontroller arguments.")
@@ -123,6 +157,43 @@ class Args:
             type=float,
             default=1.0)
 
+        sub_group = self.parser.add_argument_group(
+            "Motion estimation",
+            description="Sizes the recording to the predicted duration of the trajectory.")
+        sub_group.add_argument(
+            "--autotimelapse",
+            help="Derives the recording time from the generated G-Code and the motion limits (replaces --timelapse).",
+            action="store_true")
+        sub_group.add_argument(
+            "--maxfeedrate",
+            help="Maximum feedrate per axis in mm/s (M203).",
+            type=args.convert_xyz_float_from_str,
+            default="\"200,200,12\"")
+        sub_group.add_argument(
+            "--maxacceleration",
+            help="Maximum acceleration per axis in mm/s^2 (M201).",
+            type=args.convert_xyz_float_from_str,
+            default="\"1000,1000,200\"")
+        sub_group.add_argument(
+            "--acceleration",
+            help="Travel acceleration in mm/s^2 (M204 T).",
+            type=float,
+            default=1250.0)
+        sub_group.add_argument(
+            "--feedrate",
+            help="Feedrate in mm/s of moves without F parameter.",
+            type=float,
+            default=25.0)
+        sub_group.add_argument(
+            "--homingduration",
+            help="Assumed duration of auto homing in seconds.",
+            type=float,
+            default=15.0)
+        sub_group.add_argument(
+            "--querylimits",
+            help="Queries the motion limits from the printer (M503), requires --waitmotion.",
+            action="store_true")
+
         sub_group = self.parser.add_argument_group(
             "Output",
             description="Output arguments.")
@@ -135,6 +206,15 @@ class Args:
             "--dryrun",
             help="Pretends to run but does not invoke either Octoprint nor controller.",
             action="store_true")
+        sub_group.add_argument(
+            "--resilient",
+            help="Keeps streams with corrupted bytes or lost samples: resynchronizes and records the gaps in the metadata line.",
+            action="store_true")
+        sub_group.add_argument(
+            "--clock",
+            help="Estimates the actual sample rate from the host reception times and controller uptimes, stored in the metadata line "
+                 "and used for timestamps and FFT frequencies instead of the nominal output data rate.",
+            action="store_true")
         sub_group.add_argument(
             "--fileprefix",
             help="Specify prefix of output file (<prefix>-<run>-<timestamp>.tsv)",
@@ -145,6 +225,54 @@ class Args:
             help="Output path.",
             type=args.path_exists_and_is_dir,
             default="./test_data/")
+        sub_group.add_argument(
+            "--resume",
+            help="Resumes the series with the given run hash from its manifest (manifest-<runhash>.jsonl in --directory): "
+                 "sweep arguments are restored and only missing or incomplete streams are recorded.",
+            type=str,
+            default=None)
+        sub_group.add_argument(
+            "--container",
+            help="Also appends each recorded stream to one container file per series (<prefix>-<runhash>.pxc in --directory), "
+                 "raw counts delta encoded in compressed blocks.",
+            action="store_true")
+        sub_group.add_argument(
+            "--containercodec",
+            help="Block compression of the container.",
+            type=str,
+            choices=["zlib", "lzma"],
+            default="zlib")
+        sub_group.add_argument(
+            "--containerlevel",
+            help="Compression level of the container (0..9).",
+            type=int,
+            choices=range(0, 10),
+            default=6)
+
+        sub_group = self.parser.add_argument_group(
+            "Post-processing",
+            description="Decomposes recorded streams in the background while the next stream is recorded.")
+        sub_group.add_argument(
+            "--pipeline",
+            help="Number of background worker processes (0 disables post-processing).",
+            type=int,
+            default=0)
+        sub_group.add_argument(
+            "--pipelinefileprefix",
+            help="Prefix of decomposed output files.",
+            type=str,
+            default="fft")
+        sub_group.add_argument(
+            "--pipelineformat",
+            help="Output file format: one text file per FFT axis (tsv) or one binary file per stream containing all axis (npz).",
+            type=str,
+            choices=["tsv", "npz"],
+            default="tsv")
+        sub_group.add_argument(
+            "--catalog",
+            help=f"Catalog file receiving one summary record per stream (defaults to <directory>/catalog.{Catalog.EXTENSION}).",
+            type=str,
+            default=None)
 
         self.args: Optional[argparse.Namespace] = None
 
@@ -167,28 +295,73 @@ class Runner:
         return self._cli_args.parser
 
     def run(self) -> int:
-        octo_api = OctoRemoteApi(self.args.key, self.args.address, self.args.port, self.args.dryrun)
-
-        ret = SamplingStepsSeriesRunner(
-            octoprint_api=octo_api,
-            controller_serial_device=self.args.device,
-            controller_record_timelapse_s=self.args.timelapse,
-            controller_decode_timeout_s=self.args.timeout,
-            sensor_odr=OutputDataRate[self.args.outputdatarate],
-            gcode_start_point_mm=self.args.start,
-            gcode_axis=args.convert_axis_from_str(self.args.axis),
-            gcode_distance_mm=self.args.distance,
-            gcode_step_repeat_count=self.args.stepcount,
-            gcode_sequence_repeat_count=self.args.sequencecount,
-            fx_start_hz=self.args.fxstart,
-            fx_stop_hz=self.args.fxstop,
-            fx_step_hz=self.args.fxstep,
-            zeta_start_em2=self.args.zetastart,
-            zeta_stop_em2=self.args.zetastop,
-            zeta_step_em2=self.args.zetastep,
-            output_file_prefix=self.args.fileprefix,
-            output_dir=self.args.directory,
-            do_dry_run=self.args.dryrun)()
+        if self.args.waitmotion:
+            octo_api = OctoPooledApi(self.args.key, self.args.address, self.args.port, self.args.dryrun)
+        else:
+            octo_api = OctoRemoteApi(self.args.key, self.args.address, self.args.port, self.args.dryrun)
+        post_processor = None
+        if self.args.pipeline > 0:
+            post_processor = StreamPostProcessor(
+                out_dir=self.args.directory,
+                out_file_prefix=self.args.pipelinefileprefix,
+                out_format=self.args.pipelineformat,
+                catalog=Catalog(self.args.catalog if self.args.catalog else os.path.join(self.args.directory, f"catalog.{Catalog.EXTENSION}")),
+                num_workers=self.args.pipeline)
+
+        motion_estimator = None
+        if self.args.autotimelapse:
+            limits = MotionLimits(self.args.maxfeedrate, self.args.maxacceleration, self.args.acceleration, self.args.feedrate, self.args.homingduration)
+            if self.args.querylimits:
+                report = octo_api.query(["M503"], timeout_s=5.0)
+                if report is not None:
+                    limits = MotionLimits.from_report(report, limits)
+                else:
+                    logging.warning("could not query motion limits: using configured limits")
+            logging.info(f"motion limits: {limits}")
+            motion_estimator = MotionTimeEstimator(limits)
+
+        scorer = None
+        if self.args.budget > 0:
+            # numpy/scipy are loaded only if the adaptive sweep is used
+            from py3dpaxxel.data_decomposition.resonance_analysis import StreamScore
+            scorer = StreamScore(band_hz=self.args.scoreband)
+
+        try:
+            ret = SamplingStepsSeriesRunner(
+                octoprint_api=octo_api,
+                controller_serial_device=self.args.device,
+                controller_record_timelapse_s=self.args.timelapse,
+                controller_decode_timeout_s=self.args.timeout,
+                sensor_odr=OutputDataRate[self.args.outputdatarate],
+                gcode_start_point_mm=self.args.start,
+                gcode_axis=args.convert_axis_from_str(self.args.axis),
+                gcode_distance_mm=self.args.distance,
+                gcode_step_repeat_count=self.args.stepcount,
+                gcode_sequence_repeat_count=self.args.sequencecount,
+                fx_start_hz=self.args.fxstart,
+                fx_stop_hz=self.args.fxstop,
+                fx_step_hz=self.args.fxstep,
+                zeta_start_em2=self.args.zetastart,
+                zeta_stop_em2=self.args.zetastop,
+                zeta_step_em2=self.args.zetastep,
+                output_file_prefix=self.args.fileprefix,
+                output_dir=self.args.directory,
+                do_dry_run=self.args.dryrun,
+                post_processor=post_processor,
+                stop_on_motion_finished=self.args.waitmotion,
+                motion_estimator=motion_estimator,
+                run_budget=self.args.budget,
+                scorer=scorer,
+                coarse_factor=self.args.coarse,
+                refine_count=self.args.refine,
+                resume_run_hash=self.args.resume,
+                use_container=self.args.container,
+                container_codec=self.args.containercodec,
+                container_level=self.args.containerlevel,
+                resilient_decoding=self.args.resilient,
+                estimate_clock=self.args.clock)()
+        finally:
+            octo_api.close()
 
         if ret == -1:
             self.parser.print_help()
@@ -1,8 +1,9 @@
 import csv
 import logging
 import re
-from typing import Dict, Union
+from typing import Dict, Union, Optional
 
+from py3dpaxxel.calibration.profile import CalibrationProfile
 from py3dpaxxel.controller.constants import OutputDataRateDelay, OutputDataRate, Range, Scale
 from py3dpaxxel.controller.transfer_types import FirmwareVersion
 from py3dpaxxel.samples.samples import Samples
@@ -18,8 +19,14 @@ class SamplesLoader:
     LINE_COMMENT_CHARACTER = "#"
     "comments must start at beginning of line with LINE_COMMENT_CHARACTER"
 
-    def __init__(self, in_filename: str) -> None:
+    def __init__(self, in_filename: str, calibration: Optional[CalibrationProfile] = None) -> None:
+        """
+
+        :param in_filename: stream file
+        :param calibration: device calibration applied to x, y, z after loading, None loads raw samples
+        """
         self.filename = in_filename
+        self.calibration: Optional[CalibrationProfile] = calibration
 
     def _try_read_metadata_if_any(self, samples: Samples) -> bool:
         # read metadata (if any): ODR, rate, scale
@@ -27,12 +34,15 @@ class SamplesLoader:
         with open(self.filename, "r") as f:
             for line in reversed(f.readlines()):
                 if line[0] == "#":
-                    sampling_args = eval(re.search("^# .*({.*})$", line).group(1))
+                    sampling_args = eval(re.search("^# ({.*})$", line).group(1))
                     samples.rate = OutputDataRate[sampling_args["sensor"]["rate"]]
                     samples.range = Range[sampling_args["sensor"]["range"]]
                     samples.scale = Scale[sampling_args["sensor"]["scale"]]
                     samples.firmware_version = FirmwareVersion.from_string(sampling_args["firmware"]["version"])
                     samples.separation_s = OutputDataRateDelay[samples.rate]
+                    if "clock" in sampling_args:
+                        samples.separation_s = 1.0 / float(sampling_args["clock"]["rate_hz"])
+                    samples.gaps = sampling_args["integrity"]["gaps"] if "integrity" in sampling_args else []
                     found_meta = True
                     break
         return found_meta
@@ -44,6 +54,7 @@ class SamplesLoader:
         - ignores 1.st line which shall be the header (column names, i.e. `run sample x y z`)
         - interprets sample data, i.e.: `00 06399 +0538.200 +0187.200 +0600.600`
         - interpret last line (metadata), i.e.: `# { ..., sensor: {'rate': 'ODR3200', 'range': 'G4', 'scale': 'FULL_RES_4MG_LSB', 'version': '0.1.1'}}`
+        - applies the calibration (if any) on all samples at once
 
         :return: Samples
         """
@@ -65,4 +76,8 @@ class SamplesLoader:
                 samples.y.append(float(row["y"]))
                 samples.z.append(float(row["z"]))
 
+        if self.calibration is not None and not samples.is_empty():
+            xyz = self.calibration.apply(list(zip(samples.x, samples.y, samples.z)))
+            samples.x, samples.y, samples.z = xyz.T.tolist()
+
         return samples
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from py3dpaxxel.controller.constants import OutputDataRateDelay, OutputDataRate, Range, Scale
 from py3dpaxxel.controller.transfer_types import FirmwareVersion
@@ -7,7 +7,7 @@ from py3dpaxxel.controller.transfer_types import FirmwareVersion
 class Samples:
     def __init__(self) -> None:
         self.separation_s: Optional[float] = None
-        "time separation in-between samples (`1/sample_rate`)"
+        "time separation in-between samples (`1/sample_rate`), by the estimated actual sample rate if the stream has `clock` metadata"
         self.rate: OutputDataRate = OutputDataRateDelay[OutputDataRate.ODR3200]
         "sample rate, ODR (output data rate)"
         self.range: Optional[Range] = None
@@ -16,6 +16,8 @@ class Samples:
         "sensor scale: 10bit or full scale (each LSB is 3.9mg)"
         self.firmware_version: Optional[FirmwareVersion] = None
         "device firmware version"
+        self.gaps: List[List[int]] = []
+        "lost samples as pairs of first lost sample index and count (see `integrity` in :meth:`.Py3dpAxxel.decode`)"
 
         self.run = []
         "series number"
@@ -34,6 +36,22 @@ class Samples:
     def __len__(self):
         return len(self.index)
 
+    def segments(self) -> List[Tuple[int, int]]:
+        """
+        Contiguous runs of samples in-between lost samples, i.e. to analyze the intact parts of a resiliently decoded stream.
+
+        :return: (begin, end exclusive) position of each run within the sample lists
+        """
+        begin = 0
+        runs: List[Tuple[int, int]] = []
+        for i in range(1, len(self.index)):
+            if self.index[i] != (self.index[i - 1] + 1) % 65536:
+                runs.append((begin, i))
+                begin = i
+        if len(self.index) > 0:
+            runs.append((begin, len(self.index)))
+        return runs
+
     def is_empty(self) -> bool:
         return 0 == len(self.timestamp_ms)
 
@@ -0,0 +1,179 @@
+import logging
+import math
+import uuid
+from typing import Dict, List, Literal, Optional, Set, Tuple
+
+from py3dpaxxel.sampling_tasks.series_argument_generator import RunArgs
+
+
+class AdaptiveRunArgsGenerator:
+    """
+    Generates arguments for the sequence runner coarse-to-fine instead of the full grid (see :class:`.RunArgsGenerator`).
+
+    - starts with a coarse grid (every `coarse_factor`-th frequency and zeta step of the fine grid)
+    - each recorded grid point is scored (:meth:`report`), lower scores are better (i.e. residual vibration energy)
+    - the next batch refines around the `refine_count` best points per axis with half the step size until the fine step is reached
+    - stops when no refinement is left or the run budget is exhausted
+
+    Produces the same :class:`.RunArgs` (and file names) as the full grid, so recorded series can be decomposed and analyzed as usual.
+
+    Example:
+
+    .. code-block::
+
+        batch = generator.next_batch()
+        while batch:
+            for r in batch:
+                record(r)
+                generator.report(r, score(r))
+            batch = generator.next_batch()
+    """
+
+    def __init__(self,
+                 sequence_repeat_count: int,
+                 fx_start_hz: int,
+                 fx_stop_hz: int,
+                 fx_step_hz: int,
+                 zeta_start_em2: int,
+                 zeta_stop_em2: int,
+                 zeta_step_em2: int,
+                 axis: List[Literal["x", "y", "z"]],
+                 out_file_prefix_1: str,
+                 out_file_prefix_2: str,
+                 run_budget: int,
+                 coarse_factor: int = 4,
+                 refine_count: int = 2) -> None:
+        """
+
+        :param sequence_repeat_count: how often to record each grid point
+        :param fx_start_hz: frequency range `*10^0Hz`
+        :param fx_stop_hz: frequency range `*10^0Hz`
+        :param fx_step_hz: fine frequency step `*10^0Hz`
+        :param zeta_start_em2: Zeta range `*10^-2Zeta`
+        :param zeta_stop_em2: Zeta range `*10^-2Zeta`
+        :param zeta_step_em2: fine Zeta step `*10^-2Zeta`
+        :param axis: list of x,y,z
+        :param out_file_prefix_1: see :class:`py3dpaxxel.cli.filename.generate_filename_for_run`
+        :param out_file_prefix_2: see :class:`py3dpaxxel.cli.filename.generate_filename_for_run`
+        :param run_budget: maximum number of recordings (all axis and repetitions)
+        :param coarse_factor: step of the first grid in multiples of the fine step
+        :param refine_count: number of best grid points per axis to refine around
+        """
+        self.sequence_repeat_count: int = sequence_repeat_count
+        self.fx_grid_hz: List[int] = list(range(fx_start_hz, fx_stop_hz + 1, fx_step_hz))
+        self.zeta_grid_em2: List[int] = list(range(zeta_start_em2, zeta_stop_em2 + 1, zeta_step_em2))
+        self.axis: List[Literal["x", "y", "z"]] = axis
+        self.out_file_prefix_1: str = out_file_prefix_1
+        self.out_file_prefix_2: str = out_file_prefix_2
+        self.run_budget: int = run_budget
+        self.coarse_factor: int = max(1, coarse_factor)
+        self.refine_count: int = refine_count
+
+        self.scores: Dict[Tuple[str, int, int], List[float]] = {}
+        "reported scores per grid point (axis, frequency, zeta)"
+        self.planned: int = 0
+        "number of generated run arguments"
+        self._visited: Dict[str, Set[Tuple[int, int]]] = {ax: set() for ax in axis}
+        "grid indices (frequency, zeta) generated per axis"
+        self._step: Optional[int] = None
+        "step of the last generated batch in fine grid indices"
+
+    @property
+    def full_grid_size(self) -> int:
+        """
+        :return: number of recordings of the full grid
+        """
+        return len(self.axis) * len(self.fx_grid_hz) * len(self.zeta_grid_em2) * self.sequence_repeat_count
+
+    def _coarse_indices(self, size: int) -> List[int]:
+        indices = list(range(0, size, self.coarse_factor))
+        if indices[-1] != size - 1:
+            indices.append(size - 1)
+        return indices
+
+    def _mean_score(self, ax: str, i: int, j: int) -> float:
+        scores = [s for s in self.scores.get((ax, self.fx_grid_hz[i], self.zeta_grid_em2[j]), []) if not math.isnan(s)]
+        return sum(scores) / len(scores) if scores else math.inf
+
+    def _refine_indices(self, ax: str, step: int) -> List[Tuple[int, int]]:
+        ranked = sorted(self._visited[ax], key=lambda ij: self._mean_score(ax, *ij))
+        best = [ij for ij in ranked if math.isfinite(self._mean_score(ax, *ij))][:self.refine_count]
+        if not best:
+            logging.warning(f"axis {ax}: no scored grid point to refine around")
+
+        points: List[Tuple[int, int]] = []
+        for i, j in best:
+            for di in (-step, 0, step):
+                for dj in (-step, 0, step):
+                    ij = (i + di, j + dj)
+                    if (0 <= ij[0] < len(self.fx_grid_hz) and 0 <= ij[1] < len(self.zeta_grid_em2)
+                            and ij not in self._visited[ax] and ij not in points):
+                        points.append(ij)
+        return points
+
+    def _batch_points(self, step: int) -> List[Tuple[str, int, int]]:
+        points: List[Tuple[str, int, int]] = []
+        for ax in self.axis:
+            if step == self.coarse_factor:
+                indices = [(i, j) for i in self._coarse_indices(len(self.fx_grid_hz)) for j in self._coarse_indices(len(self.zeta_grid_em2))]
+            else:
+                indices = self._refine_indices(ax, step)
+            points.extend([(ax, i, j) for i, j in indices])
+        return points
+
+    def next_batch(self) -> List[RunArgs]:
+        """
+        Generates the next batch: the coarse grid first, then refinements around the best scored points.
+        All run arguments of the previous batch shall be reported (see :meth:`report`) before.
+
+        :return: run arguments, empty if done
+        """
+        if self._step is None:
+            step = self.coarse_factor
+        elif self._step > 1:
+            step = self._step // 2
+        else:
+            return []
+        points = self._batch_points(step)
+        # all neighbours at this step visited already: the finer steps may still have some
+        while 0 == len(points) and step > 1:
+            step = step // 2
+            points = self._batch_points(step)
+        self._step = step
+
+        budget = self.run_budget - self.planned
+        if budget < len(points) * self.sequence_repeat_count:
+            logging.warning(f"run budget {self.run_budget} exhausted: {len(points) * self.sequence_repeat_count - budget} runs dropped")
+            points = points[:max(0, budget) // max(1, self.sequence_repeat_count)]
+        if 0 == len(points):
+            return []
+
+        batch: List[RunArgs] = []
+        for ax, i, j in points:
+            self._visited[ax].add((i, j))
+            for sequence in range(0, self.sequence_repeat_count):
+                out_file_prefix_3 = f"{uuid.uuid1().time_low:x}"  # each stream shall have a pseudo UUID appended to prefix_2
+                batch.append(RunArgs(sequence, ax, self.fx_grid_hz[i], self.zeta_grid_em2[j], self.out_file_prefix_1, self.out_file_prefix_2, out_file_prefix_3))
+        self.planned += len(batch)
+        logging.info(f"adaptive sweep: step {step * (self.fx_grid_hz[1] - self.fx_grid_hz[0]) if len(self.fx_grid_hz) > 1 else 0}Hz, "
+                     f"{len(points)} grid points, {len(batch)} runs (planned {self.planned}/{self.run_budget})")
+        return batch
+
+    def report(self, run_args: RunArgs, score: float) -> None:
+        """
+        :param run_args: recorded run
+        :param score: score of the recording, lower is better, `nan` if unknown
+        """
+        self.scores.setdefault((run_args.axis, run_args.frequency_hz, run_args.zeta_em2), []).append(score)
+
+    def best(self) -> Dict[str, Tuple[int, int, float]]:
+        """
+        :return: for each axis, the best grid point (frequency, zeta, mean score) so far
+        """
+        best: Dict[str, Tuple[int, int, float]] = {}
+        for ax in self.axis:
+            if self._visited[ax]:
+                i, j = min(self._visited[ax], key=lambda ij: self._mean_score(ax, *ij))
+                if math.isfinite(self._mean_score(ax, i, j)):
+                    best[ax] = (self.fx_grid_hz[i], self.zeta_grid_em2[j], self._mean_score(ax, i, j))
+        return best
@@ -0,0 +1,292 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from py3dpaxxel.controller.constants import OutputDataRate
+from py3dpaxxel.controller.device_session import DeviceSession
+from py3dpaxxel.gcode.motion_estimator import MotionTimeEstimator
+from py3dpaxxel.octoprint.api import OctoApi
+from py3dpaxxel.sampling_tasks.series_argument_generator import RunArgs, RunArgsGenerator
+from py3dpaxxel.sampling_tasks.steps_runner import SamplingStepsRunner
+from py3dpaxxel.storage.catalog import Catalog
+from py3dpaxxel.storage.series_manifest import SeriesManifest
+
+
+class FarmPrinter:
+    """
+    One printer of the farm: OctoPrint instance and the accelerometer mounted on that printer, plus its progress.
+    """
+
+    def __init__(self, name: str, octoprint_api: OctoApi, controller_serial_device: str) -> None:
+        """
+
+        :param name: printer name used in logs and the result catalog
+        :param octoprint_api: API of the printer's OctoPrint instance
+        :param controller_serial_device: controller serial device node of the accelerometer mounted on this printer
+        """
+        self.name: str = name
+        self.octoprint_api: OctoApi = octoprint_api
+        self.controller_serial_device: str = controller_serial_device
+        self.completed: int = 0
+        "number of successful recordings"
+        self.failed: int = 0
+        "number of failed recordings"
+        self.consecutive_failures: int = 0
+        self.current: Optional[RunArgs] = None
+        "run being recorded right now"
+        self.busy_s: float = 0.0
+        "time spent recording"
+        self.retired: bool = False
+        "printer took no more runs after too many consecutive failures"
+
+    def __str__(self) -> str:
+        state = "retired" if self.retired else (f"recording {self.current.filename}" if self.current is not None else "idle")
+        return f"{self.name}: {self.completed} ok, {self.failed} failed, {self.busy_s:.1f}s busy, {state}"
+
+
+class FarmSweep:
+    """
+    One sweep distributed across the farm: the run arguments of a :class:`.RunArgsGenerator` and the trajectory settings.
+    """
+
+    def __init__(self,
+                 generator: RunArgsGenerator,
+                 gcode_start_point_mm: Tuple[int, int, int],
+                 gcode_distance_mm: int,
+                 gcode_step_repeat_count: int) -> None:
+        self.generator: RunArgsGenerator = generator
+        self.gcode_start_point_mm: Tuple[int, int, int] = gcode_start_point_mm
+        self.gcode_distance_mm: int = gcode_distance_mm
+        self.gcode_step_repeat_count: int = gcode_step_repeat_count
+        self.runs: List[RunArgs] = generator.generate()
+
+    @property
+    def run_hash(self) -> str:
+        return self.generator.out_file_prefix_2
+
+    def manifest_args(self) -> Dict[str, Any]:
+        """
+        :return: sweep arguments as stored by :class:`.SamplingStepsSeriesRunner`, a sweep can be resumed on a single printer
+        """
+        g = self.generator
+        return {"gcode_start_point_mm": self.gcode_start_point_mm, "gcode_axis": g.axis, "gcode_distance_mm": self.gcode_distance_mm,
+                "gcode_step_repeat_count": self.gcode_step_repeat_count, "gcode_sequence_repeat_count": g.sequence_repeat_count,
+                "fx_start_hz": g.fx_start_hz, "fx_stop_hz": g.fx_stop_hz, "fx_step_hz": g.fx_step_hz,
+                "zeta_start_em2": g.zeta_start_em2, "zeta_stop_em2": g.zeta_stop_em2, "zeta_step_em2": g.zeta_step_em2,
+                "output_file_prefix": g.out_file_prefix_1, "run_budget": 0, "coarse_factor": 4, "refine_count": 2}
+
+
+class PrinterFarmScheduler(Callable[[], int]):
+    """
+    Distributes the runs of one or more sweeps across several printers (each with its own accelerometer) concurrently.
+
+    - one worker thread per printer takes the next run from a shared queue, the first recording of each printer homes and goes to start
+    - each printer keeps its own device session (see :class:`.DeviceSession`)
+    - a failed run is queued again (at most `max_attempts` recordings per run) for another printer,
+      the printers it failed on take it again only if no other printer is left
+    - a printer is retired after `max_consecutive_failures` failed recordings in a row, the other printers take over
+    - results are appended to one shared catalog `farm-<farm_hash>.jsonl` (see :class:`.Catalog`) and to the manifest of each sweep
+      (see :class:`.SeriesManifest`)
+
+    Example catalog record:
+
+    .. code-block::
+
+        {"type":"run","sweep":"a81829a6","key":"s000-ax-f020-z005","printer":"mk3-1","stream":"octo-a81829a6-...tsv","status":"ok","attempt":1,"duration_s":3.1,"time":1700000003.2}
+    """
+
+    PREFIX = "farm"
+
+    def __init__(self,
+                 printers: List[FarmPrinter],
+                 sweeps: List[FarmSweep],
+                 controller_record_timelapse_s: float,
+                 controller_decode_timeout_s: float,
+                 sensor_odr: OutputDataRate,
+                 output_dir: str,
+                 do_dry_run: bool,
+                 do_abort_flag: threading.Event = threading.Event(),
+                 stop_on_motion_finished: bool = False,
+                 motion_estimator: Optional[MotionTimeEstimator] = None,
+                 max_attempts: int = 2,
+                 max_consecutive_failures: int = 3,
+                 catalog: Optional[Catalog] = None) -> None:
+        """
+
+        :param printers: printers to distribute the runs to
+        :param sweeps: sweeps to record, runs are queued sweep after sweep
+        :param max_attempts: how often a run is recorded at most (on any printer) until it is given up
+        :param max_consecutive_failures: failed recordings in a row until a printer is retired
+        :param catalog: shared result catalog, defaults to `<output_dir>/farm-<farm_hash>.jsonl`
+        """
+        self.printers: List[FarmPrinter] = printers
+        self.sweeps: List[FarmSweep] = sweeps
+        self.controller_record_timelapse_s: float = controller_record_timelapse_s
+        self.controller_decode_timeout_s: float = controller_decode_timeout_s
+        self.sensor_odr: OutputDataRate = sensor_odr
+        self.output_dir: str = output_dir
+        self.do_dry_run: bool = do_dry_run
+        self.do_abort_flag: threading.Event = do_abort_flag
+        self.stop_on_motion_finished: bool = stop_on_motion_finished
+        self.motion_estimator: Optional[MotionTimeEstimator] = motion_estimator
+        self.max_attempts: int = max_attempts
+        self.max_consecutive_failures: int = max_consecutive_failures
+        self.farm_hash: str = f"{uuid.uuid1().time_low:x}"
+        self.catalog: Catalog = catalog if catalog is not None else Catalog(
+            os.path.join(output_dir, f"{PrinterFarmScheduler.PREFIX}-{self.farm_hash}.{Catalog.EXTENSION}"))
+        self.manifests: Dict[str, Optional[SeriesManifest]] = {}
+        "manifest per sweep run hash, None on dry-run"
+
+        self._queue: Deque[Tuple[FarmSweep, RunArgs, int, Set[str]]] = deque()
+        "sweep, run, attempt and names of the printers the run failed on"
+        self._lock: threading.Lock = threading.Lock()
+        self._in_flight: int = 0
+        self._done: int = 0
+        self._given_up: int = 0
+
+    @property
+    def runs_total(self) -> int:
+        return sum([len(s.runs) for s in self.sweeps])
+
+    def progress(self) -> Dict[str, Dict[str, Any]]:
+        """
+        :return: progress per printer name: completed, failed, busy time, current stream (None if idle) and retired flag
+        """
+        with self._lock:
+            return {p.name: {"completed": p.completed, "failed": p.failed, "busy_s": p.busy_s, "retired": p.retired,
+                             "current": p.current.filename if p.current is not None else None} for p in self.printers}
+
+    def _take(self, printer: FarmPrinter) -> Optional[Tuple[FarmSweep, RunArgs, int, Set[str]]]:
+        """
+        :return: next run for the printer, None if no run is left (waits while runs of other printers may be queued again)
+        """
+        while not self.do_abort_flag.is_set():
+            with self._lock:
+                for item in self._queue:
+                    failed_on = item[3]
+                    if printer.name not in failed_on or all([p.retired or p.name in failed_on for p in self.printers]):
+                        self._queue.remove(item)
+                        self._in_flight += 1
+                        return item
+                if 0 == self._in_flight and 0 == len(self._queue):
+                    return None
+            time.sleep(0.1)
+        return None
+
+    def _report(self, printer: FarmPrinter, sweep: FarmSweep, r: RunArgs, attempt: int, failed_on: Set[str], ok: bool, duration_s: float) -> None:
+        key = SeriesManifest.key(r.sequence, r.axis, r.frequency_hz, r.zeta_em2)
+        status = "ok" if ok else "failed"
+        with self._lock:
+            self._in_flight -= 1
+            printer.current = None
+            printer.busy_s += duration_s
+            if ok:
+                printer.completed += 1
+                printer.consecutive_failures = 0
+                self._done += 1
+            else:
+                printer.failed += 1
+                printer.consecutive_failures += 1
+                if attempt < self.max_attempts:
+                    self._queue.append((sweep, r, attempt + 1, failed_on | {printer.name}))
+                else:
+                    self._given_up += 1
+                    logging.error(f"{printer.name}: run given up after {attempt} attempts: {r}")
+                if printer.consecutive_failures >= self.max_consecutive_failures:
+                    printer.retired = True
+                    logging.error(f"{printer.name}: retired after {printer.consecutive_failures} failed recordings in a row")
+            done, total = self._done, self.runs_total
+
+        if not self.do_dry_run:
+            self.catalog.append({"type": "run", "sweep": sweep.run_hash, "key": key, "printer": printer.name, "stream": r.filename,
+                                 "status": status, "attempt": attempt, "duration_s": round(duration_s, 3), "time": time.time()})
+        manifest = self.manifests.get(sweep.run_hash)
+        if manifest is not None:
+            manifest.complete(key, r.filename, status)
+        logging.info(f"{int((done / total) * 100 + 0.5)}% farm {done}/{total}: {printer}")
+
+    def _record(self, printer: FarmPrinter, device_session: Optional[DeviceSession], sweep: FarmSweep, r: RunArgs) -> None:
+        # home on the first recording and after failures (position unknown)
+        first = 0 == printer.completed or 0 < printer.consecutive_failures
+        SamplingStepsRunner(
+            input_serial_device=printer.controller_serial_device,
+            intput_sensor_odr=self.sensor_odr,
+            record_timelapse_s=self.controller_record_timelapse_s,
+            record_timeout_s=self.controller_decode_timeout_s,
+            output_filename=os.path.join(self.output_dir, r.filename),
+            octoprint_api=printer.octoprint_api,
+            gcode_start_point_mm=sweep.gcode_start_point_mm,
+            gcode_extra_gcode=f"M593 {r.axis.upper()} F{r.frequency_hz} D{round((r.zeta_em2 / 100.0), 2)}",
+            gcode_axis=r.axis,
+            gcode_distance_mm=sweep.gcode_distance_mm,
+            gcode_step_repeat_count=sweep.gcode_step_repeat_count,
+            gcode_go_start=first,
+            gcode_return_start=True,
+            gcode_auto_home=first,
+            do_dry_run=self.do_dry_run,
+            do_abort_flag=self.do_abort_flag,
+            device_session=device_session,
+            stop_on_motion_finished=self.stop_on_motion_finished,
+            motion_estimator=self.motion_estimator)()
+
+    def _work(self, printer: FarmPrinter) -> None:
+        device_session = DeviceSession(printer.controller_serial_device) if not self.do_dry_run else None
+        try:
+            while not printer.retired:
+                item = self._take(printer)
+                if item is None:
+                    break
+                sweep, r, attempt, failed_on = item
+                with self._lock:
+                    printer.current = r
+                logging.info(f"{printer.name}: recording (attempt {attempt}) {r}")
+                start = time.time()
+                try:
+                    self._record(printer, device_session, sweep, r)
+                    ok = not self.do_abort_flag.is_set()
+                except Exception as e:
+                    logging.error(f"{printer.name}: recording failed: {e}")
+                    ok = False
+                    stream = os.path.join(self.output_dir, r.filename)
+                    if os.path.isfile(stream):
+                        # keep the data but hide it from tools selecting stream files by extension
+                        os.replace(stream, f"{stream}.{SeriesManifest.INCOMPLETE_EXTENSION}")
+                self._report(printer, sweep, r, attempt, failed_on, ok, time.time() - start)
+        finally:
+            if device_session is not None:
+                device_session.close()
+                logging.info(f"{printer.name}: device session closed: device opened {device_session.open_count} times")
+
+    def __call__(self) -> int:
+        for sweep in self.sweeps:
+            manifest = None
+            if not self.do_dry_run:
+                manifest = SeriesManifest(self.output_dir, sweep.run_hash)
+                manifest.begin(sweep.manifest_args())
+                manifest.plan([SeriesManifest.key(r.sequence, r.axis, r.frequency_hz, r.zeta_em2) for r in sweep.runs])
+            self.manifests[sweep.run_hash] = manifest
+            self._queue.extend([(sweep, r, 1, set()) for r in sweep.runs])
+        logging.info(f"farm {self.farm_hash}: {len(self.printers)} printers, {len(self.sweeps)} sweeps, planned runs={self.runs_total}, "
+                     f"catalog {self.catalog.filename}")
+
+        workers = [threading.Thread(name=f"farm_{p.name}", target=self._work, args=(p,), daemon=True) for p in self.printers]
+        start = time.time()
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+
+        for p in self.printers:
+            logging.info(f"farm {self.farm_hash}: {p}")
+        left = len(self._queue)
+        logging.info(f"farm {self.farm_hash}: {self._done}/{self.runs_total} runs recorded in {time.time() - start:.1f}s "
+                     f"({self._given_up} given up, {left} not recorded)")
+
+        if self.do_abort_flag.is_set():
+            logging.warning("farm stopped ahead of time because stop flag was set")
+            return -1
+        return 0 if self._done == self.runs_total else -1
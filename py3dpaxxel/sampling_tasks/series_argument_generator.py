@@ -1,7 +1,9 @@
 import uuid
-from typing import List, Literal
+from typing import List, Literal, Optional
 
 from py3dpaxxel.storage import filename_stream as fn_generator
+from py3dpaxxel.storage.filename import timestamp
+from py3dpaxxel.storage.filename_meta import FilenameMetaStream
 
 
 class RunArgs:
@@ -22,17 +24,40 @@ class RunArgs:
         self.file_prefix_1: str = file_prefix_1
         self.file_prefix_2: str = file_prefix_2
         self.file_prefix_3: str = file_prefix_3
+        self._filename: Optional[str] = None
+        self._timestamp: Optional[str] = None
 
     @property
     def filename(self):
-        return fn_generator.generate_filename_for_run(
-            self.file_prefix_1,
-            self.file_prefix_2,
-            self.file_prefix_3,
-            self.sequence,
-            self.axis,
-            self.frequency_hz,
-            self.zeta_em2)
+        """
+        :return: stream file name, the timestamp is taken on first access and kept for subsequent accesses
+        """
+        if self._filename is None:
+            self._timestamp = timestamp()
+            self._filename = fn_generator.generate_filename_for_run(
+                self.file_prefix_1,
+                self.file_prefix_2,
+                self.file_prefix_3,
+                self.sequence,
+                self.axis,
+                self.frequency_hz,
+                self.zeta_em2,
+                force_timestamp=self._timestamp)
+        return self._filename
+
+    @property
+    def filename_meta(self) -> FilenameMetaStream:
+        """
+        :return: metadata of the stream file name (see :attr:`filename`) without parsing it
+        """
+        filename = self.filename
+        ts = self._timestamp
+        return FilenameMetaStream(
+            prefix=self.file_prefix_1, run_hash=self.file_prefix_2, stream_hash=self.file_prefix_3,
+            year=int(ts[0:4]), month=int(ts[4:6]), day=int(ts[6:8]),
+            hour=int(ts[9:11]), minute=int(ts[11:13]), second=int(ts[13:15]), milli_second=int(ts[15:18]),
+            sequence_nr=self.sequence, sequence_axis=self.axis, sequence_frequency_hz=self.frequency_hz, sequence_zeta_em2=self.zeta_em2,
+            file_extension=filename.rsplit(".", 1)[1])
 
     def __str__(self):
         return (f"prefix_1={self.file_prefix_1} "
@@ -1,10 +1,13 @@
 import logging
 import threading
 import time
-from typing import Literal, Tuple, Optional, Callable
+from typing import Literal, Tuple, Optional, Callable, List
 
 from py3dpaxxel.controller.blocking_decoder import BlockingDecoder
 from py3dpaxxel.controller.constants import OutputDataRate
+from py3dpaxxel.controller.decoder_sink import DecoderSink
+from py3dpaxxel.controller.device_session import DeviceSession
+from py3dpaxxel.gcode.motion_estimator import MotionTimeEstimator
 from py3dpaxxel.gcode.trajectory_generator import CoplanarTrajectory
 from py3dpaxxel.log.setup import configure_logging
 from py3dpaxxel.octoprint.api import OctoApi
@@ -30,7 +33,25 @@ class SamplingStepsRunner(Callable[[], int]):
                  gcode_return_start: bool,
                  gcode_auto_home: bool,
                  do_dry_run: bool,
-                 do_abort_flag: threading.Event = threading.Event()) -> None:
+                 do_abort_flag: threading.Event = threading.Event(),
+                 decoder_sinks: Optional[List[DecoderSink]] = None,
+                 device_session: Optional[DeviceSession] = None,
+                 stop_on_motion_finished: bool = False,
+                 motion_estimator: Optional[MotionTimeEstimator] = None,
+                 gcode_trajectory: Optional[List[str]] = None,
+                 resilient_decoding: bool = False,
+                 estimate_clock: bool = False) -> None:
+        """
+
+        :param record_timelapse_s: how long to record, replaced by the predicted motion duration if `motion_estimator` is given
+        :param stop_on_motion_finished: if the OctoPrint API supports it (see :attr:`OctoApi.supports_motion_finished`),
+            waits for the printer to finish all moves (at most the record time lapse) and stops sampling right then,
+            records the full time lapse if waiting is unavailable (see :meth:`OctoApi.prepare_motion_finished`)
+        :param motion_estimator: sizes the recording to the predicted duration of the trajectory (including margin)
+        :param gcode_trajectory: replaces the generated step trajectory, i.e. a :class:`.ChirpTrajectory`
+        :param resilient_decoding: keeps recordings with corrupted bytes or lost samples, see :meth:`.Py3dpAxxel.decode`
+        :param estimate_clock: stores the estimated actual sample rate in the metadata line, see :class:`.ClockEstimator`
+        """
         self.input_serial_device: str = input_serial_device
         self.intput_sensor_odr: OutputDataRate = intput_sensor_odr
         self.record_timelapse_s: float = record_timelapse_s
@@ -47,37 +68,76 @@ class SamplingStepsRunner(Callable[[], int]):
         self.do_dry_run: bool = do_dry_run
         self.record_timeout_s: float = record_timeout_s
         self.do_abort_flag: threading.Event = do_abort_flag
+        self.decoder_sinks: Optional[List[DecoderSink]] = decoder_sinks
+        self.device_session: Optional[DeviceSession] = device_session
+        self.stop_on_motion_finished: bool = stop_on_motion_finished
+        self.motion_estimator: Optional[MotionTimeEstimator] = motion_estimator
+        self.gcode_trajectory: Optional[List[str]] = gcode_trajectory
+        self.resilient_decoding: bool = resilient_decoding
+        self.estimate_clock: bool = estimate_clock
 
     def __call__(self) -> int:
+        commands = [self.gcode_extra_gcode] if "" != self.gcode_extra_gcode else []
+        if self.gcode_trajectory is not None:
+            commands.extend(self.gcode_trajectory)
+        else:
+            commands.extend(CoplanarTrajectory.generate(
+                axis=self.gcode_axis,
+                start_xyz_mm=self.gcode_start_point_mm,
+                distance_mm=self.gcode_distance_mm,
+                step_repeat_count=self.gcode_step_repeat_count,
+                go_to_start=self.gcode_go_start,
+                return_to_start=self.gcode_return_start,
+                auto_home=self.gcode_auto_home))
+
+        record_timelapse_s = self.record_timelapse_s
+        if self.motion_estimator is not None:
+            # without going to start first the previous position is unknown: assume home position (conservative)
+            start_xyz_mm = self.gcode_start_point_mm if not self.gcode_go_start else None
+            record_timelapse_s = self.motion_estimator.recording_time_s(commands, start_xyz_mm)
+            logging.info(f"predicted motion duration {self.motion_estimator.estimate(commands, start_xyz_mm):.3f}s: recording {record_timelapse_s:.3f}s")
+
         blocking_decoder = BlockingDecoder(
             self.input_serial_device,
-            self.record_timelapse_s,
+            record_timelapse_s,
             self.record_timeout_s,
             self.intput_sensor_odr,
             self.output_filename,
             self.do_dry_run,
-            self.do_abort_flag)
+            self.do_abort_flag,
+            self.decoder_sinks,
+            self.device_session,
+            resilient=self.resilient_decoding,
+            estimate_clock=self.estimate_clock)
         exception_wrapper = ExceptionTaskWrapper(target=blocking_decoder)
         decoder_thread = threading.Thread(name="stream_decoder", target=exception_wrapper)
         decoder_thread.daemon = True
 
+        # connects ahead of sampling, hence does not take from the recording
+        wait_motion = (self.stop_on_motion_finished and self.octoprint_api.supports_motion_finished
+                       and self.octoprint_api.prepare_motion_finished())
+
         decoder_thread.start()
 
         time.sleep(0.1)
         start = time.time()
         blocking_decoder.start_sampling()
 
-        commands = [self.gcode_extra_gcode] if "" != self.gcode_extra_gcode else []
-        commands.extend(CoplanarTrajectory.generate(
-            axis=self.gcode_axis,
-            start_xyz_mm=self.gcode_start_point_mm,
-            distance_mm=self.gcode_distance_mm,
-            step_repeat_count=self.gcode_step_repeat_count,
-            go_to_start=self.gcode_go_start,
-            return_to_start=self.gcode_return_start,
-            auto_home=self.gcode_auto_home))
-
-        self.octoprint_api.send_commands(commands)
+        try:
+            if wait_motion:
+                sent = self.octoprint_api.send_commands_and_wait(commands, record_timelapse_s)
+                if 0 == sent and decoder_thread.is_alive():
+                    logging.info(f"motion finished after {time.time() - start:.3f}s")
+                    blocking_decoder.stop_sampling()
+            else:
+                sent = self.octoprint_api.send_commands(commands)
+        except Exception as e:
+            logging.error(f"sending commands: {e}")
+            sent = -1
+        if -1 == sent:
+            logging.error("failed to send commands to OctoPrint, stopping sampling")
+            if decoder_thread.is_alive():
+                blocking_decoder.stop_sampling()
 
         logging.debug("waiting for decoding task finished...")
         decoder_thread.join()
@@ -86,6 +146,8 @@ class SamplingStepsRunner(Callable[[], int]):
         if 0 < exceptions_count:
             logging.error(f"subprocess terminated with {exceptions_count} exceptions, will raise first")
             raise exception_wrapper.exceptions[0]
+        if -1 == sent:
+            raise ConnectionError(f"failed to send {len(commands)} commands to OctoPrint")
 
         logging.debug(f"decoding task done in {time.time() - start:.3f}s")
 
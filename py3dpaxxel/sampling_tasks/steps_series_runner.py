@@ -3,12 +3,18 @@ import os
 import threading
 import time
 import uuid
-from typing import List, Literal, Tuple, Callable
+from typing import Any, Dict, List, Literal, Tuple, Callable, Optional
 
 from py3dpaxxel.controller.constants import OutputDataRate
+from py3dpaxxel.controller.device_session import DeviceSession
+from py3dpaxxel.gcode.motion_estimator import MotionTimeEstimator
 from py3dpaxxel.octoprint.api import OctoApi
+from py3dpaxxel.sampling_tasks.adaptive_argument_generator import AdaptiveRunArgsGenerator
 from py3dpaxxel.sampling_tasks.series_argument_generator import RunArgsGenerator, RunArgs
 from py3dpaxxel.sampling_tasks.steps_runner import SamplingStepsRunner
+from py3dpaxxel.sampling_tasks.stream_post_processor import StreamPostProcessor
+from py3dpaxxel.storage.series_manifest import SeriesManifest
+from py3dpaxxel.storage.stream_tail import StreamTail
 
 
 class SamplingStepsSeriesRunner(Callable[[], int]):
@@ -33,7 +39,41 @@ class SamplingStepsSeriesRunner(Callable[[], int]):
                  output_file_prefix: str,
                  output_dir: str,
                  do_dry_run: bool,
-                 do_abort_flag: threading.Event = threading.Event()) -> None:
+                 do_abort_flag: threading.Event = threading.Event(),
+                 post_processor: Optional[StreamPostProcessor] = None,
+                 stop_on_motion_finished: bool = False,
+                 motion_estimator: Optional[MotionTimeEstimator] = None,
+                 run_budget: int = 0,
+                 scorer: Optional[Callable[[str, str], float]] = None,
+                 coarse_factor: int = 4,
+                 refine_count: int = 2,
+                 resume_run_hash: Optional[str] = None,
+                 use_container: bool = False,
+                 container_codec: Literal["zlib", "lzma"] = "zlib",
+                 container_level: int = 6,
+                 resilient_decoding: bool = False,
+                 estimate_clock: bool = False) -> None:
+        """
+
+        :param post_processor: if given each recorded stream is handed over for background post-processing
+            while the next stream is recorded, the runner waits for all results before returning
+        :param stop_on_motion_finished: stops each recording once the printer finished all moves, see :class:`SamplingStepsRunner`
+        :param motion_estimator: sizes each recording to the predicted duration of its trajectory instead of `controller_record_timelapse_s`
+        :param run_budget: 0 records the full grid, otherwise sweeps coarse-to-fine with at most `run_budget` recordings
+            (see :class:`.AdaptiveRunArgsGenerator`)
+        :param scorer: scores a recorded stream (file name, axis of motion) for the adaptive sweep, lower is better,
+            defaults to :class:`py3dpaxxel.data_decomposition.resonance_analysis.StreamScore`
+        :param coarse_factor: step of the first adaptive grid in multiples of the fine step
+        :param refine_count: number of best grid points per axis the adaptive sweep refines around
+        :param resume_run_hash: resumes the series of this run hash (see :class:`.SeriesManifest`):
+            the sweep arguments are restored from the manifest and only missing or incomplete streams are recorded
+        :param use_container: appends each recorded stream to the sweep container `<output_file_prefix>-<run_hash>.pxc`
+            (see :class:`.SweepContainer`)
+        :param container_codec: block compression of the container
+        :param container_level: compression level of the container
+        :param resilient_decoding: keeps recordings with corrupted bytes or lost samples, see :meth:`.Py3dpAxxel.decode`
+        :param estimate_clock: stores the estimated actual sample rate in the metadata line, see :class:`.ClockEstimator`
+        """
         self.octoprint_api: OctoApi = octoprint_api
         self.controller_serial_device: str = controller_serial_device
         self.controller_record_timelapse_s: float = controller_record_timelapse_s
@@ -54,8 +94,198 @@ class SamplingStepsSeriesRunner(Callable[[], int]):
         self.output_dir: str = output_dir
         self.do_dry_run: bool = do_dry_run
         self.do_abort_flag: threading.Event = do_abort_flag
+        self.post_processor: Optional[StreamPostProcessor] = post_processor
+        self.stop_on_motion_finished: bool = stop_on_motion_finished
+        self.motion_estimator: Optional[MotionTimeEstimator] = motion_estimator
+        self.run_budget: int = run_budget
+        self.scorer: Optional[Callable[[str, str], float]] = scorer
+        self.coarse_factor: int = coarse_factor
+        self.refine_count: int = refine_count
+        self.resume_run_hash: Optional[str] = resume_run_hash
+        self.use_container: bool = use_container
+        self.container_codec: Literal["zlib", "lzma"] = container_codec
+        self.container_level: int = container_level
+        self.resilient_decoding: bool = resilient_decoding
+        self.estimate_clock: bool = estimate_clock
+        self._container = None
+        "sweep container of the series, if used"
+        self._recordings: int = 0
+        "number of recordings of this invocation (the first one homes and goes to start)"
 
     def __call__(self) -> int:
+        device_session = DeviceSession(self.controller_serial_device) if not self.do_dry_run else None
+        try:
+            return self._run(device_session)
+        finally:
+            if device_session is not None:
+                device_session.close()
+                logging.info(f"device session closed: device opened {device_session.open_count} times")
+            if self.post_processor is not None:
+                processed, failed = self.post_processor.close()
+                logging.info(f"post-processed streams={processed} failed={failed}")
+
+    RESUMABLE_ARGS = ("gcode_start_point_mm", "gcode_axis", "gcode_distance_mm", "gcode_step_repeat_count", "gcode_sequence_repeat_count",
+                      "fx_start_hz", "fx_stop_hz", "fx_step_hz", "zeta_start_em2", "zeta_stop_em2", "zeta_step_em2",
+                      "output_file_prefix", "run_budget", "coarse_factor", "refine_count")
+    "arguments stored in the manifest and restored on resume"
+
+    def _open_manifest(self) -> Tuple[Optional[SeriesManifest], str]:
+        """
+        :return: manifest (None on dry-run) and run hash of the series
+        """
+        if self.resume_run_hash is None:
+            run_hash = f"{uuid.uuid1().time_low:x}"  # each run shall have a pseudo UUID appended to prefix_1
+            if self.do_dry_run:
+                return None, run_hash
+            manifest = SeriesManifest(self.output_dir, run_hash)
+            manifest.begin({name: getattr(self, name) for name in SamplingStepsSeriesRunner.RESUMABLE_ARGS})
+            logging.info(f"series {run_hash}: manifest {manifest.filename}")
+            return manifest, run_hash
+
+        manifest = SeriesManifest(self.output_dir, self.resume_run_hash)
+        args: Optional[Dict[str, Any]] = manifest.args()
+        if args is None:
+            raise FileNotFoundError(f"no manifest of series {self.resume_run_hash} found: {manifest.filename}")
+        for name in SamplingStepsSeriesRunner.RESUMABLE_ARGS:
+            value = tuple(args[name]) if isinstance(getattr(self, name), tuple) else args[name]
+            if value != getattr(self, name):
+                logging.info(f"resume: {name}={value} restored from manifest")
+            setattr(self, name, value)
+        logging.info(f"series {self.resume_run_hash}: resuming from manifest {manifest.filename}")
+        return (manifest if not self.do_dry_run else None), self.resume_run_hash
+
+    def _completed(self, manifest: Optional[SeriesManifest], completed: Dict[str, Dict[str, Any]], r: RunArgs) -> Optional[Dict[str, Any]]:
+        """
+        :return: `run` record of a run recorded before, if its stream file is complete
+        """
+        if manifest is None:
+            return None
+        record = completed.get(SeriesManifest.key(r.sequence, r.axis, r.frequency_hz, r.zeta_em2))
+        if record is None:
+            return None
+        stream = os.path.join(self.output_dir, record["stream"])
+        if "ok" == record["status"] and StreamTail.is_complete(stream, not self.stop_on_motion_finished):
+            return record
+
+        logging.warning(f"resume: stream {record['stream']} is missing or incomplete, recording again")
+        if os.path.isfile(stream):
+            # keep the data but hide it from tools selecting stream files by extension
+            os.replace(stream, f"{stream}.{SeriesManifest.INCOMPLETE_EXTENSION}")
+        return None
+
+    def _record(self, r: RunArgs, device_session: Optional[DeviceSession], manifest: Optional[SeriesManifest]) -> bool:
+        """
+        :return: False if the series shall stop (abort flag set)
+        """
+        key = SeriesManifest.key(r.sequence, r.axis, r.frequency_hz, r.zeta_em2)
+        first = 0 == self._recordings
+        start = time.time()
+        try:
+            SamplingStepsRunner(
+                input_serial_device=self.controller_serial_device,
+                intput_sensor_odr=self.sensor_odr,
+                record_timelapse_s=self.controller_record_timelapse_s,
+                record_timeout_s=self.controller_decode_timeout_s,
+                output_filename=os.path.join(self.output_dir, r.filename),
+                octoprint_api=self.octoprint_api,
+                gcode_start_point_mm=self.gcode_start_point_mm,
+                gcode_extra_gcode=f"M593 {r.axis.upper()} F{r.frequency_hz} D{round((r.zeta_em2 / 100.0), 2)}",
+                gcode_axis=r.axis,
+                gcode_distance_mm=self.gcode_distance_mm,
+                gcode_step_repeat_count=self.gcode_step_repeat_count,
+                gcode_go_start=first,
+                gcode_return_start=True,
+                gcode_auto_home=first,
+                do_dry_run=self.do_dry_run,
+                do_abort_flag=self.do_abort_flag,
+                device_session=device_session,
+                stop_on_motion_finished=self.stop_on_motion_finished,
+                motion_estimator=self.motion_estimator,
+                resilient_decoding=self.resilient_decoding,
+                estimate_clock=self.estimate_clock)()
+        except Exception as e:
+            if manifest is not None:
+                manifest.complete(key, r.filename, "failed")
+            raise e
+        self._recordings += 1
+
+        if self.do_abort_flag.is_set():
+            logging.warning(f"sequence runner stopped ahead of time after {self._recordings} sequences because stop flag was set")
+            if manifest is not None:
+                manifest.complete(key, r.filename, "failed")
+            return False
+
+        logging.info(f"sampling job done in {time.time() - start:.3f}s")
+        if self._container is not None and not self._container.append_stream_file(os.path.join(self.output_dir, r.filename), key):
+            logging.warning(f"stream {r.filename} has no metadata: not appended to {self._container.filename}")
+        if self.post_processor is not None and not self.do_dry_run:
+            self.post_processor.submit(os.path.join(self.output_dir, r.filename), r.filename_meta)
+        time.sleep(0.2)
+        return True
+
+    def _run_adaptive(self, device_session: Optional[DeviceSession], manifest: Optional[SeriesManifest], run_hash: str) -> int:
+        generator = AdaptiveRunArgsGenerator(
+            sequence_repeat_count=self.gcode_sequence_repeat_count,
+            fx_start_hz=self.fx_start_hz,
+            fx_stop_hz=self.fx_stop_hz,
+            fx_step_hz=self.fx_step_hz,
+            zeta_start_em2=self.zeta_start_em2,
+            zeta_stop_em2=self.zeta_stop_em2,
+            zeta_step_em2=self.zeta_step_em2,
+            axis=self.gcode_axis,
+            out_file_prefix_1=self.output_file_prefix,
+            out_file_prefix_2=run_hash,
+            run_budget=self.run_budget,
+            coarse_factor=self.coarse_factor,
+            refine_count=self.refine_count)
+        logging.info(f"adaptive sweep: budget={self.run_budget} runs (full grid {generator.full_grid_size} runs)")
+
+        scorer = self.scorer
+        if scorer is None:
+            # numpy/scipy are loaded only if the adaptive sweep is used
+            from py3dpaxxel.data_decomposition.resonance_analysis import StreamScore
+            scorer = StreamScore()
+
+        completed = manifest.runs() if manifest is not None else {}
+        run_nr = 1
+        batch = generator.next_batch()
+        while batch:
+            if manifest is not None:
+                manifest.plan([SeriesManifest.key(r.sequence, r.axis, r.frequency_hz, r.zeta_em2) for r in batch])
+            for r in batch:
+                key = SeriesManifest.key(r.sequence, r.axis, r.frequency_hz, r.zeta_em2)
+                record = self._completed(manifest, completed, r)
+                if record is not None:
+                    # the sweep is deterministic given the scores: replaying them re-plans the same batches
+                    score = record["score"] if record["score"] is not None else scorer(os.path.join(self.output_dir, record["stream"]), r.axis)
+                    logging.info(f"run {run_nr}/{generator.planned}: resume: {record['stream']} recorded before, score {score:.3f}")
+                else:
+                    logging.info(f"run {run_nr}/{generator.planned} (budget {self.run_budget})")
+                    if not self._record(r, device_session, manifest):
+                        return -1
+                    score = scorer(os.path.join(self.output_dir, r.filename), r.axis) if not self.do_dry_run else float("nan")
+                    logging.info(f"score {score:.3f}: {r}")
+                    if manifest is not None:
+                        manifest.complete(key, r.filename, "ok", score)
+                generator.report(r, score)
+                run_nr += 1
+            batch = generator.next_batch()
+
+        for ax, (fx, zeta, score) in generator.best().items():
+            logging.info(f"adaptive sweep: axis {ax}: best fx={fx} zeta={zeta} score={score:.3f} after {run_nr - 1} runs")
+        return 0
+
+    def _run(self, device_session: Optional[DeviceSession]) -> int:
+        manifest, run_hash = self._open_manifest()
+        if self.use_container and not self.do_dry_run:
+            # numpy is loaded only if the container is used
+            from py3dpaxxel.storage.sweep_container import SweepContainer
+            self._container = SweepContainer(SweepContainer.filename_for(self.output_dir, self.output_file_prefix, run_hash),
+                                             codec=self.container_codec, compression_level=self.container_level)
+            logging.info(f"series {run_hash}: container {self._container.filename}")
+        if self.run_budget > 0:
+            return self._run_adaptive(device_session, manifest, run_hash)
+
         generator = RunArgsGenerator(
             sequence_repeat_count=self.gcode_sequence_repeat_count,
             fx_start_hz=self.fx_start_hz,
@@ -66,7 +296,7 @@ class SamplingStepsSeriesRunner(Callable[[], int]):
             zeta_step_em2=self.zeta_step_em2,
             axis=self.gcode_axis,
             out_file_prefix_1=self.output_file_prefix,
-            out_file_prefix_2=f"{uuid.uuid1().time_low:x}",  # each run shall have a pseudo UUID appended to prefix_1
+            out_file_prefix_2=run_hash,
         )
 
         runs: List[RunArgs] = generator.generate()
@@ -75,36 +305,24 @@ class SamplingStepsSeriesRunner(Callable[[], int]):
         if 0 == len(runs):
             return 0
 
+        completed: Dict[str, Dict[str, Any]] = {}
+        if manifest is not None:
+            completed = manifest.runs()
+            if self.resume_run_hash is None:
+                manifest.plan([SeriesManifest.key(r.sequence, r.axis, r.frequency_hz, r.zeta_em2) for r in runs])
+
         run_count_total = len(runs)
         run_nr = 1
         for r in runs:
             run_percent = int((run_nr / run_count_total) * 100 + 0.5)
-            logging.info(f"{run_percent}% run {run_nr}/{run_count_total}")
-
-            start = time.time()
-            SamplingStepsRunner(
-                input_serial_device=self.controller_serial_device,
-                intput_sensor_odr=self.sensor_odr,
-                record_timelapse_s=self.controller_record_timelapse_s,
-                record_timeout_s=self.controller_decode_timeout_s,
-                output_filename=os.path.join(self.output_dir, r.filename),
-                octoprint_api=self.octoprint_api,
-                gcode_start_point_mm=self.gcode_start_point_mm,
-                gcode_extra_gcode=f"M593 {r.axis.upper()} F{r.frequency_hz} D{round((r.zeta_em2 / 100.0), 2)}",
-                gcode_axis=r.axis,
-                gcode_distance_mm=self.gcode_distance_mm,
-                gcode_step_repeat_count=self.gcode_step_repeat_count,
-                gcode_go_start=True if run_nr <= 1 else False,
-                gcode_return_start=True,
-                gcode_auto_home=True if run_nr <= 1 else False,
-                do_dry_run=self.do_dry_run,
-                do_abort_flag=self.do_abort_flag)()
-
-            if self.do_abort_flag.is_set():
-                logging.warning(f"sequence runner stopped ahead of time after {run_nr} sequences because stop flag was set")
-                return -1
-
-            logging.info(f"sampling job done in {time.time() - start:.3f}s")
-            time.sleep(0.2)
+            record = self._completed(manifest, completed, r)
+            if record is not None:
+                logging.info(f"{run_percent}% run {run_nr}/{run_count_total}: resume: {record['stream']} recorded before")
+            else:
+                logging.info(f"{run_percent}% run {run_nr}/{run_count_total}")
+                if not self._record(r, device_session, manifest):
+                    return -1
+                if manifest is not None:
+                    manifest.complete(SeriesManifest.key(r.sequence, r.axis, r.frequency_hz, r.zeta_em2), r.filename, "ok")
             run_nr += 1
         return 0
@@ -0,0 +1,149 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, Future
+from typing import Dict, Any, List, Literal, Optional, Tuple
+
+from py3dpaxxel.storage.catalog import Catalog
+from py3dpaxxel.storage.filename_meta import FilenameMetaStream
+
+
+def _process_stream(in_filename: str,
+                    meta: Optional[FilenameMetaStream],
+                    out_dir: str,
+                    out_file_prefix: str,
+                    algorithm: str,
+                    out_format: Literal["tsv", "npz"]) -> Dict[str, Any]:
+    """
+    Decomposes one stream file and computes its summary metrics (runs in a worker process).
+
+    :param meta: metadata of the stream file name, None to parse it from the file name
+    :return: catalog record
+    """
+    # numpy/scipy are loaded by the worker processes only
+    import numpy as np
+    from py3dpaxxel.data_decomposition.decompose_algorithms import DecomposeFftAlgorithms1D
+    from py3dpaxxel.data_decomposition.decompose_runner import DataDecomposeRunner
+    from py3dpaxxel.samples.loader import SamplesLoader
+
+    name = os.path.basename(in_filename)
+    meta = FilenameMetaStream().from_filename(name) if meta is None else meta
+    record: Dict[str, Any] = {
+        "stream": name,
+        "run_hash": meta.run_hash,
+        "stream_hash": meta.stream_hash,
+        "sequence_nr": meta.sequence_nr,
+        "sequence_axis": meta.sequence_axis,
+        "sequence_frequency_hz": meta.sequence_frequency_hz,
+        "sequence_zeta_em2": meta.sequence_zeta_em2,
+    }
+
+    samples = SamplesLoader(in_filename).load()
+    if not samples.has_meta() or samples.is_empty() or 0 != len(samples) % 2:
+        record.update({"status": "skipped", "samples": len(samples)})
+        return record
+
+    fft_xyz = DecomposeFftAlgorithms1D().compute(algorithm, samples)
+    _total, processed, _skipped = DataDecomposeRunner.fft_1d(algorithm, samples, meta, out_dir, out_file_prefix, True, out_format, fft_xyz)
+
+    xyz = np.column_stack((samples.x, samples.y, samples.z))
+    magnitude = np.vstack((fft_xyz.x, fft_xyz.y, fft_xyz.z))
+    peak_index = np.argmax(magnitude[:, 1:], axis=1) + 1  # ignore DC
+    record.update({
+        "status": "ok",
+        "samples": len(samples),
+        "rms_mg": dict(zip("xyz", np.round(np.sqrt(np.mean(xyz ** 2, axis=0)), 3).tolist())),
+        "ptp_mg": dict(zip("xyz", np.round(np.ptp(xyz, axis=0), 3).tolist())),
+        "peak_hz": dict(zip("xyz", np.round(np.asarray(fft_xyz.frequency_hz)[peak_index], 3).tolist())),
+        "peak_mg": dict(zip("xyz", np.round(magnitude[np.arange(3), peak_index], 3).tolist())),
+        "fft_algorithm": algorithm,
+        "fft_files": processed,
+    })
+    return record
+
+
+class StreamPostProcessor:
+    """
+    Post-processes recorded streams in a background process pool while the next stream is being recorded.
+
+    For each submitted stream file: FFT (written like :class:`py3dpaxxel.data_decomposition.decompose_runner.DataDecomposeRunner`),
+    summary metrics (RMS, peak-to-peak, dominant frequency per axis) and one record appended to the :class:`Catalog`.
+    The catalog is written by the submitting process only.
+    """
+
+    def __init__(self,
+                 out_dir: str,
+                 out_file_prefix: str = "fft",
+                 algorithm: str = "discrete",
+                 out_format: Literal["tsv", "npz"] = "tsv",
+                 catalog: Optional[Catalog] = None,
+                 num_workers: int = 2) -> None:
+        """
+
+        :param out_dir: where to store the decomposed streams
+        :param out_file_prefix: prefix of decomposed stream files
+        :param algorithm: see :class:`py3dpaxxel.data_decomposition.decompose_algorithms.DecomposeFftAlgorithms1D`
+        :param out_format: one file per axis (tsv) or one file per stream (npz)
+        :param catalog: where to append the summary records, None to disable
+        :param num_workers: number of worker processes
+        """
+        self.out_dir: str = out_dir
+        self.out_file_prefix: str = out_file_prefix
+        self.algorithm: str = algorithm
+        self.out_format: Literal["tsv", "npz"] = out_format
+        self.catalog: Optional[Catalog] = catalog
+        self.num_workers: int = num_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._futures: List[Future] = []
+        self._lock: threading.Lock = threading.Lock()
+        self.processed: int = 0
+        self.failed: int = 0
+
+    def submit(self, stream_filename: str, meta: Optional[FilenameMetaStream] = None) -> None:
+        """
+        Queues a recorded stream file, returns immediately.
+
+        :param stream_filename: stream file
+        :param meta: metadata of the stream file name (i.e. :attr:`.RunArgs.filename_meta`), None to parse it from the file name
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.num_workers)
+        future = self._executor.submit(_process_stream, stream_filename, meta, self.out_dir, self.out_file_prefix, self.algorithm, self.out_format)
+        future.add_done_callback(lambda f, filename=stream_filename: self._on_done(filename, f))
+        self._futures.append(future)
+
+    def _on_done(self, stream_filename: str, future: Future) -> None:
+        try:
+            record = future.result()
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            logging.error(f"post-processing failed for {os.path.basename(stream_filename)}: {e}")
+            return
+
+        with self._lock:
+            self.processed += 1
+        if self.catalog is not None:
+            self.catalog.append(record)
+        logging.info(f"post-processed {record['stream']}: status={record['status']} peak_hz={record.get('peak_hz')}")
+
+    def close(self) -> Tuple[int, int]:
+        """
+        Waits until all submitted streams are processed and releases the workers.
+
+        :return: number of processed and failed streams
+        """
+        if self._executor is not None:
+            start = time.time()
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            logging.info(f"post-processing finished {time.time() - start:.3f}s after last submission")
+        self._futures = []
+        return self.processed, self.failed
+
+    def __enter__(self) -> "StreamPostProcessor":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,61 @@
+#!/bin/env python3
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+SCRIPTS = ("datavis.py", "decompose.py", "analyze.py")
+"command line scripts whose `--help` must not load heavy dependencies"
+HEAVY_MODULES = ("numpy", "scipy", "matplotlib", "yaml")
+
+_PROBE = """
+import runpy, sys
+sys.argv = [sys.argv[1], "--help"]
+try:
+    runpy.run_path(sys.argv[0], run_name="__main__")
+except SystemExit:
+    pass
+sys.stderr.write(",".join([m for m in {heavy} if m in sys.modules]))
+"""
+
+
+def measure(script: str, repetitions: int) -> Tuple[float, List[str]]:
+    """
+    :return: median wall time of `script --help` in ms and the heavy modules loaded by it
+    """
+    durations_ms = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, script, "--help"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        durations_ms.append((time.perf_counter() - start) * 1000.0)
+
+    probe = subprocess.run([sys.executable, "-c", _PROBE.format(heavy=HEAVY_MODULES), script],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True, text=True)
+    loaded = [m for m in probe.stderr.strip().split(",") if m]
+    return statistics.median(durations_ms), loaded
+
+
+def benchmark(repetitions: int, max_ms: float) -> int:
+    dir_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..")
+    failed = 0
+    for name in SCRIPTS:
+        median_ms, loaded = measure(os.path.join(dir_path, name), repetitions)
+        ok = 0 == len(loaded) and (max_ms <= 0.0 or median_ms <= max_ms)
+        failed += 0 if ok else 1
+        print(f"{'ok  ' if ok else 'FAIL'} {name:<14} {median_ms:8.1f} ms  heavy modules loaded: {', '.join(loaded) if loaded else '-'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+        description="Measures the start-up time of the command line scripts (`--help`) "
+                    "and fails if heavy dependencies are loaded or the time limit is exceeded.")
+    parser.add_argument("-n", "--repetitions", help="Runs per script (median is reported).", type=int, default=5)
+    parser.add_argument("--maxms", help="Time limit per script in ms (0 disables).", type=float, default=0.0)
+    cli_args = parser.parse_args()
+    sys.exit(benchmark(cli_args.repetitions, cli_args.maxms))
@@ -0,0 +1,58 @@
+import json
+import os
+import threading
+from typing import Dict, Iterator, Any
+
+
+class Catalog:
+    """
+    Append-only index of processed streams, one JSON object per line (JSON lines).
+
+    Records are appended atomically per line, thus a catalog can be read while it is still being written
+    and a truncated last line (i.e. after a crash) is skipped on reading.
+
+    Example record:
+
+    .. code-block::
+
+        {"stream": "octo-a81829a6-3670a097-...-s000-ax-f020-z005.tsv", "run_hash": "a81829a6", ..., "peak_hz": {"x": 45.0, ...}}
+    """
+
+    EXTENSION = "jsonl"
+
+    def __init__(self, filename: str) -> None:
+        """
+
+        :param filename: catalog file, created on first append
+        """
+        self.filename: str = filename
+        self._lock: threading.Lock = threading.Lock()
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """
+        Appends one record (thread safe).
+
+        :param record: JSON serializable dict
+        :return: None
+        """
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            with open(self.filename, "a") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def read(self) -> Iterator[Dict[str, Any]]:
+        """
+        :return: generator of all complete records in order of appending
+        """
+        if not os.path.isfile(self.filename):
+            return
+        with open(self.filename, "r") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
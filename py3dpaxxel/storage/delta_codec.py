@@ -0,0 +1,103 @@
+import lzma
+import zlib
+from typing import Any, Dict, List, Literal, Sequence, Tuple
+
+import numpy as np
+
+
+class DeltaBlockCodec:
+    """
+    Lossless encoding of int16 sample columns (i.e. raw acceleration counts) in independently compressed blocks.
+
+    Each block of `block_samples` samples is encoded column by column:
+
+    - delta to the previous sample of the column (the first sample of a block to 0, wraps around like int16)
+    - byte planes: all low bytes followed by all high bytes (small deltas leave the high byte plane almost constant)
+    - compressed by `zlib` or `lzma` with the given level
+
+    Blocks are decodable independently, so a range of samples is decoded from its blocks only (see :meth:`decode`).
+
+    Example:
+
+    .. code-block::
+
+        codec = DeltaBlockCodec("lzma", 6)
+        data, block_sizes = codec.encode(counts)  # counts: int16 array of shape (samples, columns)
+        counts = codec.decode(data, block_sizes, samples=len(counts), columns=counts.shape[1])
+    """
+
+    CODECS = ("zlib", "lzma")
+    "supported block compressions"
+
+    def __init__(self, codec: Literal["zlib", "lzma"] = "zlib", level: int = 6, block_samples: int = 4096) -> None:
+        """
+
+        :param codec: block compression
+        :param level: compression level (zlib: 0..9, lzma preset: 0..9)
+        :param block_samples: samples per block, granularity of random access
+        """
+        if codec not in DeltaBlockCodec.CODECS:
+            raise ValueError(f"unknown codec {codec}, supported: {', '.join(DeltaBlockCodec.CODECS)}")
+        self.codec: Literal["zlib", "lzma"] = codec
+        self.level: int = level
+        self.block_samples: int = block_samples
+
+    def to_meta(self) -> Dict[str, Any]:
+        return {"codec": self.codec, "level": self.level, "block_samples": self.block_samples}
+
+    @staticmethod
+    def from_meta(meta: Dict[str, Any]) -> "DeltaBlockCodec":
+        return DeltaBlockCodec(meta["codec"], meta["level"], meta["block_samples"])
+
+    def _compress(self, data: bytes) -> bytes:
+        if "lzma" == self.codec:
+            return lzma.compress(data, preset=self.level)
+        return zlib.compress(data, self.level)
+
+    def _decompress(self, data: bytes) -> bytes:
+        if "lzma" == self.codec:
+            return lzma.decompress(data)
+        return zlib.decompress(data)
+
+    def encode(self, counts: np.ndarray) -> Tuple[bytes, List[int]]:
+        """
+        :param counts: int16 array of shape (samples, columns)
+        :return: encoded blocks and the size of each block in bytes
+        """
+        counts = np.asarray(counts, dtype=np.int16)
+        blocks: List[bytes] = []
+        for begin in range(0, len(counts), self.block_samples):
+            block = np.ascontiguousarray(counts[begin:begin + self.block_samples].T)
+            delta = np.diff(block, axis=1, prepend=np.zeros((block.shape[0], 1), dtype=np.int16))
+            planes = delta.astype("<i2").view(np.uint8).reshape(-1, 2).T
+            blocks.append(self._compress(planes.tobytes()))
+        return b"".join(blocks), [len(b) for b in blocks]
+
+    def decode(self, data: bytes, block_sizes: Sequence[int], samples: int, columns: int, first_block: int = 0) -> np.ndarray:
+        """
+        Decodes consecutive blocks.
+
+        :param data: encoded blocks, starting with block `first_block`
+        :param block_sizes: sizes of the blocks contained in `data`
+        :param samples: number of samples of the whole encoded array
+        :param columns: number of columns
+        :param first_block: index of the first block contained in `data`
+        :return: int16 array of shape (decoded samples, columns)
+        """
+        decoded: List[np.ndarray] = []
+        offset = 0
+        for i, size in enumerate(block_sizes):
+            count = min(self.block_samples, samples - (first_block + i) * self.block_samples)
+            planes = np.frombuffer(self._decompress(data[offset:offset + size]), dtype=np.uint8).reshape(2, -1)
+            delta = np.ascontiguousarray(planes.T).view("<i2").reshape(columns, count)
+            decoded.append(np.cumsum(delta, axis=1, dtype=np.int16).T)
+            offset += size
+        if not decoded:
+            return np.zeros((0, columns), dtype=np.int16)
+        return np.concatenate(decoded)
+
+    def blocks_of(self, start: int, count: int) -> Tuple[int, int]:
+        """
+        :return: range of blocks (first, last exclusive) containing the samples `start` to `start + count`
+        """
+        return start // self.block_samples, -(-(start + count) // self.block_samples)
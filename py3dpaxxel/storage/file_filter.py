@@ -1,45 +1,98 @@
+import fnmatch
 import os
 import re
-from dataclasses import dataclass, field
-from typing import List
+from typing import Iterator, List, Optional
 
 
-@dataclass(init=False)
 class File:
-    full_path: str
-    _full_path: str = field(init=False, repr=False)
-    filename_ext: str
-    filename_no_ext: str
-    directory: str
-    extension: str
+    """
+    Lightweight record of a selected file: stores directory and file name only, all other parts are derived on access.
+    """
 
-    def __init__(self, full_path: str = "file-does-not.exist") -> None:
-        self.full_path = full_path
+    __slots__ = ("directory", "filename_ext")
+
+    def __init__(self, full_path: str = "file-does-not.exist", directory: Optional[str] = None) -> None:
+        """
+
+        :param full_path: path of the file, or the file name if `directory` is given
+        :param directory: directory of the file, splits `full_path` if None
+        """
+        if directory is None:
+            directory, full_path = os.path.split(full_path)
+        self.directory: str = directory
+        self.filename_ext: str = full_path
 
     @property
     def full_path(self) -> str:
-        return self._full_path
+        return os.path.join(self.directory, self.filename_ext)
 
     @full_path.setter
     def full_path(self, full_path: str):
-        self._full_path = full_path
-        self.filename_ext = os.path.basename(full_path)
-        self.filename_no_ext = os.path.splitext(self.filename_ext)[0]
-        self.directory = os.path.dirname(full_path)
-        self.extension = os.path.splitext(self.filename_ext)[1]
+        self.directory, self.filename_ext = os.path.split(full_path)
+
+    @property
+    def filename_no_ext(self) -> str:
+        return os.path.splitext(self.filename_ext)[0]
+
+    @property
+    def extension(self) -> str:
+        return os.path.splitext(self.filename_ext)[1]
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, File) and self.full_path == other.full_path
+
+    def __hash__(self) -> int:
+        return hash(self.full_path)
+
+    def __repr__(self) -> str:
+        return f"File(full_path={self.full_path!r})"
 
 
 class FileSelector:
-    def __init__(self, file_name_regexp: str) -> None:
+    """
+    Selects files by name pattern: the directory part of the pattern is taken as is, the file name part is matched against the names of
+    all files within that directory.
+
+    - regex mode (default): the file name part is a regular expression matched from start, i.e. `test_data/octo-.*\\.tsv`
+    - glob mode: the file name part is a shell pattern, i.e. `test_data/octo-*.tsv`
+    - recursive: also matches files in all subdirectories (symbolic links to directories are not followed)
+
+    Directories are read with `os.scandir`, the file type is taken from the directory entry without additional stat calls
+    (on most file systems).
+    """
+
+    def __init__(self, file_name_regexp: str, recursive: bool = False, glob: bool = False) -> None:
+        """
+
+        :param file_name_regexp: directory and file name pattern
+        :param recursive: descends into subdirectories
+        :param glob: the file name pattern is a shell pattern instead of a regular expression
+        """
         self.directory = os.path.join(".", os.path.dirname(file_name_regexp))
         self.filename = os.path.basename(file_name_regexp)
+        self.recursive: bool = recursive
+        self.glob: bool = glob
 
-    def filter(self) -> List[File]:
-        regex = re.compile(self.filename)
-
-        files = []
-        for file in [f for f in os.listdir(self.directory) if os.path.isfile(os.path.join(self.directory, f))]:
-            if regex.match(file):
-                files.append(File(os.path.join(self.directory, file)))
+    def select(self) -> Iterator[File]:
+        """
+        :return: generator of matching files in directory order (subdirectories after the files of their parent directory)
+        """
+        regex = re.compile(fnmatch.translate(self.filename) if self.glob else self.filename)
+        directories = [self.directory]
+        while directories:
+            directory = directories.pop(0)
+            subdirectories = []
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        if regex.match(entry.name):
+                            yield File(entry.name, directory)
+                    elif self.recursive and entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(entry.path)
+            directories[0:0] = subdirectories
 
-        return files
+    def filter(self) -> List[File]:
+        """
+        :return: all matching files, see :meth:`select`
+        """
+        return list(self.select())
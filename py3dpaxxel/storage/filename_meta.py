@@ -1,11 +1,87 @@
 import re
 from dataclasses import dataclass
-from typing import Optional, Literal, Dict, Tuple
+from typing import Optional, Literal, NamedTuple, Pattern
 
 from .filename import timestamp_from_args
 from .filename_fft import generate_filename_for_fft_regex, generate_filename_for_fft
 from .filename_stream import generate_filename_for_run_regex, generate_filename_for_run
 
+STREAM_FILENAME_REGEX: Pattern = re.compile(generate_filename_for_run_regex(True, True, True))
+"stream file name with all three prefixes, see :func:`.generate_filename_for_run`"
+FFT_FILENAME_REGEX: Pattern = re.compile(generate_filename_for_fft_regex(True, True, True))
+"FFT file name with all three prefixes, see :func:`.generate_filename_for_fft`"
+
+
+class StreamName(NamedTuple):
+    """
+    Metadata parsed from a stream file name, i.e. "axxel-0815-4711-20231110-182030456-s100-ax-f200-z300.tsv".
+    """
+
+    prefix: str
+    run_hash: str
+    stream_hash: str
+    year: int
+    month: int
+    day: int
+    hour: int
+    minute: int
+    second: int
+    milli_second: int
+    sequence_nr: int
+    sequence_axis: str
+    sequence_frequency_hz: int
+    sequence_zeta_em2: int
+    file_extension: str
+
+
+class FftName(NamedTuple):
+    """
+    Metadata parsed from an FFT file name, i.e. "fft-0815-4711-20231110-182030456-s100-ax-f200-z300-z.tsv".
+    """
+
+    prefix: str
+    run_hash: str
+    stream_hash: str
+    year: int
+    month: int
+    day: int
+    hour: int
+    minute: int
+    second: int
+    milli_second: int
+    sequence_nr: int
+    sequence_axis: str
+    sequence_frequency_hz: int
+    sequence_zeta_em2: int
+    fft_axis: str
+    file_extension: str
+
+
+def parse_stream_filename(filename: str) -> Optional[StreamName]:
+    """
+    :param filename: file name without directory
+    :return: parsed metadata, None if the name does not match
+    """
+    match = STREAM_FILENAME_REGEX.match(filename)
+    if match is None:
+        return None
+    g = match.groups()
+    return StreamName(g[0], g[1], g[2], int(g[3]), int(g[4]), int(g[5]), int(g[6]), int(g[7]), int(g[8]), int(g[9]),
+                      int(g[10]), g[11], int(g[12]), int(g[13]), g[14])
+
+
+def parse_fft_filename(filename: str) -> Optional[FftName]:
+    """
+    :param filename: file name without directory
+    :return: parsed metadata, None if the name does not match
+    """
+    match = FFT_FILENAME_REGEX.match(filename)
+    if match is None:
+        return None
+    g = match.groups()
+    return FftName(g[0], g[1], g[2], int(g[3]), int(g[4]), int(g[5]), int(g[6]), int(g[7]), int(g[8]), int(g[9]),
+                   int(g[10]), g[11], int(g[12]), int(g[13]), g[14], g[15])
+
 
 @dataclass
 class FilenameMeta:
@@ -33,36 +109,6 @@ class FilenameMeta:
             self.__setattr__(k, v)
         return self
 
-    @staticmethod
-    def regex_group_mapping() -> Dict[int, Tuple[str, type]]:
-        return {
-            1: ("prefix", str),
-            2: ("run_hash", str),
-            3: ("stream_hash", str),
-            4: ("year", int),
-            5: ("month", int),
-            6: ("day", int),
-            7: ("hour", int),
-            8: ("minute", int),
-            9: ("second", int),
-            10: ("milli_second", int),
-            11: ("sequence_nr", int),
-            12: ("sequence_axis", str),
-            13: ("sequence_frequency_hz", int),
-            14: ("sequence_zeta_em2", int),
-        }
-
-    def read_attr_from_meta(self, filename: str, regex: str, re_group_mapping: Dict[int, Tuple[str, type]]):
-        regexp = re.compile(regex)
-        match = regexp.match(filename)
-
-        assert len(match.groups()) == len(re_group_mapping.items())
-
-        for group_index, (attr, type_cast) in re_group_mapping.items():
-            setattr(self, attr, type_cast(match.group(group_index)))
-
-        return self
-
 
 @dataclass
 class FilenameMetaStream(FilenameMeta):
@@ -80,12 +126,11 @@ class FilenameMetaStream(FilenameMeta):
         :return: self
         """
 
-        re_group_mapping: Dict[int, Tuple[str, type]] = self.regex_group_mapping()
-        last_index = max(re_group_mapping.keys())
-        re_group_mapping[last_index + 1] = ("file_extension", str)
-        regex_str = generate_filename_for_run_regex(True, True, True)
-
-        return self.read_attr_from_meta(filename, regex_str, re_group_mapping)
+        name = parse_stream_filename(filename)
+        if name is None:
+            raise ValueError(f"not a stream file name: {filename}")
+        vars(self).update(zip(StreamName._fields, name))
+        return self
 
     def from_filename_meta_fft(self, from_obj: "FilenameMetaFft") -> "FilenameMetaStream":
         self.from_filename_meta(from_obj)
@@ -129,13 +174,11 @@ class FilenameMetaFft(FilenameMeta):
         :return: self
         """
 
-        re_group_mapping: Dict[int, Tuple[str, type]] = self.regex_group_mapping()
-        last_index = max(re_group_mapping.keys())
-        re_group_mapping[last_index + 1] = ("fft_axis", str)
-        re_group_mapping[last_index + 2] = ("file_extension", str)
-        regex_str = generate_filename_for_fft_regex(True, True, True)
-
-        return self.read_attr_from_meta(filename, regex_str, re_group_mapping)
+        name = parse_fft_filename(filename)
+        if name is None:
+            raise ValueError(f"not an FFT file name: {filename}")
+        vars(self).update(zip(FftName._fields, name))
+        return self
 
     def from_filename_meta_stream(self, from_obj: FilenameMetaStream) -> "FilenameMetaFft":
         self.from_filename_meta(from_obj)
@@ -26,7 +26,8 @@ def generate_filename_for_run(prefix_1: Optional[str],
 def generate_filename_for_run_regex(with_prefix_1: bool = True,
                                     with_prefix_2: bool = False,
                                     with_prefix_3: bool = False) -> str:
-    pre_1_regex = r"(\w+)-" if with_prefix_1 else ""
+    # the first prefix may contain hyphens (i.e. "octo-capture"), the others may not
+    pre_1_regex = r"([\w-]+)-" if with_prefix_1 else ""
     pre_2_regex = r"(\w+)-" if with_prefix_2 else ""
     pre_3_regex = r"(\w+)-" if with_prefix_3 else ""
     return pre_1_regex + pre_2_regex + pre_3_regex + timestamp_regex() + r"-s(\d{3})-a(\w{1})-f(\d{3})-z(\d{3}).(\w+)"
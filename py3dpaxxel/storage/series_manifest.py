@@ -0,0 +1,89 @@
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from .catalog import Catalog
+
+
+class SeriesManifest:
+    """
+    Checkpoint of a recording series, allows to resume an interrupted series by its run hash.
+
+    Stored as append-only JSON lines (see :class:`.Catalog`) next to the stream files, named `manifest-<run_hash>.jsonl`:
+
+    - one `series` record with the arguments of the series
+    - `planned` records with the keys of planned runs (one per batch)
+    - one `run` record per recording with stream file name, status ("ok", "failed") and score (adaptive sweeps)
+
+    A run is identified by its key `s<sequence>-a<axis>-f<frequency>-z<zeta>` (the file name part that does not change on re-recording).
+
+    Example records:
+
+    .. code-block::
+
+        {"type":"series","run_hash":"a81829a6","created":1700000000.0,"args":{"fx_start_hz":20, ...}}
+        {"type":"planned","keys":["s000-ax-f020-z000","s000-ax-f020-z005", ...]}
+        {"type":"run","key":"s000-ax-f020-z000","stream":"octo-a81829a6-...-s000-ax-f020-z000.tsv","status":"ok","score":null,"time":1700000003.2}
+    """
+
+    PREFIX = "manifest"
+    INCOMPLETE_EXTENSION = "incomplete"
+    "appended to incomplete stream files replaced on resume"
+
+    def __init__(self, directory: str, run_hash: str) -> None:
+        """
+
+        :param directory: directory of the stream files
+        :param run_hash: run hash of the series (`out_file_prefix_2`)
+        """
+        self.directory: str = directory
+        self.run_hash: str = run_hash
+        self.catalog: Catalog = Catalog(os.path.join(directory, f"{SeriesManifest.PREFIX}-{run_hash}.{Catalog.EXTENSION}"))
+
+    @property
+    def filename(self) -> str:
+        return self.catalog.filename
+
+    def exists(self) -> bool:
+        return os.path.isfile(self.filename)
+
+    @staticmethod
+    def key(sequence: int, axis: str, frequency_hz: int, zeta_em2: int) -> str:
+        return f"s{sequence:03}-a{axis}-f{frequency_hz:03}-z{zeta_em2:03}"
+
+    def begin(self, args: Dict[str, Any]) -> None:
+        """
+        :param args: arguments of the series, used to re-plan on resume
+        """
+        self.catalog.append({"type": "series", "run_hash": self.run_hash, "created": time.time(), "args": args})
+
+    def plan(self, keys: List[str]) -> None:
+        self.catalog.append({"type": "planned", "keys": keys})
+
+    def complete(self, key: str, stream: str, status: str, score: Optional[float] = None) -> None:
+        self.catalog.append({"type": "run", "key": key, "stream": stream, "status": status, "score": score, "time": time.time()})
+
+    def args(self) -> Optional[Dict[str, Any]]:
+        """
+        :return: arguments of the series, None if the manifest has no series record
+        """
+        for record in self.catalog.read():
+            if "series" == record.get("type"):
+                return record["args"]
+        return None
+
+    def runs(self) -> Dict[str, Dict[str, Any]]:
+        """
+        :return: latest `run` record per key
+        """
+        return {record["key"]: record for record in self.catalog.read() if "run" == record.get("type")}
+
+    def planned(self) -> List[str]:
+        """
+        :return: keys of all planned runs in order
+        """
+        keys: Dict[str, None] = {}
+        for record in self.catalog.read():
+            if "planned" == record.get("type"):
+                keys.update(dict.fromkeys(record["keys"]))
+        return list(keys.keys())
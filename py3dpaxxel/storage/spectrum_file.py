@@ -0,0 +1,89 @@
+import json
+from dataclasses import asdict
+from typing import Dict, Tuple, Union, Optional, Sequence
+
+import numpy as np
+
+from .filename_meta import FilenameMetaFft
+
+
+class SpectrumFile:
+    """
+    Single-file binary storage of the decomposed spectrum of one stream.
+
+    Instead of one text file per axis, frequency and x/y/z magnitudes are stored as one `float32` array
+    with the columns :attr:`COLUMNS` in a `.npz` archive.
+    The header (`meta` entry) contains the :class:`py3dpaxxel.storage.filename_meta.FilenameMetaFft` equivalent metadata as JSON string.
+
+    Example:
+
+    .. code-block::
+
+        spectrum = [[freq_hz, x, y, z],
+                    [freq_hz, x, y, z],
+                    ...]
+        meta = {"prefix": "fft", "run_hash": "a81829a6", ..., "fft_axis": "xyz", "file_extension": "npz"}
+    """
+
+    EXTENSION = "npz"
+    "file extension of binary spectrum files"
+    FFT_AXIS = "xyz"
+    "all measured axis are stored in one file"
+    COLUMNS = ("freq_hz", "x", "y", "z")
+    "column names of the stored spectrum array"
+
+    @staticmethod
+    def save(filename: str,
+             frequency_hz: np.ndarray,
+             x: np.ndarray,
+             y: np.ndarray,
+             z: np.ndarray,
+             meta: FilenameMetaFft,
+             extra_meta: Optional[Dict[str, Union[str, int, float]]] = None) -> None:
+        """
+        Stores the spectrum of one stream.
+
+        :param filename: output file name (`.npz`)
+        :param frequency_hz: frequency bins
+        :param x: magnitude of x-axis
+        :param y: magnitude of y-axis
+        :param z: magnitude of z-axis
+        :param meta: file metadata to be stored in the header
+        :param extra_meta: additional metadata (i.e. algorithm name) to be stored in the header
+        :return: None
+        """
+        SpectrumFile.save_columns(filename, SpectrumFile.COLUMNS, np.column_stack((frequency_hz, x, y, z)), meta, extra_meta)
+
+    @staticmethod
+    def save_columns(filename: str,
+                     columns: Sequence[str],
+                     spectrum: np.ndarray,
+                     meta: FilenameMetaFft,
+                     extra_meta: Optional[Dict[str, Union[str, int, float]]] = None) -> None:
+        """
+        Stores an arbitrary spectrum table, i.e. averaged PSD with variance bands.
+
+        :param filename: output file name (`.npz`)
+        :param columns: column names stored as `columns` in the header, first column shall be `freq_hz`
+        :param spectrum: 2-D array of shape `(bins, len(columns))`
+        :param meta: file metadata to be stored in the header
+        :param extra_meta: additional metadata (i.e. algorithm name) to be stored in the header
+        :return: None
+        """
+        assert spectrum.shape[1] == len(columns), f"column count mismatch: {spectrum.shape[1]} vs {len(columns)}"
+        header = asdict(meta)
+        header.update(extra_meta if extra_meta is not None else {})
+        header["columns"] = list(columns)
+        with open(filename, "wb") as f:
+            np.savez(f, spectrum=spectrum.astype(np.float32), meta=np.array(json.dumps(header)))
+
+    @staticmethod
+    def load(filename: str) -> Tuple[np.ndarray, Dict[str, Union[str, int, float, None]]]:
+        """
+        Loads the spectrum of one stream.
+
+        :param filename: input file name (`.npz`)
+        :return: tuple of spectrum array (column names see `columns` in header) and header metadata
+        """
+        with np.load(filename, allow_pickle=False) as npz:
+            return npz["spectrum"], json.loads(str(npz["meta"]))
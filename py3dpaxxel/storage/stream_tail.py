@@ -0,0 +1,73 @@
+import json
+import os
+from typing import Any, Dict, Optional
+
+
+class StreamTail:
+    """
+    Reads the metadata line at the end of a stream file without reading the samples.
+
+    The decoder writes the metadata line (i.e. `# {"firmware": ..., "samples": {"requested": "6400", "received": "6400"}}`)
+    only after the last sample, hence a stream file with a valid tail was completely written.
+    """
+
+    TAIL_BYTES = 4096
+    "bytes read from the end of the file, covers the metadata line and the last sample lines"
+
+    @staticmethod
+    def read(filename: str) -> Optional[Dict[str, Any]]:
+        """
+        :param filename: stream file
+        :return: metadata of the stream, None if the file does not exist or has no (valid) metadata line
+        """
+        lines = StreamTail._tail_lines(filename)
+        if lines is None or 0 == len(lines) or not lines[-1].startswith("# "):
+            return None
+        try:
+            return json.loads(lines[-1][2:])
+        except json.JSONDecodeError:
+            return None
+
+    @staticmethod
+    def _tail_lines(filename: str) -> Optional[list]:
+        if not os.path.isfile(filename):
+            return None
+        with open(filename, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - StreamTail.TAIL_BYTES))
+            tail = f.read().decode("utf8", errors="replace")
+        if not tail.endswith("\n"):
+            return None
+        return tail.splitlines()[1 if size > StreamTail.TAIL_BYTES else 0:]
+
+    @staticmethod
+    def is_complete(filename: str, require_all_samples: bool = True) -> bool:
+        """
+        Validates a stream file by its tail: the metadata line is present, the last sample line matches the received sample count
+        and, if required, all requested samples were received.
+        Samples lost while decoding resiliently (see `integrity` in :meth:`.Py3dpAxxel.decode`) count as received,
+        truncated streams are complete only if not all samples are required.
+
+        :param filename: stream file
+        :param require_all_samples: if False, streams stopped ahead of time (received less than requested) are complete too
+        :return: True if the stream file is complete
+        """
+        lines = StreamTail._tail_lines(filename)
+        meta = StreamTail.read(filename)
+        if meta is None or "samples" not in meta:
+            return False
+
+        try:
+            requested = int(meta["samples"]["requested"])
+            received = int(meta["samples"]["received"])
+            lost = int(meta["integrity"]["lost"]) if "integrity" in meta else 0
+            truncated = "integrity" in meta and "true" == meta["integrity"]["truncated"]
+        except (KeyError, ValueError):
+            return False
+        if received <= 0 or (require_all_samples and (truncated or received + lost != requested)):
+            return False
+
+        # last sample line: "<seq> <index> <x> <y> <z>"
+        last_sample = lines[-2].split() if len(lines) >= 2 else []
+        return 5 == len(last_sample) and last_sample[1].isdigit() and int(last_sample[1]) == (received + lost - 1) % 65536
@@ -0,0 +1,373 @@
+import json
+import os
+import struct
+import threading
+import zlib
+from typing import Any, BinaryIO, Dict, Iterator, List, Literal, Optional, Tuple
+
+import numpy as np
+
+from py3dpaxxel.controller.constants import OutputDataRate, OutputDataRateDelay, Range, Scale
+from py3dpaxxel.controller.transfer_types import FirmwareVersion, RxAcceleration
+from py3dpaxxel.samples.samples import Samples
+from .delta_codec import DeltaBlockCodec
+from .filename_meta import FilenameMetaStream
+from .series_manifest import SeriesManifest
+from .stream_tail import StreamTail
+
+
+class SweepContainer:
+    """
+    Single-file storage of all streams of a sweep (one container per run hash) instead of one stream file per run.
+
+    Streams are appended as chunks as soon as they are recorded, chunks are never rewritten.
+    An index footer after the last chunk maps the run key (see :meth:`.SeriesManifest.key`) to the chunk offset,
+    it is replaced on each append.
+    A container without valid footer (i.e. after a crash while appending) is recovered by scanning the chunks.
+
+    Layout (little endian):
+
+    .. code-block::
+
+        header: "PXSC" version:u16 reserved:u16
+        chunk:  "CHNK" meta_len:u32 data_len:u32 crc32:u32 meta:json data
+        ...
+        index:  "INDX" index_len:u32 crc32:u32 index:json
+        footer: index_offset:u64 "PXIE"
+
+    Chunk metadata contains the stream file name, the key, the stream metadata (firmware, sensor, samples; see :class:`.StreamTail`),
+    the stored columns and their encoding:
+
+    - `delta`: accelerations as raw counts (mg / :attr:`.RxAcceleration.FULL_RESOLUTION_LSB_SCALE`), all columns encoded by
+      :class:`.DeltaBlockCodec`, a range of samples is read from its blocks only
+    - `zlib`: columns as stored (:attr:`COLUMNS`) compressed as a whole, used if the accelerations are no multiples of the LSB
+      (i.e. calibrated samples)
+
+    Example:
+
+    .. code-block::
+
+        container = SweepContainer(SweepContainer.filename_for("test_data", "octo", "a81829a6"))
+        container.append_stream_file("test_data/octo-a81829a6-3670a097-...-s000-ax-f020-z005.tsv")
+        meta, columns = container.read(0, "x", 20, 5)
+        for meta, columns in container.read_all():
+            samples = SweepContainer.to_samples(meta, columns)
+    """
+
+    EXTENSION = "pxc"
+    "file extension of sweep containers"
+    VERSION = 1
+    "container format version"
+    COLUMNS: List[Tuple[str, str]] = [("seq", "<u1"), ("sample", "<u2"), ("x", "<f4"), ("y", "<f4"), ("z", "<f4")]
+    "stored columns and their data types, accelerations in mg"
+
+    _HEADER = struct.Struct("<4sHH")
+    _CHUNK = struct.Struct("<4sIII")
+    _INDEX = struct.Struct("<4sII")
+    _FOOTER = struct.Struct("<Q4s")
+
+    def __init__(self,
+                 filename: str,
+                 encoding: Literal["delta", "zlib"] = "delta",
+                 codec: Literal["zlib", "lzma"] = "zlib",
+                 compression_level: int = 6,
+                 block_samples: int = 4096) -> None:
+        """
+
+        :param filename: container file, created on first append
+        :param encoding: encoding of appended chunks, existing chunks are read regardless of their encoding
+        :param codec: block compression of the `delta` encoding
+        :param compression_level: compression level of chunks
+        :param block_samples: samples per block of the `delta` encoding
+        """
+        self.filename: str = filename
+        self.encoding: Literal["delta", "zlib"] = encoding
+        self.compression_level: int = compression_level
+        self.codec: DeltaBlockCodec = DeltaBlockCodec(codec, compression_level, block_samples)
+        self._lock: threading.Lock = threading.Lock()
+
+    @staticmethod
+    def filename_for(directory: str, prefix: str, run_hash: str) -> str:
+        """
+        :return: container file of a sweep, i.e. "test_data/octo-a81829a6.pxc"
+        """
+        return os.path.join(directory, f"{prefix}-{run_hash}.{SweepContainer.EXTENSION}")
+
+    def exists(self) -> bool:
+        return os.path.isfile(self.filename)
+
+    def append(self, stream: str, columns: Dict[str, np.ndarray], meta: Dict[str, Any], key: Optional[str] = None) -> None:
+        """
+        Appends one stream (thread safe). A stream with the key of a stream appended before replaces it in the index.
+
+        :param stream: stream file name (without directory)
+        :param columns: samples per column, see :attr:`COLUMNS`
+        :param meta: stream metadata, see :class:`.StreamTail`
+        :param key: key of the stream (see :meth:`.SeriesManifest.key`), None derives it from the stream file name
+        :return: None
+        """
+        if key is None:
+            name = FilenameMetaStream().from_filename(stream)
+            key = SeriesManifest.key(name.sequence_nr, name.sequence_axis, name.sequence_frequency_hz, name.sequence_zeta_em2)
+        count = len(columns["sample"])
+        chunk_meta: Dict[str, Any] = {"key": key, "stream": stream, "samples": count, "columns": SweepContainer.COLUMNS, "meta": meta}
+        counts = self._counts(columns) if "delta" == self.encoding else None
+        if counts is not None:
+            data, blocks = self.codec.encode(counts)
+            chunk_meta.update({"encoding": "delta", "codec": self.codec.to_meta(), "blocks": blocks, "lsb_mg": RxAcceleration.FULL_RESOLUTION_LSB_SCALE})
+        else:
+            data = zlib.compress(b"".join([np.ascontiguousarray(columns[c], dtype=t).tobytes() for c, t in SweepContainer.COLUMNS]),
+                                 self.compression_level)
+            chunk_meta["encoding"] = "zlib"
+        encoded_meta = json.dumps(chunk_meta, separators=(",", ":")).encode("utf8")
+
+        with self._lock:
+            with open(self.filename, "r+b" if self.exists() else "w+b") as f:
+                index, end = self._read_index(f)
+                if end is None:
+                    f.write(SweepContainer._HEADER.pack(b"PXSC", SweepContainer.VERSION, 0))
+                    end = f.tell()
+                f.seek(end)
+                f.write(SweepContainer._CHUNK.pack(b"CHNK", len(encoded_meta), len(data), zlib.crc32(data, zlib.crc32(encoded_meta))))
+                f.write(encoded_meta)
+                f.write(data)
+                index[key] = {"stream": stream, "offset": end, "samples": count}
+                self._write_index(f, index)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def append_stream_file(self, filename: str, key: Optional[str] = None) -> bool:
+        """
+        Appends a stream file (see :class:`py3dpaxxel.samples.loader.SamplesLoader`).
+
+        :param filename: stream file
+        :param key: see :meth:`append`
+        :return: False if the stream file has no metadata line (incomplete)
+        """
+        meta = StreamTail.read(filename)
+        if meta is None:
+            return False
+        table = np.loadtxt(filename, comments="#", skiprows=1, ndmin=2)
+        self.append(os.path.basename(filename), {c: table[:, i] for i, (c, _t) in enumerate(SweepContainer.COLUMNS)}, meta, key)
+        return True
+
+    def index(self) -> Dict[str, Dict[str, Any]]:
+        """
+        :return: latest index entry (stream, offset, samples) per key
+        """
+        if not self.exists():
+            return {}
+        with open(self.filename, "rb") as f:
+            return self._read_index(f)[0]
+
+    def read(self,
+             sequence: int,
+             axis: str,
+             frequency_hz: int,
+             zeta_em2: int,
+             start: int = 0,
+             count: Optional[int] = None) -> Optional[Tuple[Dict[str, Any], Dict[str, np.ndarray]]]:
+        """
+        Reads one stream, seeks to its chunk directly.
+        A range of samples of a `delta` encoded chunk is read and decoded from the blocks containing it only.
+
+        :param start: first sample to read
+        :param count: number of samples to read, None reads all samples from `start`
+        :return: chunk metadata and columns, None if the container has no such stream
+        """
+        entry = self.index().get(SeriesManifest.key(sequence, axis, frequency_hz, zeta_em2))
+        if entry is None:
+            return None
+        count = max(0, min(entry["samples"] - start, entry["samples"] if count is None else count))
+        with open(self.filename, "rb") as f:
+            f.seek(entry["offset"])
+            header = SweepContainer._read_chunk_header(f)
+            if header is None:
+                raise ValueError(f"corrupt chunk at offset {entry['offset']} in {self.filename}")
+            meta, data_len, crc, meta_crc = header
+            if "delta" != meta.get("encoding") or (0 == start and count == meta["samples"]):
+                chunk = SweepContainer._read_chunk_data(f, meta, data_len, crc, meta_crc)
+                if chunk is None:
+                    raise ValueError(f"corrupt chunk at offset {entry['offset']} in {self.filename}")
+                return meta, {c: v[start:start + count] for c, v in chunk[1].items()}
+
+            codec = DeltaBlockCodec.from_meta(meta["codec"])
+            first, last = codec.blocks_of(start, count)
+            f.seek(sum(meta["blocks"][:first]), os.SEEK_CUR)
+            data = f.read(sum(meta["blocks"][first:last]))
+        columns = SweepContainer._decode_delta(meta, data, first, last)
+        skip = start - first * codec.block_samples
+        return meta, {c: v[skip:skip + count] for c, v in columns.items()}
+
+    def read_all(self) -> Iterator[Tuple[Dict[str, Any], Dict[str, np.ndarray]]]:
+        """
+        Reads all streams in one sequential pass in order of appending, replaced streams are skipped.
+
+        :return: generator of chunk metadata and columns
+        """
+        if not self.exists():
+            return
+        with open(self.filename, "rb") as f:
+            index, end = self._read_index(f)
+            offsets = {entry["offset"] for entry in index.values()}
+            f.seek(SweepContainer._HEADER.size)
+            while f.tell() < end:
+                offset = f.tell()
+                chunk = SweepContainer._read_chunk(f, offset in offsets)
+                if chunk is None:
+                    break
+                if offset in offsets:
+                    yield chunk
+
+    @staticmethod
+    def to_samples(meta: Dict[str, Any], columns: Dict[str, np.ndarray]) -> Samples:
+        """
+        :param meta: chunk metadata, see :meth:`read`
+        :param columns: columns of the chunk
+        :return: samples like loaded by :class:`py3dpaxxel.samples.loader.SamplesLoader`
+        """
+        samples = Samples()
+        stream_meta = meta["meta"]
+        samples.rate = OutputDataRate[stream_meta["sensor"]["rate"]]
+        samples.range = Range[stream_meta["sensor"]["range"]]
+        samples.scale = Scale[stream_meta["sensor"]["scale"]]
+        samples.firmware_version = FirmwareVersion.from_string(stream_meta["firmware"]["version"])
+        samples.separation_s = OutputDataRateDelay[samples.rate]
+        if "clock" in stream_meta:
+            samples.separation_s = 1.0 / float(stream_meta["clock"]["rate_hz"])
+        samples.gaps = stream_meta["integrity"]["gaps"] if "integrity" in stream_meta else []
+        samples.run = columns["seq"].astype(int).tolist()
+        samples.index = columns["sample"].astype(int).tolist()
+        samples.timestamp_ms = (columns["sample"].astype(np.float64) * samples.separation_s * 1000).tolist()
+        samples.x = columns["x"].astype(np.float64).tolist()
+        samples.y = columns["y"].astype(np.float64).tolist()
+        samples.z = columns["z"].astype(np.float64).tolist()
+        return samples
+
+    @staticmethod
+    def _counts(columns: Dict[str, np.ndarray]) -> Optional[np.ndarray]:
+        """
+        :return: int16 array of all columns with accelerations as counts, None if not representable losslessly
+        """
+        xyz = np.column_stack((columns["x"], columns["y"], columns["z"])).astype(np.float64)
+        counts = np.rint(xyz / RxAcceleration.FULL_RESOLUTION_LSB_SCALE)
+        seq = np.asarray(columns["seq"])
+        if (len(xyz) > 0 and (np.abs(counts).max() > 32767 or np.abs(counts * RxAcceleration.FULL_RESOLUTION_LSB_SCALE - xyz).max() > 5e-4
+                              or seq.min() < 0 or seq.max() > 255)):
+            return None
+        return np.column_stack((seq.astype(np.int16), np.asarray(columns["sample"]).astype(np.uint16).view(np.int16), counts.astype(np.int16)))
+
+    @staticmethod
+    def _decode_delta(meta: Dict[str, Any], data: bytes, first: int, last: int) -> Dict[str, np.ndarray]:
+        counts = DeltaBlockCodec.from_meta(meta["codec"]).decode(data, meta["blocks"][first:last], meta["samples"], len(meta["columns"]), first)
+        columns: Dict[str, np.ndarray] = {}
+        for i, (c, t) in enumerate(meta["columns"]):
+            if c in ("x", "y", "z"):
+                columns[c] = (counts[:, i] * meta["lsb_mg"]).astype(t)
+            else:
+                columns[c] = counts[:, i].astype(t)
+        return columns
+
+    @staticmethod
+    def _read_chunk_header(f: BinaryIO) -> Optional[Tuple[Dict[str, Any], int, int, int]]:
+        """
+        Reads the chunk header and metadata at the current position.
+
+        :return: chunk metadata, data length, checksum of the chunk and checksum of the metadata, None if there is no valid chunk
+        """
+        header = f.read(SweepContainer._CHUNK.size)
+        if len(header) < SweepContainer._CHUNK.size:
+            return None
+        magic, meta_len, data_len, crc = SweepContainer._CHUNK.unpack(header)
+        if b"CHNK" != magic:
+            return None
+        chunk_meta = f.read(meta_len)
+        try:
+            meta = json.loads(chunk_meta)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return None
+        return meta, data_len, crc, zlib.crc32(chunk_meta)
+
+    @staticmethod
+    def _read_chunk_data(f: BinaryIO, meta: Dict[str, Any], data_len: int, crc: int, meta_crc: int) -> Optional[Tuple[Dict[str, Any], Dict[str, np.ndarray]]]:
+        data = f.read(data_len)
+        if len(data) < data_len or zlib.crc32(data, meta_crc) != crc:
+            return None
+        if "delta" == meta.get("encoding"):
+            return meta, SweepContainer._decode_delta(meta, data, 0, len(meta["blocks"]))
+
+        raw = zlib.decompress(data)
+        columns: Dict[str, np.ndarray] = {}
+        offset = 0
+        for c, t in meta["columns"]:
+            columns[c] = np.frombuffer(raw, dtype=t, count=meta["samples"], offset=offset)
+            offset += columns[c].nbytes
+        return meta, columns
+
+    @staticmethod
+    def _read_chunk(f: BinaryIO, decode: bool) -> Optional[Tuple[Dict[str, Any], Dict[str, np.ndarray]]]:
+        """
+        Reads the chunk at the current position, skips its data if not to be decoded.
+
+        :return: chunk metadata and columns (empty if not decoded), None if there is no valid chunk
+        """
+        header = SweepContainer._read_chunk_header(f)
+        if header is None:
+            return None
+        meta, data_len, crc, meta_crc = header
+        if not decode:
+            f.seek(data_len, os.SEEK_CUR)
+            return meta, {}
+        return SweepContainer._read_chunk_data(f, meta, data_len, crc, meta_crc)
+
+    @staticmethod
+    def _read_index(f: BinaryIO) -> Tuple[Dict[str, Dict[str, Any]], Optional[int]]:
+        """
+        Reads the index footer, scans the chunks if there is no valid footer.
+
+        :return: index and offset behind the last chunk (None if the file has no header)
+        """
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(0)
+        header = f.read(SweepContainer._HEADER.size)
+        if len(header) < SweepContainer._HEADER.size:
+            return {}, None
+        magic, version, _reserved = SweepContainer._HEADER.unpack(header)
+        if b"PXSC" != magic or version > SweepContainer.VERSION:
+            raise ValueError(f"not a sweep container (version {SweepContainer.VERSION}): {f.name}")
+
+        if size >= SweepContainer._HEADER.size + SweepContainer._INDEX.size + SweepContainer._FOOTER.size:
+            f.seek(size - SweepContainer._FOOTER.size)
+            index_offset, magic = SweepContainer._FOOTER.unpack(f.read(SweepContainer._FOOTER.size))
+            if b"PXIE" == magic and index_offset < size:
+                f.seek(index_offset)
+                magic, index_len, crc = SweepContainer._INDEX.unpack(f.read(SweepContainer._INDEX.size))
+                index = f.read(index_len)
+                if b"INDX" == magic and zlib.crc32(index) == crc:
+                    return json.loads(index), index_offset
+
+        # no valid footer: recover the index from all complete chunks
+        index: Dict[str, Dict[str, Any]] = {}
+        end = SweepContainer._HEADER.size
+        f.seek(end)
+        while True:
+            chunk = SweepContainer._read_chunk(f, True)
+            if chunk is None:
+                break
+            meta, _columns = chunk
+            index[meta["key"]] = {"stream": meta["stream"], "offset": end, "samples": meta["samples"]}
+            end = f.tell()
+        return index, end
+
+    @staticmethod
+    def _write_index(f: BinaryIO, index: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Writes index and footer at the current position and truncates the file behind.
+        """
+        offset = f.tell()
+        data = json.dumps(index, separators=(",", ":")).encode("utf8")
+        f.write(SweepContainer._INDEX.pack(b"INDX", len(data), zlib.crc32(data)))
+        f.write(data)
+        f.write(SweepContainer._FOOTER.pack(offset, b"PXIE"))
+        f.truncate()
@@ -3,6 +3,7 @@ from setuptools import setup
 
 packages = \
 ['py3dpaxxel',
+ 'py3dpaxxel.calibration',
  'py3dpaxxel.cli',
  'py3dpaxxel.controller',
  'py3dpaxxel.data_decomposition',